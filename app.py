@@ -19,9 +19,6 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-if 'trade_history' not in st.session_state:
-    st.session_state.trade_history = []
-
 if 'last_data_refresh' not in st.session_state:
     st.session_state.last_data_refresh = None
 
@@ -5,4 +5,132 @@ from dotenv import load_dotenv
 load_dotenv()
 
 WATCHLIST = ["TCS", "INFY", "RELIANCE", "HDFCBANK", "SBIN"]
-SEC_DICT = {'RELIANCE':'500325', 'HDFCBANK':'1333', 'INFY': '500209', 'SBIN':'3045', 'TCS': '11536'}
\ No newline at end of file
+SEC_DICT = {'RELIANCE':'500325', 'HDFCBANK':'1333', 'INFY': '500209', 'SBIN':'3045', 'TCS': '11536'}
+
+# Market data downloader
+DOWNLOAD_MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", "8"))
+DOWNLOAD_RATE_LIMIT = float(os.getenv("DOWNLOAD_RATE_LIMIT", "4"))  # requests per second
+DOWNLOAD_MAX_RETRIES = int(os.getenv("DOWNLOAD_MAX_RETRIES", "3"))
+DOWNLOAD_BACKOFF_SECONDS = float(os.getenv("DOWNLOAD_BACKOFF_SECONDS", "1.0"))
+
+# Incremental refresh: cold starts backfill HISTORY_PERIOD, later refreshes re-request
+# REFRESH_OVERLAP_DAYS before each symbol's latest stored bar to pick up corrections
+HISTORY_PERIOD = os.getenv("HISTORY_PERIOD", "100d")
+REFRESH_OVERLAP_DAYS = int(os.getenv("REFRESH_OVERLAP_DAYS", "3"))
+
+# Intraday bars are opt-in: with BAR_INTERVAL set to e.g. 5m, those bars are downloaded (cold starts backfill
+# INTRADAY_HISTORY_PERIOD, which yfinance caps at 7d for 1m and 60d for 5m) and DERIVED_TIMEFRAMES are
+# aggregated from them on ingest. Daily history older than that is downloaded once per symbol.
+BAR_INTERVAL = os.getenv("BAR_INTERVAL", "1d")
+DERIVED_TIMEFRAMES = [s.strip() for s in os.getenv("DERIVED_TIMEFRAMES", "15m,1h,1d").split(",") if s.strip()]
+INTRADAY_HISTORY_PERIOD = os.getenv("INTRADAY_HISTORY_PERIOD", "30d")
+# Intraday refreshes re-request this many BAR_INTERVAL bars before the latest stored one (REFRESH_OVERLAP_DAYS applies to daily bars)
+INTRADAY_REFRESH_OVERLAP_BARS = int(os.getenv("INTRADAY_REFRESH_OVERLAP_BARS", "3"))
+SESSION_OPEN = os.getenv("SESSION_OPEN", "09:15")  # intraday buckets are aligned to the exchange open
+SESSION_CLOSE = os.getenv("SESSION_CLOSE", "15:30")
+# Bars older than this many days are pruned on refresh, as "<timeframe>:<days>" pairs; daily bars are kept
+BAR_RETENTION_DAYS = {
+    timeframe.strip(): int(days)
+    for timeframe, days in (item.split(":") for item in os.getenv(
+        "BAR_RETENTION_DAYS", "1m:7,5m:30,15m:120,1h:365"
+    ).split(",") if item.strip())
+}
+
+# Shared in-process OHLCV cache
+OHLCV_CACHE_MAX_ENTRIES = int(os.getenv("OHLCV_CACHE_MAX_ENTRIES", "512"))
+OHLCV_CACHE_TTL_SECONDS = float(os.getenv("OHLCV_CACHE_TTL_SECONDS", "300"))
+# Charts draw at most CHART_MAX_POINTS candles, merging bars over longer ranges; built figures are cached
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "500"))
+FIGURE_CACHE_MAX_ENTRIES = int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "64"))
+# Broker funds, positions and holdings are refetched in the background once the snapshot is this old
+ACCOUNT_CACHE_TTL_SECONDS = float(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "15"))
+
+# Technical indicators computed by services.indicator_service, as "<name>_<period>" specs
+# (macd uses the standard 12/26/9 periods and takes no suffix)
+INDICATORS = [s.strip() for s in os.getenv(
+    "INDICATORS", "sma_20,sma_50,ema_20,rsi_14,macd,atr_14,bollinger_20,vwap_20"
+).split(",") if s.strip()]
+INDICATOR_CACHE_MAX_ENTRIES = int(os.getenv("INDICATOR_CACHE_MAX_ENTRIES", "512"))
+# Indicators maintained bar by bar in indicator_snapshots (sma, ema, rsi and atr are supported)
+STREAMING_INDICATORS = [s.strip() for s in os.getenv(
+    "STREAMING_INDICATORS", "sma_20,sma_50,ema_20,rsi_14,atr_14"
+).split(",") if s.strip()]
+
+# LLM signal generation
+LLM_MODEL = os.getenv("LLM_MODEL", "DeepSeek-R1")
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Symbols packed into one request by get_trade_decisions; 1 sends one request per symbol
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))
+# Read completions as a token stream and close it once the decision JSON is complete
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes")
+# The model reasons before answering and ends its reasoning with </think>, possibly without the opening tag
+LLM_REASONING = os.getenv("LLM_REASONING", "true").lower() in ("1", "true", "yes")
+# Decisions are reused for an identical prompt and model until they expire
+SIGNAL_CACHE_TTL_SECONDS = float(os.getenv("SIGNAL_CACHE_TTL_SECONDS", "21600"))
+SIGNAL_CACHE_MAX_ENTRIES = int(os.getenv("SIGNAL_CACHE_MAX_ENTRIES", "5000"))
+# Prompt size: PROMPT_LOOKBACK_BARS recent bars are sent as CSV with PROMPT_INDICATORS values on the
+# latest bar; older bars are dropped while the estimated size exceeds PROMPT_TOKEN_BUDGET tokens
+PROMPT_LOOKBACK_BARS = int(os.getenv("PROMPT_LOOKBACK_BARS", "10"))
+PROMPT_INDICATORS = [s.strip() for s in os.getenv(
+    "PROMPT_INDICATORS", "sma_20,sma_50,rsi_14,atr_14"
+).split(",") if s.strip()]
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+PROMPT_PRICE_DECIMALS = int(os.getenv("PROMPT_PRICE_DECIMALS", "2"))
+
+# Pre-LLM screener: pipeline cycles only send symbols whose latest daily bar meets at least one of
+# SCREENER_RULES (sma_cross, breakout, volume_spike, price_change) to the LLM
+SCREENER_ENABLED = os.getenv("SCREENER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCREENER_RULES = [s.strip() for s in os.getenv(
+    "SCREENER_RULES", "sma_cross,breakout,volume_spike,price_change"
+).split(",") if s.strip()]
+SCREENER_SMA_FAST = int(os.getenv("SCREENER_SMA_FAST", "20"))
+SCREENER_SMA_SLOW = int(os.getenv("SCREENER_SMA_SLOW", "50"))
+SCREENER_WINDOW = int(os.getenv("SCREENER_WINDOW", "20"))  # Bollinger window and average volume lookback
+SCREENER_VOLUME_MULTIPLE = float(os.getenv("SCREENER_VOLUME_MULTIPLE", "2.0"))
+SCREENER_CHANGE_PCT = float(os.getenv("SCREENER_CHANGE_PCT", "2.0"))
+
+# Background worker (python worker.py)
+WORKER_INTERVAL_SECONDS = float(os.getenv("WORKER_INTERVAL_SECONDS", "900"))
+WORKER_AUTO_EXECUTE = os.getenv("WORKER_AUTO_EXECUTE", "false").lower() in ("1", "true", "yes")
+
+# Streaming ingestion (python worker.py --stream / --replay): bars built from ticks are flushed to storage
+# every STREAM_FLUSH_SECONDS or STREAM_BATCH_SIZE closed bars; signals run at most every STREAM_SIGNAL_INTERVAL_SECONDS
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "5"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+STREAM_SIGNAL_INTERVAL_SECONDS = float(os.getenv("STREAM_SIGNAL_INTERVAL_SECONDS", "900"))
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1"))  # 0 replays as fast as possible
+
+# Risk limits applied before execution; values saved on the Bot Settings page override these defaults
+RISK_MIN_CONFIDENCE = int(os.getenv("RISK_MIN_CONFIDENCE", "7"))
+RISK_MAX_RISK_SCORE = int(os.getenv("RISK_MAX_RISK_SCORE", "5"))
+RISK_MAX_DAILY_TRADES = int(os.getenv("RISK_MAX_DAILY_TRADES", "5"))
+RISK_PER_TRADE_PCT = float(os.getenv("RISK_PER_TRADE_PCT", "1.0"))  # capital lost if the stop is hit
+RISK_MAX_SYMBOL_EXPOSURE_PCT = float(os.getenv("RISK_MAX_SYMBOL_EXPOSURE_PCT", "20"))
+RISK_CAPITAL = float(os.getenv("RISK_CAPITAL", "1000000"))  # used when the broker account is unavailable
+
+# Order execution: "paper" fills orders locally with simulated latency and slippage, "dhan" sends them to the broker.
+# Orders are placed concurrently by up to BROKER_MAX_IN_FLIGHT workers sharing one broker session.
+EXECUTION_BROKER = os.getenv("EXECUTION_BROKER", "paper").lower()
+BROKER_MAX_IN_FLIGHT = int(os.getenv("BROKER_MAX_IN_FLIGHT", "4"))
+BROKER_REQUESTS_PER_SECOND = float(os.getenv("BROKER_REQUESTS_PER_SECOND", "10"))
+ORDER_POLL_SECONDS = float(os.getenv("ORDER_POLL_SECONDS", "2"))
+ORDER_DRAIN_SECONDS = float(os.getenv("ORDER_DRAIN_SECONDS", "60"))  # worker --once waits this long for fills
+PAPER_LATENCY_MS = float(os.getenv("PAPER_LATENCY_MS", "150"))
+PAPER_FILL_SECONDS = float(os.getenv("PAPER_FILL_SECONDS", "3"))  # until a market order is completely filled
+PAPER_REJECT_RATE = float(os.getenv("PAPER_REJECT_RATE", "0"))
+
+# Trade journal writes are buffered and flushed in batches
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "50"))
+JOURNAL_FLUSH_SECONDS = float(os.getenv("JOURNAL_FLUSH_SECONDS", "2"))
+
+# Backtesting defaults
+BACKTEST_SLIPPAGE_BPS = float(os.getenv("BACKTEST_SLIPPAGE_BPS", "5"))
+BACKTEST_FEE_BPS = float(os.getenv("BACKTEST_FEE_BPS", "3"))
+BACKTEST_MAX_HOLDING_BARS = int(os.getenv("BACKTEST_MAX_HOLDING_BARS", "20"))
+BACKTEST_CAPITAL_PER_TRADE = float(os.getenv("BACKTEST_CAPITAL_PER_TRADE", "100000"))
+SWEEP_MAX_WORKERS = int(os.getenv("SWEEP_MAX_WORKERS", str(os.cpu_count() or 2)))
+
+# OHLCV storage backend: "sql" (DATABASE_URL) or "parquet" (one directory per symbol under OHLCV_PARQUET_DIR)
+OHLCV_BACKEND = os.getenv("OHLCV_BACKEND", "sql").lower()
+OHLCV_PARQUET_DIR = os.getenv("OHLCV_PARQUET_DIR", "ohlcv_parquet")
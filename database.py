@@ -1,16 +1,71 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 import streamlit as st
-from models import Base
+from models import Base, OHLCVData, PipelineRun, TradeExecution
 import os
 
+def _create_index(engine, name: str) -> None:
+    for index in OHLCVData.__table__.indexes:
+        if index.name == name:
+            index.create(engine, checkfirst=True)
+
+def _migrate_schema(engine) -> None:
+    # create_all() does not touch tables that already exist, so databases created by older
+    # versions are brought up to date here. Every step is idempotent.
+    inspector = inspect(engine)
+    existing = {ix['name'] for ix in inspector.get_indexes(OHLCVData.__tablename__)}
+    columns = {column['name'] for column in inspector.get_columns(OHLCVData.__tablename__)}
+    changed = False
+    
+    if 'timeframe' not in columns:
+        # Bars stored before multi-timeframe support are all daily
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE ohlcv_data ADD COLUMN timeframe VARCHAR NOT NULL DEFAULT '1d'"))
+        changed = True
+    
+    if 'ux_ohlcv_symbol_timeframe_datetime' not in existing:
+        # The composite unique index cannot be built while duplicate bars exist
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM ohlcv_data WHERE id NOT IN "
+                "(SELECT MIN(id) FROM ohlcv_data GROUP BY symbol, timeframe, datetime)"
+            ))
+        _create_index(engine, 'ux_ohlcv_symbol_timeframe_datetime')
+        changed = True
+    
+    run_columns = {column['name'] for column in inspector.get_columns(PipelineRun.__tablename__)}
+    if 'screened_out' not in run_columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE pipeline_runs ADD COLUMN screened_out INTEGER NOT NULL DEFAULT 0"))
+    
+    execution_columns = {column['name'] for column in inspector.get_columns(TradeExecution.__tablename__)}
+    for name, kind in (('client_order_id', 'VARCHAR'), ('broker_order_id', 'VARCHAR'), ('filled_quantity', 'INTEGER')):
+        if name not in execution_columns:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE trade_executions ADD COLUMN {name} {kind}"))
+    for index in TradeExecution.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    
+    for name in ('ix_ohlcv_data_symbol', 'ux_ohlcv_symbol_datetime'):
+        if name in existing:
+            # Superseded by the composite index, whose leading column is symbol
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {name}"))
+            changed = True
+    
+    if changed and engine.dialect.name == 'sqlite':
+        # Refresh planner statistics so the composite index is preferred over the datetime index
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE ohlcv_data"))
+
 @st.cache_resource
 def get_database_engine():
     try:
         DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///trading_data.db")
         engine = create_engine(DATABASE_URL)
         Base.metadata.create_all(engine)
+        _migrate_schema(engine)
         return engine
     except Exception as e:
         st.error(f"Database connection error: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, Integer, Index
+from sqlalchemy import Column, String, Float, DateTime, Integer, Index, JSON, Text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -7,9 +7,99 @@ class OHLCVData(Base):
     __tablename__ = 'ohlcv_data'
     id = Column(Integer, primary_key=True, autoincrement=True)
     datetime = Column(DateTime, nullable=False, index=True)
-    symbol = Column(String, nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    timeframe = Column(String, nullable=False, default='1d', server_default='1d')
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
     close = Column(Float, nullable=False)
-    volume = Column(Float, nullable=False)
\ No newline at end of file
+    volume = Column(Float, nullable=False)
+
+    # One bar per symbol, timeframe and timestamp. Ingestion relies on it for ON CONFLICT, and as a
+    # composite index it serves symbol + timeframe + datetime range reads in order without a separate sort
+    __table_args__ = (
+        Index('ux_ohlcv_symbol_timeframe_datetime', 'symbol', 'timeframe', 'datetime', unique=True),
+    )
+
+class IndicatorSnapshot(Base):
+    __tablename__ = 'indicator_snapshots'
+    symbol = Column(String, primary_key=True)
+    # Streaming state has folded in every bar up to base_as_of; the latest bar is applied on top
+    # of it to produce `values`, so revisions of the latest bar never corrupt the state
+    base_as_of = Column(DateTime, nullable=True)
+    base_state = Column(JSON, nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    close = Column(Float, nullable=False)
+    values = Column(JSON, nullable=False)
+
+class SignalCacheEntry(Base):
+    __tablename__ = 'signal_cache'
+    # sha256 of the model name and the exact prompt sent to it
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    symbol = Column(String, nullable=False)
+    decision = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
+
+class BotSetting(Base):
+    __tablename__ = 'bot_settings'
+    key = Column(String, primary_key=True)
+    value = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class PipelineRun(Base):
+    __tablename__ = 'pipeline_runs'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    symbols = Column(Integer, nullable=False, default=0)
+    signals = Column(Integer, nullable=False, default=0)
+    executed = Column(Integer, nullable=False, default=0)
+    refresh_message = Column(String, nullable=True)
+    # Symbols the screener kept away from the LLM
+    screened_out = Column(Integer, nullable=False, default=0, server_default='0')
+    # {symbol: {"trade": {...}, "triggers": [...], "rejected": "..."}, {"error": "..."} or {"skipped": "..."}}
+    # for the cycle's signal stage; "rejected" is set when the risk checks blocked execution
+    results = Column(JSON, nullable=False, default=dict)
+
+class TradeSignal(Base):
+    __tablename__ = 'trade_signals'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Assigned when the signal is buffered, so executions can reference it before it is written
+    uid = Column(String, nullable=False, unique=True)
+    timestamp = Column(DateTime, nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    entry_price = Column(Float, nullable=True)
+    stop_loss = Column(Float, nullable=True)
+    take_profit = Column(Float, nullable=True)
+    order_type = Column(String, nullable=True)
+    risk_score = Column(Integer, nullable=True)
+    confidence = Column(Integer, nullable=True)
+    reasoning = Column(Text, nullable=True)
+    model = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index('ix_trade_signals_symbol_timestamp', 'symbol', 'timestamp'),
+    )
+
+class TradeExecution(Base):
+    __tablename__ = 'trade_executions'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    signal_uid = Column(String, nullable=True, index=True)
+    timestamp = Column(DateTime, nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    order_type = Column(String, nullable=True)
+    quantity = Column(Integer, nullable=True)
+    price = Column(Float, nullable=True)
+    status = Column(String, nullable=False)
+    message = Column(Text, nullable=True)
+    # Set for orders sent through the execution gateway; the client order id dedupes resubmissions of a signal
+    client_order_id = Column(String, nullable=True, index=True)
+    broker_order_id = Column(String, nullable=True)
+    filled_quantity = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('ix_trade_executions_symbol_timestamp', 'symbol', 'timestamp'),
+    )
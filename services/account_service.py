@@ -1,17 +1,158 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import pandas as pd
 import streamlit as st
 from apis import initialize_dhan_and_krutrim
+from config import ACCOUNT_CACHE_TTL_SECONDS
 
-def get_account_summary() -> dict:
-    dhan, _, missing_keys = initialize_dhan_and_krutrim()
-    if missing_keys:
-        return None
+logger = logging.getLogger(__name__)
+
+# Snapshot field -> dhanhq method
+ACCOUNT_CALLS = {'funds': 'get_fund_limits', 'positions': 'get_positions', 'holdings': 'get_holdings'}
+
+def _payload(response):
+    # dhanhq wraps responses as {"status": ..., "remarks": ..., "data": ...}
+    if isinstance(response, dict) and 'data' in response:
+        return response['data']
+    return response
+
+def _first(frame: pd.DataFrame, names: List[str], default: float = 0.0) -> pd.Series:
+    # Per row, the first of `names` holding a number
+    values = pd.Series(float('nan'), index=frame.index)
+    for name in names:
+        if name in frame:
+            values = values.fillna(pd.to_numeric(frame[name], errors='coerce'))
+    return values.fillna(default)
+
+def _records(response) -> pd.DataFrame:
+    records = _payload(response)
+    return pd.DataFrame(records) if isinstance(records, list) and records else pd.DataFrame()
+
+def _funds_field(funds, names: List[str]) -> Optional[float]:
+    for name in names:
+        if funds.get(name) is not None:
+            return float(funds[name])
+    return None
+
+def summarize_account(account: Optional[Dict]) -> Dict:
+    """
+    Computes the account aggregates used by the Account page and the risk checks: available funds,
+    margin used, net balance, holdings investment, value and P&L, and the absolute market value
+    held per symbol across positions and holdings.
+    """
+    account = account or {}
+    funds = _payload(account.get('funds'))
+    funds = funds if isinstance(funds, dict) else {}
+    summary = {
+        # dhanhq spells the field "availabelBalance"
+        'available_funds': _funds_field(funds, ['availabelBalance', 'availableBalance', 'limit']),
+        'used_margin': _funds_field(funds, ['utilizedAmount', 'used']),
+        'net_balance': _funds_field(funds, ['withdrawableBalance', 'net']),
+        'total_investment': 0.0,
+        'current_value': 0.0,
+        'profit_loss': 0.0,
+        'exposure': {}
+    }
+    
+    holdings = _records(account.get('holdings'))
+    if not holdings.empty:
+        quantity = _first(holdings, ['totalQty', 'quantity'])
+        cost = _first(holdings, ['avgCostPrice', 'buyAvg'])
+        # Holdings without a last price are valued at cost
+        last = _first(holdings, ['ltp', 'avgCostPrice', 'buyAvg'])
+        summary['total_investment'] = float((quantity * cost).sum())
+        summary['current_value'] = float((quantity * last).sum())
+        summary['profit_loss'] = summary['current_value'] - summary['total_investment']
     
-    try:
-        return {
-            'funds': dhan.get_fund_limits(),
-            'positions': dhan.get_positions(),
-            'holdings': dhan.get_holdings()
-        }
-    except Exception as e:
-        st.error(f"Error fetching account details: {e}")
-        return None
\ No newline at end of file
+    frames = []
+    for frame, quantity_fields, price_fields in (
+        (_records(account.get('positions')), ['netQty', 'quantity'], ['ltp', 'costPrice', 'buyAvg']),
+        (holdings, ['totalQty', 'quantity'], ['ltp', 'avgCostPrice', 'buyAvg']),
+    ):
+        symbol = frame['tradingSymbol'] if 'tradingSymbol' in frame else frame.get('symbol')
+        if frame.empty or symbol is None:
+            continue
+        value = (_first(frame, quantity_fields) * _first(frame, price_fields)).abs()
+        frames.append(pd.DataFrame({'symbol': symbol.astype(str).str.upper(), 'value': value}))
+    if frames:
+        summary['exposure'] = pd.concat(frames).groupby('symbol')['value'].sum().to_dict()
+    return summary
+
+class AccountSnapshots:
+    """
+    Serves the broker account from a snapshot at most `ttl_seconds` old.
+    
+    A refresh fetches funds, positions and holdings concurrently. Once the snapshot expires it keeps
+    being served while a background refresh runs, and if a refresh fails the last good snapshot is
+    kept with 'stale' set and the failure in 'error'. Snapshots carry their summarize_account()
+    aggregates under 'aggregates'.
+    """
+    def __init__(self, ttl_seconds: float = ACCOUNT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._fetched = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=len(ACCOUNT_CALLS))
+    
+    def get(self) -> Optional[Dict]:
+        with self._lock:
+            snapshot = self._snapshot
+            expired = time.monotonic() - self._fetched > self.ttl_seconds
+            background = snapshot is not None and expired and not self._refreshing
+            if background:
+                self._refreshing = True
+        if snapshot is None:
+            return self.refresh()
+        if background:
+            threading.Thread(target=self.refresh, daemon=True).start()
+        return snapshot
+    
+    def refresh(self) -> Optional[Dict]:
+        """
+        Fetches a new snapshot now and returns the one being served afterwards.
+        """
+        with self._refresh_lock:
+            try:
+                dhan, _, _ = initialize_dhan_and_krutrim()
+                if dhan is None:
+                    return None
+                
+                futures = {field: self._pool.submit(getattr(dhan, method)) for field, method in ACCOUNT_CALLS.items()}
+                data, errors = {}, []
+                for field, future in futures.items():
+                    try:
+                        response = future.result()
+                        if isinstance(response, dict) and response.get('status', 'success') != 'success':
+                            remarks = response.get('remarks')
+                            raise RuntimeError(remarks.get('error_message') if isinstance(remarks, dict) else remarks or "request failed")
+                        data[field] = _payload(response)
+                    except Exception as e:
+                        errors.append(f"{field}: {e}")
+                
+                with self._lock:
+                    # A failed refresh also waits out the TTL before the next attempt
+                    self._fetched = time.monotonic()
+                    if not errors:
+                        self._snapshot = {**data, 'aggregates': summarize_account(data),
+                                          'fetched_at': datetime.now(), 'stale': False, 'error': None}
+                    elif self._snapshot is not None:
+                        self._snapshot = {**self._snapshot, 'stale': True, 'error': "; ".join(errors)}
+                    if errors:
+                        logger.warning("Account refresh failed: %s", "; ".join(errors))
+                    return self._snapshot
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+@st.cache_resource
+def get_account_snapshots() -> AccountSnapshots:
+    return AccountSnapshots()
+
+def get_account_summary() -> Optional[Dict]:
+    return get_account_snapshots().get()
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from config import (WATCHLIST, BACKTEST_SLIPPAGE_BPS, BACKTEST_FEE_BPS, BACKTEST_MAX_HOLDING_BARS,
+                    BACKTEST_CAPITAL_PER_TRADE)
+from database import get_database_engine
+from models import TradeSignal
+from services.indicator_service import sma, atr
+from services.storage_service import OHLCV_COLUMNS, get_ohlcv_store
+
+SIGNAL_COLUMNS = ['symbol', 'timestamp', 'action', 'entry_price', 'stop_loss', 'take_profit',
+                  'order_type', 'confidence', 'risk_score']
+
+def load_panel(symbols: Optional[List[str]] = None, days: int = 365 * 5) -> Dict:
+    """
+    Loads stored daily OHLCV into date-aligned (dates x symbols) arrays.
+
+    Returns a dict with 'dates' (DatetimeIndex), 'symbols' and one float array per OHLCV column,
+    NaN where a symbol has no bar on a date.
+    """
+    symbols = list(symbols or WATCHLIST)
+    store = get_ohlcv_store()
+    # Column arrays straight from the store (Arrow buffer views on the Parquet backend) are
+    # scattered into the panel, without an intermediate long DataFrame and pivot
+    columns = store.read_columns(symbols, start=datetime.now() - timedelta(days=days)) if store else {}
+    stamps = {symbol: np.asarray(c['datetime'], dtype='datetime64[ns]') for symbol, c in columns.items()}
+    dates = pd.DatetimeIndex(np.unique(np.concatenate(list(stamps.values()) or [np.array([], dtype='datetime64[ns]')])))
+    rows = {symbol: np.searchsorted(dates.values, values) for symbol, values in stamps.items()}
+    panel = {'dates': dates, 'symbols': symbols}
+    for col in OHLCV_COLUMNS:
+        values = np.full((len(dates), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            if symbol in columns:
+                values[rows[symbol], j] = columns[symbol][col]
+        panel[col] = values
+    return panel
+
+def load_recorded_signals(symbols: Optional[List[str]] = None, start: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Returns journaled BUY/SELL signals as a frame with SIGNAL_COLUMNS.
+    """
+    engine = get_database_engine()
+    if not engine:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    
+    query = select(*[TradeSignal.__table__.c[col] for col in SIGNAL_COLUMNS]).where(
+        TradeSignal.action.in_(['BUY', 'SELL'])
+    )
+    if symbols:
+        query = query.where(TradeSignal.symbol.in_(list(symbols)))
+    if start:
+        query = query.where(TradeSignal.timestamp >= start)
+    return pd.read_sql(query.order_by(TradeSignal.timestamp), engine)
+
+def rule_based_signals(panel: Dict, fast: int = 20, slow: int = 50, atr_window: int = 14,
+                       stop_atr: float = 2.0, target_atr: float = 3.0) -> pd.DataFrame:
+    """
+    SMA crossover signals: BUY when the fast SMA crosses above the slow one, SELL on the reverse cross.
+    Stops and targets are placed `stop_atr` / `target_atr` ATRs from the signal bar's close.
+    """
+    close = panel['close']
+    spread = sma(close, fast) - sma(close, slow)
+    prev = np.full(spread.shape, np.nan)
+    prev[1:] = spread[:-1]
+    buy = (prev <= 0) & (spread > 0)
+    sell = (prev >= 0) & (spread < 0)
+    
+    rows, cols = np.nonzero(buy | sell)
+    side = np.where(buy[rows, cols], 1.0, -1.0)
+    price = close[rows, cols]
+    risk = atr(panel['high'], panel['low'], close, atr_window)[rows, cols]
+    valid = np.isfinite(risk) & np.isfinite(price)
+    rows, cols, side, price, risk = rows[valid], cols[valid], side[valid], price[valid], risk[valid]
+    
+    return pd.DataFrame({
+        'symbol': np.asarray(panel['symbols'], dtype=object)[cols],
+        'timestamp': panel['dates'][rows],
+        'action': np.where(side > 0, 'BUY', 'SELL'),
+        'entry_price': price,
+        'stop_loss': price - side * stop_atr * risk,
+        'take_profit': price + side * target_atr * risk,
+        'order_type': 'DELIVERY',
+        'confidence': 10,
+        'risk_score': 1
+    }, columns=SIGNAL_COLUMNS)
+
+def simulate(panel: Dict, signals: pd.DataFrame, slippage_bps: float = BACKTEST_SLIPPAGE_BPS,
+             fee_bps: float = BACKTEST_FEE_BPS, max_holding_bars: int = BACKTEST_MAX_HOLDING_BARS,
+             capital_per_trade: float = BACKTEST_CAPITAL_PER_TRADE) -> pd.DataFrame:
+    """
+    Simulates every signal at once and returns one row per filled trade.
+
+    A signal fills at the open of the first bar after its timestamp. INTRADAY trades exit within
+    that bar; DELIVERY trades are held up to `max_holding_bars` bars. The position exits at the stop
+    or the target, whichever is touched first (the stop when both are touched in one bar, and the bar's
+    open when it gaps through the level), otherwise at the close of the last bar held.
+    Slippage applies to both fills and fees to both legs.
+    """
+    columns = ['symbol', 'signal_time', 'entry_time', 'exit_time', 'action', 'order_type', 'entry',
+               'exit', 'exit_reason', 'return', 'pnl']
+    if signals.empty or not len(panel['dates']):
+        return pd.DataFrame(columns=columns)
+    
+    sym_index = {symbol: j for j, symbol in enumerate(panel['symbols'])}
+    signals = signals[signals['symbol'].isin(sym_index) & signals['action'].isin(['BUY', 'SELL'])]
+    n_bars = len(panel['dates'])
+    col = signals['symbol'].map(sym_index).to_numpy(dtype=int)
+    entry_bar = np.searchsorted(panel['dates'].values, pd.to_datetime(signals['timestamp']).values, side='right')
+    side = np.where(signals['action'].to_numpy() == 'BUY', 1.0, -1.0)
+    stop = signals['stop_loss'].to_numpy(dtype=float)
+    target = signals['take_profit'].to_numpy(dtype=float)
+    intraday = signals['order_type'].fillna('DELIVERY').str.upper().to_numpy() == 'INTRADAY'
+    
+    # Holding window per signal: (signals x bars) bar indices, masked past the window or the data
+    horizon = np.where(intraday, 1, max_holding_bars)
+    offsets = np.arange(max(max_holding_bars, 1))
+    bars = entry_bar[:, None] + offsets[None, :]
+    in_window = (offsets[None, :] < horizon[:, None]) & (bars < n_bars)
+    bars = np.minimum(bars, n_bars - 1)
+    cols = col[:, None]
+    
+    opens = np.where(in_window, panel['open'][bars, cols], np.nan)
+    highs = np.where(in_window, panel['high'][bars, cols], np.nan)
+    lows = np.where(in_window, panel['low'][bars, cols], np.nan)
+    closes = np.where(in_window, panel['close'][bars, cols], np.nan)
+    in_window &= np.isfinite(opens) & np.isfinite(closes)
+    
+    filled = in_window[:, 0]
+    long = side[:, None] > 0
+    stop_hit = in_window & np.where(long, lows <= stop[:, None], highs >= stop[:, None])
+    target_hit = in_window & np.where(long, highs >= target[:, None], lows <= target[:, None])
+    
+    width = bars.shape[1]
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), width)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), width)
+    last_bar = np.maximum(in_window.sum(axis=1) - 1, 0)
+    exit_offset = np.minimum(np.minimum(first_stop, first_target), last_bar)
+    
+    rows = np.arange(len(signals))
+    exit_open = opens[rows, exit_offset]
+    stop_fill = np.where(side > 0, np.fmin(stop, exit_open), np.fmax(stop, exit_open))
+    target_fill = np.where(side > 0, np.fmax(target, exit_open), np.fmin(target, exit_open))
+    reason = np.where(first_stop <= np.minimum(first_target, last_bar), 'stop',
+                      np.where(first_target <= last_bar, 'target', 'time'))
+    exit_raw = np.where(reason == 'stop', stop_fill,
+                        np.where(reason == 'target', target_fill, closes[rows, exit_offset]))
+    
+    slip = slippage_bps / 10000
+    entry_px = opens[:, 0] * (1 + side * slip)
+    exit_px = exit_raw * (1 - side * slip)
+    fees = 2 * fee_bps / 10000
+    returns = side * (exit_px - entry_px) / entry_px - fees
+    
+    trades = pd.DataFrame({
+        'symbol': signals['symbol'].to_numpy(),
+        'signal_time': pd.to_datetime(signals['timestamp']).to_numpy(),
+        'entry_time': panel['dates'][np.minimum(entry_bar, n_bars - 1)],
+        'exit_time': panel['dates'][bars[rows, exit_offset]],
+        'action': signals['action'].to_numpy(),
+        'order_type': np.where(intraday, 'INTRADAY', 'DELIVERY'),
+        'entry': entry_px,
+        'exit': exit_px,
+        'exit_reason': reason,
+        'return': returns,
+        'pnl': returns * capital_per_trade
+    }, columns=columns)
+    return trades[filled].reset_index(drop=True)
+
+def summarize(trades: pd.DataFrame, initial_capital: float) -> Dict:
+    """
+    Aggregates trades into PnL, hit rate and the max drawdown of the equity curve by exit date,
+    in currency and as a fraction of the running peak equity.
+    """
+    if trades.empty:
+        return {'trades': 0, 'total_pnl': 0.0, 'hit_rate': 0.0, 'avg_return': 0.0,
+                'max_drawdown': 0.0, 'max_drawdown_pct': 0.0}
+    
+    equity = initial_capital + trades.groupby('exit_time')['pnl'].sum().sort_index().cumsum()
+    peak = equity.cummax().clip(lower=initial_capital)
+    drawdown = peak - equity
+    return {
+        'trades': int(len(trades)),
+        'total_pnl': float(trades['pnl'].sum()),
+        'hit_rate': float((trades['return'] > 0).mean()),
+        'avg_return': float(trades['return'].mean()),
+        'max_drawdown': float(drawdown.max()),
+        'max_drawdown_pct': float((drawdown / peak).max())
+    }
+
+def run_backtest(symbols: Optional[List[str]] = None, days: int = 365 * 5, signals: Optional[pd.DataFrame] = None,
+                 use_recorded: bool = False, **kwargs) -> Dict:
+    """
+    Replays stored OHLCV against `signals`, the journaled signals (`use_recorded`) or SMA crossover rules.
+
+    Returns {'trades': DataFrame, 'summary': dict}. Extra keyword arguments go to simulate(); drawdown
+    is measured against one trade's capital per symbol.
+    """
+    panel = load_panel(symbols, days)
+    if signals is None:
+        if use_recorded:
+            signals = load_recorded_signals(panel['symbols'], datetime.now() - timedelta(days=days))
+        else:
+            signals = rule_based_signals(panel)
+    trades = simulate(panel, signals, **kwargs)
+    initial_capital = kwargs.get('capital_per_trade', BACKTEST_CAPITAL_PER_TRADE) * len(panel['symbols'])
+    return {'trades': trades, 'summary': summarize(trades, initial_capital)}
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+import pandas as pd
+import streamlit as st
+from config import OHLCV_CACHE_MAX_ENTRIES, OHLCV_CACHE_TTL_SECONDS, INDICATOR_CACHE_MAX_ENTRIES, FIGURE_CACHE_MAX_ENTRIES
+
+class FrameCache:
+    """
+    Thread-safe LRU cache of DataFrames (or other immutable values such as figure JSON) keyed by (symbol, window).
+
+    Entries also expire after `ttl_seconds` so rows written by another process
+    (which cannot invalidate this one) are picked up eventually.
+    """
+    def __init__(self, max_entries: int = OHLCV_CACHE_MAX_ENTRIES, ttl_seconds: float = OHLCV_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol: str, window: Hashable) -> Optional[pd.DataFrame]:
+        key = (symbol, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            frame = entry[1]
+        # Callers add indicator columns in place, so never hand out the cached frame itself
+        return frame.copy() if isinstance(frame, pd.DataFrame) else frame
+
+    def put(self, symbol: str, window: Hashable, frame: pd.DataFrame) -> None:
+        key = (symbol, window)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), frame.copy() if isinstance(frame, pd.DataFrame) else frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, symbols: Iterable[str]) -> None:
+        symbols = set(symbols)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in symbols]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+@st.cache_resource
+def get_ohlcv_cache() -> FrameCache:
+    return FrameCache()
+
+
+@st.cache_resource
+def get_indicator_cache() -> FrameCache:
+    # Keys pin the exact bars an entry was computed from, so entries never go stale
+    return FrameCache(max_entries=INDICATOR_CACHE_MAX_ENTRIES, ttl_seconds=float('inf'))
+
+@st.cache_resource
+def get_figure_cache() -> FrameCache:
+    # Keys include the window's first and last bar, so entries never go stale
+    return FrameCache(max_entries=FIGURE_CACHE_MAX_ENTRIES, ttl_seconds=float('inf'))
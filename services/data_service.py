@@ -1,82 +1,113 @@
+import logging
 import pandas as pd
 import streamlit as st
-import yfinance as yf
-from typing import Tuple
-from models import OHLCVData
-from database import get_database_engine
-from config import WATCHLIST
-from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from config import (WATCHLIST, HISTORY_PERIOD, REFRESH_OVERLAP_DAYS, BAR_INTERVAL, DERIVED_TIMEFRAMES,
+                    INTRADAY_HISTORY_PERIOD, INTRADAY_REFRESH_OVERLAP_BARS, BAR_RETENTION_DAYS)
+from services.cache_service import get_ohlcv_cache
+from services.download_service import download_symbols
+from services.indicator_service import update_indicator_snapshots
+from services.resample_service import TIMEFRAMES, TIMEFRAME_MINUTES, resample_ohlcv, source_timeframe, validate_timeframe
+from services.storage_service import get_ohlcv_store
+
+logger = logging.getLogger(__name__)
+
+def get_latest_timestamps(symbols, timeframe: str = '1d') -> Dict[str, datetime]:
+    """
+    Returns the latest stored bar time per symbol in one lookup; symbols without data are omitted.
+    """
+    store = get_ohlcv_store()
+    if not store or not symbols:
+        return {}
+    return store.latest_timestamps(list(symbols), timeframe)
+
+def _download(symbols: List[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame], Dict[str, Tuple[bool, str]]]:
+    # Only request bars after each symbol's high-water mark; symbols with no rows get a full backfill
+    overlap = timedelta(days=REFRESH_OVERLAP_DAYS)
+    daily_starts = {symbol: latest - overlap for symbol, latest in get_latest_timestamps(symbols).items()}
+    if BAR_INTERVAL == '1d':
+        daily, status = download_symbols(symbols, period=HISTORY_PERIOD, interval="1d", starts=daily_starts)
+        return daily, {}, status
+    
+    # Daily history older than the intraday window is downloaded once; afterwards daily bars
+    # are aggregated from the intraday bars like every other derived timeframe
+    backfill = [symbol for symbol in symbols if symbol not in daily_starts]
+    daily, daily_status = download_symbols(backfill, period=HISTORY_PERIOD, interval="1d")
+    
+    # yfinance rejects intraday starts outside its window, so stale symbols restart from the full period.
+    # The overlap is counted in bars, since a multi-day overlap would re-download hundreds of them.
+    horizon = datetime.now() - pd.Timedelta(INTRADAY_HISTORY_PERIOD)
+    overlap = timedelta(minutes=TIMEFRAME_MINUTES[BAR_INTERVAL] * INTRADAY_REFRESH_OVERLAP_BARS)
+    starts = {symbol: latest - overlap for symbol, latest in get_latest_timestamps(symbols, BAR_INTERVAL).items()
+              if latest - overlap > horizon}
+    intraday, status = download_symbols(symbols, period=INTRADAY_HISTORY_PERIOD, interval=BAR_INTERVAL, starts=starts)
+    for symbol, (success, message) in daily_status.items():
+        if not success:
+            status[symbol] = (False, message)
+    return daily, intraday, status
+
+def aggregate_timeframes(store, symbol: str, bars: pd.DataFrame, timeframe: str = BAR_INTERVAL) -> None:
+    # Derived bars are recomputed only for the buckets the new `timeframe` bars fall into. Every derived
+    # timeframe fits inside a day, so re-reading intraday bars from the first affected day suffices.
+    first_day = bars['datetime'].min().normalize()
+    intraday = store.read([symbol], start=first_day, timeframe=timeframe)[symbol]
+    for timeframe in DERIVED_TIMEFRAMES:
+        store.write(symbol, resample_ohlcv(intraday, timeframe), timeframe)
+
+def _apply_retention(store, symbols: List[str]) -> None:
+    now = datetime.now()
+    for timeframe, days in BAR_RETENTION_DAYS.items():
+        removed = store.prune(symbols, timeframe, now - timedelta(days=days))
+        if removed:
+            logger.info("Pruned %d %s bars older than %d days", removed, timeframe, days)
 
 def fetch_and_store_data(symbols=None) -> Tuple[bool, str]:
     if symbols is None:
         symbols = WATCHLIST
     
-    engine = get_database_engine()
-    if not engine:
+    store = get_ohlcv_store()
+    if not store:
         return False, "Database connection failed"
     
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    daily, intraday, status = _download(symbols)
     
+    cache = get_ohlcv_cache()
+    updated_symbols = []
     success_count = 0
     error_messages = []
     
     for stock in symbols:
+        success, message = status[stock]
+        if not success:
+            error_messages.append(message)
+            continue
+        
         try:
-            with st.spinner(f"Fetching data for {stock}..."):
-                # yfinance expects Indian stocks to end with .NS
-                yf_symbol = f"{stock}.NS"
-                data = yf.download(yf_symbol, period="100d", interval="1d", progress=False)
-                
-                if data is None or data.empty:
-                    error_messages.append(f"No data found for {stock}")
-                    continue
-                
-                data.reset_index(inplace=True)
-                
-                # Check for 'Date' or 'Datetime' column in yfinance response
-                date_col = 'Date' if 'Date' in data.columns else 'Datetime'
-                if date_col not in data.columns:
-                    # sometimes yfinance index reset results in level_0 or similar if multi-index
-                    # To be safe, let's normalize it
-                    pass
-                
-                # yfinance >= 0.2.30 returns multi-index columns if downloaded as a string but we passed a single symbol
-                # the columns are Price, Ticker or just Price. 
-                # To handle both, we map the columns to lower case
-                data.columns = [c[0].lower() if isinstance(c, tuple) else c.lower() for c in data.columns]
-                
-                # the date column is usually 'date' or 'datetime' now
-                dt_col = 'date' if 'date' in data.columns else 'datetime'
-                
-                for _, row in data.iterrows():
-                    # Handle NaNs
-                    if pd.isna(row['open']) or pd.isna(row['close']):
-                        continue
-                        
-                    existing = session.query(OHLCVData).filter_by(
-                        datetime=row[dt_col],
-                        symbol=stock
-                    ).first()
-                    
-                    if not existing:
-                        ohlcv_entry = OHLCVData(
-                            datetime=row[dt_col],
-                            symbol=stock,
-                            open=float(row['open']),
-                            high=float(row['high']),
-                            low=float(row['low']),
-                            close=float(row['close']),
-                            volume=float(row['volume'])
-                        )
-                        session.add(ohlcv_entry)
-                
-                session.commit()
-                success_count += 1
+            written = 0
+            if stock in daily:
+                written += store.write(stock, daily[stock])
+            if stock in intraday:
+                count = store.write(stock, intraday[stock], BAR_INTERVAL)
+                if count:
+                    aggregate_timeframes(store, stock, intraday[stock])
+                written += count
+            if written:
+                cache.invalidate([stock])
+                updated_symbols.append(stock)
+            success_count += 1
         except Exception as e:
             error_messages.append(f"Error processing {stock}: {str(e)}")
     
-    session.close()
+    try:
+        _apply_retention(store, updated_symbols)
+    except Exception as e:
+        logger.error("Error pruning expired bars: %s", e)
+    
+    try:
+        update_indicator_snapshots(updated_symbols)
+    except Exception as e:
+        logger.error("Error updating indicator snapshots: %s", e)
     
     if success_count == 0:
         return False, "Failed to fetch data for all stocks"
@@ -85,22 +116,85 @@ def fetch_and_store_data(symbols=None) -> Tuple[bool, str]:
     else:
         return True, f"All {success_count} stocks updated successfully"
 
-from sqlalchemy import select
-from datetime import datetime, timedelta
+def _stored_timeframes() -> List[str]:
+    return ['1d'] if BAR_INTERVAL == '1d' else ['1d', BAR_INTERVAL] + DERIVED_TIMEFRAMES
+
+def available_timeframes() -> List[str]:
+    """
+    Returns the timeframes that are stored or can be aggregated from a stored one.
+    """
+    stored = _stored_timeframes()
+    available = []
+    for timeframe in TIMEFRAMES:
+        try:
+            source_timeframe(timeframe, stored)
+        except ValueError:
+            continue
+        available.append(timeframe)
+    return available
 
-def get_data_from_db(symbol: str, days: int = 30) -> pd.DataFrame:
-    engine = get_database_engine()
-    if not engine:
+def _read_bars(store, symbols: List[str], start: datetime, timeframe: str) -> Dict[str, pd.DataFrame]:
+    stored = _stored_timeframes()
+    if timeframe in stored:
+        return store.read(symbols, start=start, timeframe=timeframe)
+    
+    # Timeframes that are not persisted are aggregated on the fly from the coarsest stored divisor,
+    # read from the start of the day so the first bucket is complete
+    source = source_timeframe(timeframe, stored)
+    frames = store.read(symbols, start=start.replace(hour=0, minute=0, second=0, microsecond=0), timeframe=source)
+    return {symbol: resample_ohlcv(df, timeframe) for symbol, df in frames.items()}
+
+def get_data_from_db(symbol: str, days: int = 30, timeframe: str = '1d') -> pd.DataFrame:
+    validate_timeframe(timeframe)
+    cache = get_ohlcv_cache()
+    cached = cache.get(symbol, (days, timeframe))
+    if cached is not None:
+        return cached
+    
+    store = get_ohlcv_store()
+    if not store:
         return None
     
     try:
         cutoff_date = datetime.now() - timedelta(days=days)
-        query = select(OHLCVData).where(
-            OHLCVData.symbol == symbol,
-            OHLCVData.datetime >= cutoff_date
-        ).order_by(OHLCVData.datetime)
-        
-        return pd.read_sql(query, engine)
+        df = _read_bars(store, [symbol], cutoff_date, timeframe)[symbol]
+        cache.put(symbol, (days, timeframe), df)
+        return df
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return None
+
+def get_data_for_symbols(symbols, days: int = 30, timeframe: str = '1d') -> Dict[str, pd.DataFrame]:
+    """
+    Loads the last `days` of `timeframe` bars for many symbols in one store read (a single IN query on SQL).
+
+    Returns a frame per requested symbol with the same columns as get_data_from_db;
+    symbols without data map to an empty frame. Only symbols missing from the OHLCV cache are queried.
+    """
+    validate_timeframe(timeframe)
+    symbols = list(symbols)
+    cache = get_ohlcv_cache()
+    result = {}
+    for symbol in symbols:
+        cached = cache.get(symbol, (days, timeframe))
+        if cached is not None:
+            result[symbol] = cached
+    misses = [symbol for symbol in symbols if symbol not in result]
+    if not misses:
+        return result
+    
+    store = get_ohlcv_store()
+    if not store:
+        return None
+    
+    try:
+        cutoff_date = datetime.now() - timedelta(days=days)
+        frames = _read_bars(store, misses, cutoff_date, timeframe)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return None
\ No newline at end of file
+        return None
+    
+    for symbol in misses:
+        result[symbol] = frames[symbol]
+        cache.put(symbol, (days, timeframe), result[symbol])
+    return {symbol: result[symbol] for symbol in symbols}
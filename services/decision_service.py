@@ -0,0 +1,183 @@
+import json
+from typing import Callable, Dict, Optional, Tuple, TypedDict, Union
+
+ACTIONS = ('BUY', 'SELL', 'HOLD')
+ORDER_TYPES = ('INTRADAY', 'DELIVERY')
+
+class TradeDecision(TypedDict):
+    stock: str
+    action: str  # one of ACTIONS
+    reasoning: str
+    entry_price: Optional[float]  # prices may be null for HOLD
+    stop_loss: Optional[float]
+    take_profit: Optional[float]
+    order_type: str  # one of ORDER_TYPES
+    risk_score: int  # 1-10
+    confidence: int  # 1-10
+
+def format_price(value) -> str:
+    # HOLD decisions may have no prices
+    return "n/a" if value is None else f"₹{value:.2f}"
+
+def _price(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 and price != float('inf') else None
+
+def _score(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(score) if score.is_integer() and 1 <= score <= 10 else None
+
+def validate_decision(trade, symbol: Optional[str] = None) -> Tuple[Optional[TradeDecision], Optional[str]]:
+    """
+    Checks an LLM decision against the TradeDecision schema and returns a normalized copy or an error.
+    
+    Enums are matched case-insensitively and numbers may arrive as strings. BUY needs
+    stop_loss < entry_price < take_profit and SELL the reverse; HOLD prices are optional.
+    When `symbol` is given the decision must be for that symbol.
+    """
+    if not isinstance(trade, dict):
+        return None, "Decision is not a JSON object"
+    
+    stock = str(trade.get('stock') or '').strip().upper()
+    if not stock:
+        return None, "Missing stock"
+    if symbol is not None and stock != symbol.upper():
+        return None, f"Decision is for {stock}, expected {symbol}"
+    
+    action = str(trade.get('action') or '').strip().upper()
+    if action not in ACTIONS:
+        return None, f"Invalid action {trade.get('action')!r}"
+    order_type = str(trade.get('order_type') or '').strip().upper()
+    if order_type not in ORDER_TYPES:
+        return None, f"Invalid order_type {trade.get('order_type')!r}"
+    
+    prices = {field: _price(trade.get(field)) for field in ('entry_price', 'stop_loss', 'take_profit')}
+    if action != 'HOLD':
+        invalid = [field for field, value in prices.items() if value is None]
+        if invalid:
+            return None, f"Invalid {', '.join(invalid)} for {action}"
+        entry, stop, target = prices['entry_price'], prices['stop_loss'], prices['take_profit']
+        if action == 'BUY' and not stop < entry < target:
+            return None, "BUY requires stop_loss < entry_price < take_profit"
+        if action == 'SELL' and not target < entry < stop:
+            return None, "SELL requires take_profit < entry_price < stop_loss"
+    
+    scores = {field: _score(trade.get(field)) for field in ('risk_score', 'confidence')}
+    invalid = [field for field, value in scores.items() if value is None]
+    if invalid:
+        return None, f"{', '.join(invalid)} must be an integer from 1 to 10"
+    
+    return TradeDecision(
+        stock=stock,
+        action=action,
+        reasoning=str(trade.get('reasoning') or ''),
+        order_type=order_type,
+        **prices,
+        **scores
+    ), None
+
+class JSONStreamParser:
+    """
+    Incrementally finds the first complete JSON value opened by `opening` ('{' or '[') in streamed text.
+    
+    <think>...</think> reasoning is skipped, as is everything before a closing </think> whose opening
+    tag was left out. A balanced candidate that does not parse or is rejected by `accept` is discarded
+    so scanning continues past stray brackets. feed() returns the parsed value as soon as its closing
+    bracket arrives, so the caller can stop reading.
+    
+    With `reasoning` set, the model is expected to reason first, so a candidate seen before any
+    </think> may be a draft: it is held rather than returned, and finish() returns it if the text
+    ends without reasoning tags.
+    """
+    def __init__(self, opening: str = '{', accept: Optional[Callable[[Union[Dict, list]], bool]] = None,
+                 reasoning: bool = False):
+        self.opening = opening
+        self.accept = accept or (lambda value: True)
+        self.reasoning = reasoning
+        self.text = ''
+        self.pos = 0
+        self.start = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.thought = False
+        self.held = None
+    
+    def feed(self, chunk: str):
+        self.text += chunk
+        text = self.text
+        # Resume after the last closing tag received, dropping any draft scanned before it
+        close = text.rfind('</think>', max(self.pos - len('</think>') + 1, 0))
+        if close >= 0:
+            self.pos = close + len('</think>')
+            self.start = None
+            self.in_string = self.escape = False
+            self.thought = True
+            self.held = None
+        while self.pos < len(text):
+            c = text[self.pos]
+            if self.start is None:
+                if c == '<':
+                    if text.startswith('<think>', self.pos):
+                        end = text.find('</think>', self.pos)
+                        if end < 0:
+                            return None
+                        self.pos = end + len('</think>')
+                        continue
+                    if '<think>'.startswith(text[self.pos:]):
+                        # Possibly a tag split across chunks
+                        return None
+                elif c == self.opening:
+                    self.start = self.pos
+                    self.depth = 0
+            
+            if self.start is not None:
+                if self.in_string:
+                    if self.escape:
+                        self.escape = False
+                    elif c == '\\':
+                        self.escape = True
+                    elif c == '"':
+                        self.in_string = False
+                elif c == '"':
+                    self.in_string = True
+                elif c in '{[':
+                    self.depth += 1
+                elif c in '}]':
+                    self.depth -= 1
+                    if self.depth == 0:
+                        candidate = text[self.start:self.pos + 1]
+                        restart = self.start + 1
+                        self.start = None
+                        try:
+                            value = json.loads(candidate)
+                        except ValueError:
+                            value = None
+                        if value is not None and self.accept(value):
+                            self.pos += 1
+                            if not self.reasoning or self.thought:
+                                return value
+                            if self.held is None:
+                                self.held = value
+                            continue
+                        # Not the answer; rescan from just after the discarded opening bracket
+                        self.pos = restart
+                        continue
+            self.pos += 1
+        return None
+    
+    def finish(self):
+        """
+        Returns the candidate held back while waiting for reasoning that never came, if any.
+        """
+        return self.held
@@ -0,0 +1,128 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+import yfinance as yf
+from config import DOWNLOAD_MAX_WORKERS, DOWNLOAD_RATE_LIMIT, DOWNLOAD_MAX_RETRIES, DOWNLOAD_BACKOFF_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# A provider takes a bare watchlist symbol plus download options and returns a raw OHLCV frame
+Provider = Callable[..., pd.DataFrame]
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` acquisitions per second with bursts up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def yfinance_provider(symbol: str, **kwargs) -> pd.DataFrame:
+    # yfinance expects Indian stocks to end with .NS. Ticker.history is used rather than
+    # yf.download because the latter shares module-level state between concurrent calls.
+    return yf.Ticker(f"{symbol}.NS").history(raise_errors=True, **kwargs)
+
+def normalize_ohlcv_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Maps a yfinance-style frame to a flat frame with datetime, open, high, low, close, volume columns.
+    """
+    data = data.reset_index()
+    
+    # yfinance >= 0.2.30 returns multi-index columns (Price, Ticker) even for a single symbol
+    data.columns = [c[0].lower() if isinstance(c, tuple) else str(c).lower() for c in data.columns]
+    
+    # the date column is usually 'date' or 'datetime'
+    dt_col = 'date' if 'date' in data.columns else 'datetime'
+    data = data.rename(columns={dt_col: 'datetime'})
+    
+    timestamps = pd.to_datetime(data['datetime'])
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    data['datetime'] = timestamps
+    return data
+
+def _download_one(symbol: str, provider: Provider, bucket: TokenBucket, max_retries: int,
+                  backoff: float, kwargs: dict) -> Tuple[Optional[pd.DataFrame], Tuple[bool, str]]:
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            data = provider(symbol, **kwargs)
+        except Exception as e:
+            if attempt == max_retries:
+                return None, (False, f"Error processing {symbol}: {e}")
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            logger.warning("Download of %s failed (%s), retrying in %.1fs", symbol, e, delay)
+            time.sleep(delay)
+            continue
+        
+        if data is None or data.empty:
+            if 'start' in kwargs:
+                # Incremental requests legitimately come back empty when nothing new has printed
+                return None, (True, f"{symbol} is up to date")
+            return None, (False, f"No data found for {symbol}")
+        return normalize_ohlcv_frame(data), (True, f"{symbol} downloaded")
+
+def _symbol_kwargs(kwargs: dict, start: Optional[datetime]) -> dict:
+    if start is None:
+        return kwargs
+    symbol_kwargs = {k: v for k, v in kwargs.items() if k != 'period'}
+    symbol_kwargs['start'] = start
+    return symbol_kwargs
+
+def download_symbols(symbols: List[str], provider: Optional[Provider] = None,
+                     max_workers: Optional[int] = None, rate_limit: Optional[float] = None,
+                     max_retries: Optional[int] = None, backoff: Optional[float] = None,
+                     starts: Optional[Dict[str, datetime]] = None,
+                     **kwargs) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Tuple[bool, str]]]:
+    """
+    Downloads OHLCV frames for many symbols on a bounded thread pool sharing one rate limiter.
+
+    Returns the normalized frames of successful symbols and a (success, message) status per symbol.
+    Extra keyword arguments (period, interval, ...) are passed through to the provider.
+    Symbols present in `starts` are requested from that timestamp instead of `period`.
+    """
+    provider = provider or yfinance_provider
+    starts = starts or {}
+    max_workers = max_workers or DOWNLOAD_MAX_WORKERS
+    bucket = TokenBucket(DOWNLOAD_RATE_LIMIT if rate_limit is None else rate_limit)
+    max_retries = DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    backoff = DOWNLOAD_BACKOFF_SECONDS if backoff is None else backoff
+    
+    frames = {}
+    status = {}
+    if not symbols:
+        return frames, status
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+        futures = {
+            symbol: pool.submit(_download_one, symbol, provider, bucket, max_retries, backoff,
+                                _symbol_kwargs(kwargs, starts.get(symbol)))
+            for symbol in symbols
+        }
+        for symbol, future in futures.items():
+            data, status[symbol] = future.result()
+            if data is not None:
+                frames[symbol] = data
+    return frames, status
@@ -0,0 +1,298 @@
+import hashlib
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+import requests
+import streamlit as st
+from apis import initialize_dhan_and_krutrim
+from config import (SEC_DICT, EXECUTION_BROKER, BROKER_MAX_IN_FLIGHT, BROKER_REQUESTS_PER_SECOND, ORDER_POLL_SECONDS,
+                    PAPER_LATENCY_MS, PAPER_FILL_SECONDS, PAPER_REJECT_RATE, BACKTEST_SLIPPAGE_BPS)
+from services.journal_service import get_journal_writer, update_execution, get_execution_statuses
+
+logger = logging.getLogger(__name__)
+
+# Dhan order statuses, also used by the paper broker
+OPEN_STATUSES = ('TRANSIT', 'PENDING', 'PART_TRADED')
+# A signal whose order ended with one of these may be submitted again under the same client order id
+RETRYABLE_STATUSES = ('REJECTED',)
+
+def client_order_id(trade: Dict) -> str:
+    # Stable per signal, so resubmitting the same decision is recognised. Dhan accepts up to 25 characters.
+    key = trade.get('signal_id')
+    if not key:
+        if not trade.get('timestamp'):
+            # A fallback key without a timestamp would be shared by every later decision for the symbol
+            raise ValueError(f"Trade for {trade.get('stock')} has no signal_id or timestamp to derive an order id from")
+        key = f"{trade.get('stock')}|{trade.get('action')}|{trade.get('timestamp')}"
+    return hashlib.sha1(str(key).encode('utf-8')).hexdigest()[:20]
+
+def get_submitted(trades: List[Dict]) -> List[Optional[str]]:
+    """
+    Returns per trade the journaled status of the order already sent for its signal, or None if
+    it may be sent (never sent, last rejected, or no order id can be derived).
+    """
+    ids = []
+    for trade in trades:
+        try:
+            ids.append(client_order_id(trade))
+        except ValueError:
+            ids.append(None)
+    statuses = get_execution_statuses([key for key in ids if key], RETRYABLE_STATUSES)
+    return [statuses.get(key) if key else None for key in ids]
+
+class RateLimiter:
+    """
+    Spaces calls at least 1/rate seconds apart across threads.
+    """
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class PaperBroker:
+    """
+    Local stand-in for the Dhan order API. Each call takes a random, roughly log-normal latency around
+    `latency_ms`; market orders fill in slices over `fill_seconds` at the order's reference price moved
+    against the order by `slippage_bps` plus noise, and a `reject_rate` share of orders is rejected.
+    """
+    def __init__(self, latency_ms: float = PAPER_LATENCY_MS, fill_seconds: float = PAPER_FILL_SECONDS,
+                 slippage_bps: float = BACKTEST_SLIPPAGE_BPS, reject_rate: float = PAPER_REJECT_RATE,
+                 seed: Optional[int] = None):
+        self.latency = latency_ms / 1000
+        self.fill_seconds = fill_seconds
+        self.slippage = slippage_bps / 10000
+        self.reject_rate = reject_rate
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def _sleep(self) -> None:
+        if self.latency > 0:
+            with self._lock:
+                delay = self._rng.lognormvariate(math.log(self.latency), 0.3)
+            time.sleep(delay)
+
+    def place(self, order: Dict) -> Dict:
+        self._sleep()
+        with self._lock:
+            order_id = f"PAPER-{next(self._ids)}"
+            if self._rng.random() < self.reject_rate:
+                return {'order_id': order_id, 'status': 'REJECTED', 'message': "Rejected by the paper broker"}
+            self._orders[order_id] = {'order': order, 'placed': time.monotonic(), 'filled': 0, 'value': 0.0}
+        return {'order_id': order_id, 'status': 'TRANSIT', 'message': ""}
+
+    def status(self, order_id: str) -> Dict:
+        self._sleep()
+        with self._lock:
+            state = self._orders[order_id]
+            order = state['order']
+            quantity = order['quantity']
+            progress = (time.monotonic() - state['placed']) / self.fill_seconds if self.fill_seconds > 0 else 1.0
+            target = quantity if progress >= 1 else int(quantity * progress)
+            if target > state['filled']:
+                side = 1 if order['action'] == 'BUY' else -1
+                price = order['price'] * (1 + side * self.slippage) * (1 + self._rng.gauss(0, self.slippage / 2))
+                state['value'] += (target - state['filled']) * price
+                state['filled'] = target
+            filled = state['filled']
+        status = 'TRADED' if filled == quantity else 'PART_TRADED' if filled else 'PENDING'
+        return {'status': status, 'filled_quantity': filled, 'average_price': state['value'] / filled if filled else None}
+
+class DhanBroker:
+    """
+    Places market orders through a dhanhq client, tagging each with its client order id.
+    """
+    def __init__(self, dhan, pool_size: int = BROKER_MAX_IN_FLIGHT):
+        self.dhan = dhan
+        # One keep-alive connection per concurrent request on the client's shared session
+        self.dhan.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    @staticmethod
+    def _data(response: Dict):
+        if response.get('status') != 'success':
+            remarks = response.get('remarks')
+            raise RuntimeError(remarks.get('error_message') if isinstance(remarks, dict) else remarks or "Broker request failed")
+        data = response.get('data')
+        return data[0] if isinstance(data, list) and data else data or {}
+
+    def place(self, order: Dict) -> Dict:
+        security_id = SEC_DICT.get(order['symbol'])
+        if security_id is None:
+            return {'order_id': None, 'status': 'REJECTED', 'message': f"Security ID not found for {order['symbol']}"}
+        
+        response = self.dhan.place_order(
+            security_id=security_id,
+            exchange_segment=self.dhan.NSE,
+            transaction_type=self.dhan.BUY if order['action'] == 'BUY' else self.dhan.SELL,
+            quantity=order['quantity'],
+            order_type=self.dhan.MARKET,
+            product_type=self.dhan.INTRA if order['order_type'] == 'INTRADAY' else self.dhan.CNC,
+            price=0,
+            tag=order['client_order_id']
+        )
+        try:
+            data = self._data(response)
+        except RuntimeError as e:
+            return {'order_id': None, 'status': 'REJECTED', 'message': str(e)}
+        return {'order_id': str(data.get('orderId')), 'status': data.get('orderStatus', 'TRANSIT'), 'message': ""}
+
+    def status(self, order_id: str) -> Dict:
+        data = self._data(self.dhan.get_order_by_id(order_id))
+        return {
+            'status': data.get('orderStatus'),
+            'filled_quantity': int(data.get('filledQty') or 0),
+            'average_price': data.get('averageTradedPrice') or None
+        }
+
+class ExecutionGateway:
+    """
+    Sends orders to a broker concurrently and tracks them until they are no longer open.
+
+    Placement and status calls share a pool of `max_in_flight` workers and a limit of
+    `requests_per_second`. Each order carries a client order id derived from its signal; an id that
+    is already open or done, in this process or in the journal, is not sent again. A background
+    thread polls open orders every `poll_seconds` and writes fills back to the journal.
+    """
+    def __init__(self, broker, max_in_flight: int = BROKER_MAX_IN_FLIGHT,
+                 requests_per_second: float = BROKER_REQUESTS_PER_SECOND, poll_seconds: float = ORDER_POLL_SECONDS):
+        self.broker = broker
+        self.poll_seconds = poll_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._limiter = RateLimiter(requests_per_second)
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._settled = threading.Condition(self._lock)
+        threading.Thread(target=self._track, daemon=True).start()
+
+    def submit(self, trades: List[Dict]) -> List[Dict]:
+        """
+        Places one market order per trade, sized by its 'quantity' (default 1), and returns the order
+        dicts in the same order once every placement has been answered. Orders not sent because their
+        client order id was already used have 'duplicate' set; trades without a signal_id or
+        timestamp are rejected without being sent.
+        """
+        orders = [self._order(trade) for trade in trades]
+        journaled = get_execution_statuses([order['client_order_id'] for order in orders if order['client_order_id']],
+                                           RETRYABLE_STATUSES)
+        
+        results, tasks = [], []
+        with self._lock:
+            for trade, order in zip(trades, orders):
+                if order['client_order_id'] is None:
+                    get_journal_writer().record_execution(trade, order['status'], order['message'], quantity=order['quantity'])
+                    results.append(order)
+                    continue
+                existing = self._orders.get(order['client_order_id'])
+                status = existing['status'] if existing else journaled.get(order['client_order_id'])
+                if status and status not in RETRYABLE_STATUSES:
+                    results.append(dict(existing or order, status=status, duplicate=True,
+                                        message=f"Order {order['client_order_id']} was already submitted"))
+                    continue
+                # Registered before placement so concurrent submissions of the same signal are deduped
+                self._orders[order['client_order_id']] = order
+                results.append(order)
+                tasks.append(self._pool.submit(self._place, trade, order))
+        wait(tasks)
+        return [dict(order) for order in results]
+
+    @staticmethod
+    def _order(trade: Dict) -> Dict:
+        order = {
+            'client_order_id': None,
+            'symbol': trade['stock'],
+            'action': str(trade['action']).upper(),
+            'order_type': str(trade.get('order_type') or 'INTRADAY').upper(),
+            'quantity': int(trade.get('quantity') or 1),
+            'price': trade.get('entry_price'),
+            'status': 'NEW',
+            'broker_order_id': None,
+            'filled_quantity': 0,
+            'average_price': None,
+            'message': ""
+        }
+        try:
+            order['client_order_id'] = client_order_id(trade)
+        except ValueError as e:
+            # Not sent: without a stable id the order could not be deduplicated
+            order.update(status='REJECTED', message=str(e))
+        return order
+
+    def _place(self, trade: Dict, order: Dict) -> None:
+        self._limiter.wait()
+        try:
+            placed = self.broker.place(order)
+        except Exception as e:
+            placed = {'order_id': None, 'status': 'REJECTED', 'message': f"Error placing order: {e}"}
+        # Journaled before the status leaves NEW, so fill updates from the tracker always find the row
+        get_journal_writer().record_execution(
+            trade, placed['status'], placed['message'] or f"{order['action']} {order['quantity']} {order['symbol']} sent to the broker",
+            quantity=order['quantity'], price=order['price'], client_order_id=order['client_order_id'],
+            broker_order_id=placed['order_id'], filled_quantity=0
+        )
+        with self._lock:
+            order.update(broker_order_id=placed['order_id'], status=placed['status'], message=placed['message'])
+            self._settled.notify_all()
+
+    def _poll(self, order: Dict) -> None:
+        self._limiter.wait()
+        try:
+            state = self.broker.status(order['broker_order_id'])
+        except Exception as e:
+            logger.warning("Status check for order %s failed: %s", order['client_order_id'], e)
+            return
+        if (state['status'], state['filled_quantity']) != (order['status'], order['filled_quantity']):
+            values = {'status': state['status'], 'filled_quantity': state['filled_quantity']}
+            if state['average_price'] is not None:
+                values['price'] = state['average_price']
+            # Journaled first, so drain() only returns once the fills are recorded
+            update_execution(order['client_order_id'], OPEN_STATUSES, **values)
+        with self._lock:
+            order.update(status=state['status'], filled_quantity=state['filled_quantity'],
+                         average_price=state['average_price'])
+            self._settled.notify_all()
+    
+    def _track(self) -> None:
+        while True:
+            time.sleep(self.poll_seconds)
+            with self._lock:
+                open_orders = [order for order in self._orders.values()
+                               if order['status'] in OPEN_STATUSES and order['broker_order_id']]
+            if open_orders:
+                wait([self._pool.submit(self._poll, order) for order in open_orders])
+
+    def get_orders(self) -> List[Dict]:
+        with self._lock:
+            return [dict(order) for order in self._orders.values()]
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds for every tracked order to leave the open statuses.
+        Returns False if some are still open.
+        """
+        def settled() -> bool:
+            return not any(order['status'] in OPEN_STATUSES + ('NEW',) for order in self._orders.values())
+        with self._lock:
+            return self._settled.wait_for(settled, timeout)
+
+@st.cache_resource
+def get_execution_gateway() -> ExecutionGateway:
+    if EXECUTION_BROKER == 'dhan':
+        dhan, _, _ = initialize_dhan_and_krutrim()
+        if dhan is None:
+            raise RuntimeError("Dhan client is not configured (set CLIENT and TOKEN)")
+        return ExecutionGateway(DhanBroker(dhan))
+    return ExecutionGateway(PaperBroker())
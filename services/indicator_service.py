@@ -0,0 +1,348 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config import INDICATORS, STREAMING_INDICATORS
+from database import get_database_engine
+from models import IndicatorSnapshot
+from services.cache_service import get_indicator_cache
+from services.storage_service import get_ohlcv_store
+
+# All indicators run over a right-aligned panel: one column per symbol, the latest bar of every
+# symbol on the last row and NaN padding above shorter histories. Each function is a single pass
+# over the time axis that updates every symbol at once.
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    total = np.nancumsum(x, axis=0)
+    count = np.cumsum(np.isfinite(x), axis=0)
+    total[window:] = total[window:] - total[:-window]
+    count[window:] = count[window:] - count[:-window]
+    total[count < window] = np.nan
+    return total
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_sum(x, window) / window
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    mean = sma(x, window)
+    var = _rolling_sum(x * x, window) / window - mean * mean
+    # Sample standard deviation, matching pandas rolling().std()
+    return np.sqrt(np.clip(var, 0, None) * window / (window - 1))
+
+def ewm(x: np.ndarray, alpha: float, min_periods: int = 1) -> np.ndarray:
+    """
+    Recursive exponential average equivalent to pandas ewm(alpha=alpha, adjust=False), per column.
+    """
+    out = np.full(x.shape, np.nan)
+    prev = np.full(x.shape[1:], np.nan)
+    seen = np.zeros(x.shape[1:], dtype=int)
+    for t in range(x.shape[0]):
+        row = x[t]
+        valid = np.isfinite(row)
+        prev = np.where(np.isnan(prev), row, np.where(valid, prev + alpha * (row - prev), prev))
+        seen += valid
+        out[t] = np.where(seen >= min_periods, prev, np.nan)
+    return out
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    return ewm(x, 2.0 / (span + 1), min_periods=span)
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    shifted = np.full(x.shape, np.nan)
+    shifted[1:] = x[:-1]
+    return shifted
+
+def rsi(close: np.ndarray, window: int) -> np.ndarray:
+    delta = close - _shift(close)
+    gain = ewm(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), 1.0 / window, window)
+    loss = ewm(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), 1.0 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    prev_close = _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return ewm(true_range, 1.0 / window, window)
+
+def bollinger(close: np.ndarray, window: int, width: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    mid = sma(close, window)
+    std = rolling_std(close, window)
+    return mid, mid + width * std, mid - width * std
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int) -> np.ndarray:
+    typical = (high + low + close) / 3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _rolling_sum(typical * volume, window) / _rolling_sum(volume, window)
+
+def parse_spec(spec: str) -> Tuple[str, Optional[int]]:
+    name, _, period = spec.partition('_')
+    return name, int(period) if period else None
+
+def warmup_bars(specs: List[str]) -> int:
+    """
+    Returns the number of bars the longest of `specs` needs before it produces a value.
+    """
+    # macd is defined by its 26 bar slow EMA plus the 9 bar signal line; the extra bar covers
+    # rsi and atr, which start from the first bar-to-bar change
+    return max(((parse_spec(spec)[1] or 35) + 1 for spec in specs), default=0)
+
+def _compute_panel(panel: Dict[str, np.ndarray], specs: List[str]) -> Dict[str, np.ndarray]:
+    close = panel['close']
+    out = {}
+    for spec in specs:
+        name, period = parse_spec(spec)
+        if name == 'sma':
+            out[spec] = sma(close, period)
+        elif name == 'ema':
+            out[spec] = ema(close, period)
+        elif name == 'rsi':
+            out[spec] = rsi(close, period)
+        elif name == 'macd':
+            out['macd'], out['macd_signal'], out['macd_hist'] = macd(close)
+        elif name == 'atr':
+            out[spec] = atr(panel['high'], panel['low'], close, period)
+        elif name == 'bollinger':
+            out[f'bb_mid_{period}'], out[f'bb_upper_{period}'], out[f'bb_lower_{period}'] = bollinger(close, period)
+        elif name == 'vwap':
+            out[spec] = vwap(panel['high'], panel['low'], close, panel['volume'], period)
+        else:
+            raise ValueError(f"Unknown indicator: {spec}")
+    return out
+
+def build_panel(frames: Dict[str, pd.DataFrame]) -> Dict[str, np.ndarray]:
+    """
+    Stacks per-symbol OHLCV frames into right-aligned (bars x symbols) arrays, one per column.
+    """
+    depth = max(len(df) for df in frames.values())
+    panel = {}
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        arr = np.full((depth, len(frames)), np.nan)
+        for j, df in enumerate(frames.values()):
+            if len(df):
+                arr[depth - len(df):, j] = df[col].to_numpy(dtype=float)
+        panel[col] = arr
+    return panel
+
+def _memo_key(df: pd.DataFrame, specs: List[str]) -> tuple:
+    # A refreshed bar keeps its timestamp, so the last close is part of the key as well
+    return (df['datetime'].iloc[0], df['datetime'].iloc[-1], len(df), float(df['close'].iloc[-1]), tuple(specs))
+
+def compute_indicators(frames: Dict[str, pd.DataFrame], specs: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Computes the configured indicators for every symbol in one vectorized pass.
+
+    Returns a frame of indicator columns per symbol, index-aligned with the input frame.
+    Results are memoized per symbol and exact bar window, so only symbols with new bars are recomputed.
+    """
+    specs = list(specs or INDICATORS)
+    cache = get_indicator_cache()
+    result = {}
+    pending = {}
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            result[symbol] = pd.DataFrame(index=getattr(df, 'index', None))
+            continue
+        cached = cache.get(symbol, _memo_key(df, specs))
+        if cached is not None:
+            result[symbol] = cached.set_axis(df.index)
+        else:
+            pending[symbol] = df
+    
+    if pending:
+        values = _compute_panel(build_panel(pending), specs)
+        depth = max(len(df) for df in pending.values())
+        for j, (symbol, df) in enumerate(pending.items()):
+            columns = {name: arr[depth - len(df):, j] for name, arr in values.items()}
+            result[symbol] = pd.DataFrame(columns, index=df.index)
+            cache.put(symbol, _memo_key(df, specs), result[symbol])
+    
+    return {symbol: result[symbol] for symbol in frames}
+
+def get_indicators(symbol: str, df: pd.DataFrame, specs: Optional[List[str]] = None) -> pd.DataFrame:
+    return compute_indicators({symbol: df}, specs)[symbol]
+
+
+# Streaming indicators fold one bar at a time in O(1) and serialize to small JSON-able dicts.
+# They follow the same definitions as the batch functions above, so a snapshot matches the
+# last row of compute_indicators over the same history.
+
+class RunningSMA:
+    def __init__(self, window: int, values: Optional[List[float]] = None):
+        self.window = window
+        self.values = deque(values or [], maxlen=window)
+        self.total = sum(self.values)
+
+    def update(self, bar: Dict) -> None:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(bar['close'])
+        self.total += bar['close']
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.total / self.window if len(self.values) == self.window else None
+
+    def to_state(self) -> Dict:
+        return {'values': list(self.values)}
+
+class RunningEWM:
+    def __init__(self, alpha: float, min_periods: int, current: Optional[float] = None, count: int = 0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.current = current
+        self.count = count
+
+    def push(self, x: float) -> None:
+        self.current = x if self.current is None else self.current + self.alpha * (x - self.current)
+        self.count += 1
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.current if self.count >= self.min_periods else None
+
+    def to_state(self) -> Dict:
+        return {'current': self.current, 'count': self.count}
+
+class RunningEMA(RunningEWM):
+    def __init__(self, span: int, current: Optional[float] = None, count: int = 0):
+        super().__init__(2.0 / (span + 1), span, current, count)
+
+    def update(self, bar: Dict) -> None:
+        self.push(bar['close'])
+
+class WilderRSI:
+    def __init__(self, window: int, prev_close: Optional[float] = None,
+                 gain: Optional[Dict] = None, loss: Optional[Dict] = None):
+        self.prev_close = prev_close
+        self.gain = RunningEWM(1.0 / window, window, **(gain or {}))
+        self.loss = RunningEWM(1.0 / window, window, **(loss or {}))
+
+    def update(self, bar: Dict) -> None:
+        if self.prev_close is not None:
+            delta = bar['close'] - self.prev_close
+            self.gain.push(max(delta, 0.0))
+            self.loss.push(max(-delta, 0.0))
+        self.prev_close = bar['close']
+
+    @property
+    def value(self) -> Optional[float]:
+        gain, loss = self.gain.value, self.loss.value
+        if gain is None or loss is None:
+            return None
+        if loss == 0:
+            return 50.0 if gain == 0 else 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def to_state(self) -> Dict:
+        return {'prev_close': self.prev_close, 'gain': self.gain.to_state(), 'loss': self.loss.to_state()}
+
+class RunningATR:
+    def __init__(self, window: int, prev_close: Optional[float] = None, average: Optional[Dict] = None):
+        self.prev_close = prev_close
+        self.average = RunningEWM(1.0 / window, window, **(average or {}))
+
+    def update(self, bar: Dict) -> None:
+        true_range = bar['high'] - bar['low']
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(bar['high'] - self.prev_close), abs(bar['low'] - self.prev_close))
+        self.average.push(true_range)
+        self.prev_close = bar['close']
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.average.value
+
+    def to_state(self) -> Dict:
+        return {'prev_close': self.prev_close, 'average': self.average.to_state()}
+
+_STREAMING = {'sma': RunningSMA, 'ema': RunningEMA, 'rsi': WilderRSI, 'atr': RunningATR}
+
+class StreamingIndicators:
+    """
+    A set of streaming indicators for one symbol, restorable from `to_state()`.
+    """
+    def __init__(self, specs: Optional[List[str]] = None, state: Optional[Dict] = None):
+        state = state or {}
+        self.indicators = {}
+        for spec in specs or STREAMING_INDICATORS:
+            name, period = parse_spec(spec)
+            if name not in _STREAMING:
+                raise ValueError(f"Indicator {spec} has no streaming implementation")
+            self.indicators[spec] = _STREAMING[name](period, **state.get(spec, {}))
+
+    def update(self, bar: Dict) -> None:
+        for indicator in self.indicators.values():
+            indicator.update(bar)
+
+    def values(self) -> Dict[str, Optional[float]]:
+        return {spec: indicator.value for spec, indicator in self.indicators.items()}
+
+    def to_state(self) -> Dict:
+        return {spec: indicator.to_state() for spec, indicator in self.indicators.items()}
+
+def update_indicator_snapshots(symbols, specs: Optional[List[str]] = None) -> None:
+    """
+    Folds bars stored since each symbol's snapshot into its streaming state.
+
+    The latest bar is applied on top of the stored state rather than folded into it, so a refreshed
+    current bar is re-evaluated instead of double counted. Revisions to older bars are not refolded.
+    A symbol without a snapshot is seeded from its full stored history once.
+    """
+    engine = get_database_engine()
+    store = get_ohlcv_store()
+    if not engine or not store:
+        return
+    
+    specs = list(specs or STREAMING_INDICATORS)
+    with Session(engine) as session:
+        for symbol in symbols:
+            snapshot = session.get(IndicatorSnapshot, symbol)
+            if snapshot is not None and set(snapshot.base_state) != set(specs):
+                # Configured indicator set changed; rebuild from history
+                snapshot = None
+            base_as_of = snapshot.base_as_of if snapshot is not None else None
+            
+            bars = store.read([symbol], start=base_as_of)[symbol]
+            if base_as_of is not None:
+                bars = bars[bars['datetime'] > base_as_of]
+            bars = bars.to_dict('records')
+            if not bars:
+                continue
+            
+            state = StreamingIndicators(specs, snapshot.base_state if snapshot is not None else None)
+            for bar in bars[:-1]:
+                state.update(bar)
+            base_state = state.to_state()
+            state.update(bars[-1])
+            
+            if snapshot is None:
+                snapshot = session.get(IndicatorSnapshot, symbol) or IndicatorSnapshot(symbol=symbol)
+                session.add(snapshot)
+            snapshot.base_as_of = bars[-2]['datetime'] if len(bars) > 1 else base_as_of
+            snapshot.base_state = base_state
+            snapshot.as_of = bars[-1]['datetime']
+            snapshot.close = bars[-1]['close']
+            snapshot.values = state.values()
+        session.commit()
+
+def get_indicator_snapshots(symbols) -> Dict[str, Dict]:
+    """
+    Returns the latest streaming indicator values per symbol, plus 'as_of' and 'close'.
+    """
+    engine = get_database_engine()
+    if not engine:
+        return {}
+    
+    query = select(IndicatorSnapshot).where(IndicatorSnapshot.symbol.in_(list(symbols)))
+    with Session(engine) as session:
+        return {
+            row.symbol: dict(row.values, as_of=row.as_of, close=row.close)
+            for row in session.scalars(query)
+        }
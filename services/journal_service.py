@@ -0,0 +1,196 @@
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import streamlit as st
+from sqlalchemy import delete, func, insert, select, update
+from config import LLM_MODEL, JOURNAL_BATCH_SIZE, JOURNAL_FLUSH_SECONDS
+from database import get_database_engine
+from models import TradeSignal, TradeExecution
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_FIELDS = ['entry_price', 'stop_loss', 'take_profit', 'order_type', 'risk_score', 'confidence', 'reasoning']
+
+class JournalWriter:
+    """
+    Buffers signal and execution rows and writes them with one executemany per table.
+
+    A batch is flushed once `batch_size` rows are pending, every `flush_seconds` from a
+    background thread, at interpreter exit, and before any journal read.
+    """
+    def __init__(self, batch_size: int = JOURNAL_BATCH_SIZE, flush_seconds: float = JOURNAL_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._signals = []
+        self._executions = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def record_signal(self, trade: Dict, model: str = LLM_MODEL) -> str:
+        """
+        Buffers a decision and returns its uid. The trade dict gains 'signal_id' and 'timestamp'.
+        """
+        now = datetime.now()
+        trade['signal_id'] = uuid.uuid4().hex
+        trade['timestamp'] = now.strftime("%Y-%m-%d %H:%M:%S")
+        row = {field: trade.get(field) for field in SIGNAL_FIELDS}
+        row.update(uid=trade['signal_id'], timestamp=now, symbol=trade.get('stock', ''),
+                   action=str(trade.get('action', '')).upper(), model=model)
+        self._append(self._signals, row)
+        return trade['signal_id']
+
+    def record_execution(self, trade: Dict, status: str, message: str, quantity: Optional[int] = None,
+                         price: Optional[float] = None, client_order_id: Optional[str] = None,
+                         broker_order_id: Optional[str] = None, filled_quantity: Optional[int] = None) -> None:
+        row = {
+            'signal_uid': trade.get('signal_id'),
+            'timestamp': datetime.now(),
+            'symbol': trade.get('stock', ''),
+            'action': str(trade.get('action', '')).upper(),
+            'order_type': trade.get('order_type'),
+            'quantity': quantity,
+            'price': price if price is not None else trade.get('entry_price'),
+            'status': status,
+            'message': message,
+            'client_order_id': client_order_id,
+            'broker_order_id': broker_order_id,
+            'filled_quantity': filled_quantity
+        }
+        self._append(self._executions, row)
+
+    def _append(self, buffer: List[Dict], row: Dict) -> None:
+        with self._lock:
+            buffer.append(row)
+            full = len(self._signals) + len(self._executions) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                signals, self._signals = self._signals, []
+                executions, self._executions = self._executions, []
+            if not signals and not executions:
+                return
+            
+            engine = get_database_engine()
+            try:
+                if not engine:
+                    raise RuntimeError("Database connection failed")
+                with engine.begin() as conn:
+                    if signals:
+                        conn.execute(insert(TradeSignal), signals)
+                    if executions:
+                        conn.execute(insert(TradeExecution), executions)
+            except Exception as e:
+                # Keep the rows for the next attempt rather than dropping journal entries
+                logger.error("Journal flush failed: %s", e)
+                with self._lock:
+                    self._signals[:0] = signals
+                    self._executions[:0] = executions
+
+@st.cache_resource
+def get_journal_writer() -> JournalWriter:
+    return JournalWriter()
+
+def _rows(model, limit: int, offset: int, symbol: Optional[str]) -> List[Dict]:
+    engine = get_database_engine()
+    if not engine:
+        return []
+    get_journal_writer().flush()
+    
+    query = select(model)
+    if symbol:
+        query = query.where(model.symbol == symbol)
+    query = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit).offset(offset)
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query)]
+
+def _count(model, symbol: Optional[str], *conditions) -> int:
+    engine = get_database_engine()
+    if not engine:
+        return 0
+    get_journal_writer().flush()
+    
+    query = select(func.count()).select_from(model).where(*conditions)
+    if symbol:
+        query = query.where(model.symbol == symbol)
+    with engine.connect() as conn:
+        return conn.execute(query).scalar()
+
+def get_signals(limit: int = 20, offset: int = 0, symbol: Optional[str] = None) -> List[Dict]:
+    """
+    Returns one page of journaled signals, newest first, as trade dicts ('stock', 'action', ...).
+    """
+    signals = []
+    for row in _rows(TradeSignal, limit, offset, symbol):
+        trade = {field: row[field] for field in SIGNAL_FIELDS}
+        trade.update(stock=row['symbol'], action=row['action'], signal_id=row['uid'],
+                     timestamp=row['timestamp'].strftime("%Y-%m-%d %H:%M:%S"))
+        signals.append(trade)
+    return signals
+
+def count_signals(symbol: Optional[str] = None) -> int:
+    return _count(TradeSignal, symbol)
+
+def get_executions(limit: int = 20, offset: int = 0, symbol: Optional[str] = None) -> List[Dict]:
+    return _rows(TradeExecution, limit, offset, symbol)
+
+def count_executions(symbol: Optional[str] = None, since: Optional[datetime] = None,
+                     exclude_statuses: Iterable[str] = ()) -> int:
+    conditions = []
+    if since:
+        conditions.append(TradeExecution.timestamp >= since)
+    if exclude_statuses:
+        conditions.append(TradeExecution.status.notin_(list(exclude_statuses)))
+    return _count(TradeExecution, symbol, *conditions)
+
+def update_execution(client_order_id: str, open_statuses: Iterable[str], **values) -> None:
+    """
+    Updates the open execution rows of a gateway order, e.g. with its fill status and average price.
+    """
+    engine = get_database_engine()
+    if not engine:
+        return
+    get_journal_writer().flush()
+    query = update(TradeExecution).where(
+        TradeExecution.client_order_id == client_order_id,
+        TradeExecution.status.in_(list(open_statuses))
+    ).values(**values)
+    with engine.begin() as conn:
+        conn.execute(query)
+
+def get_execution_statuses(client_order_ids: Iterable[str], exclude_statuses: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Returns the journaled status per client order id, ignoring rows with `exclude_statuses`.
+    """
+    engine = get_database_engine()
+    client_order_ids = list(client_order_ids)
+    if not engine or not client_order_ids:
+        return {}
+    get_journal_writer().flush()
+    query = select(TradeExecution.client_order_id, TradeExecution.status).where(
+        TradeExecution.client_order_id.in_(client_order_ids),
+        TradeExecution.status.notin_(list(exclude_statuses))
+    ).order_by(TradeExecution.id)
+    with engine.connect() as conn:
+        return {client_order_id: status for client_order_id, status in conn.execute(query)}
+
+def clear_signals() -> None:
+    engine = get_database_engine()
+    if not engine:
+        return
+    get_journal_writer().flush()
+    with engine.begin() as conn:
+        conn.execute(delete(TradeSignal))
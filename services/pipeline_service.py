@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config import WATCHLIST, SCREENER_ENABLED, SCREENER_SMA_SLOW, PROMPT_INDICATORS, PROMPT_LOOKBACK_BARS
+from database import get_database_engine
+from models import PipelineRun
+from services.data_service import fetch_and_store_data, get_data_for_symbols
+from services.indicator_service import compute_indicators, warmup_bars
+from services.journal_service import get_journal_writer
+from services.resample_service import history_days
+from services.risk_service import check_orders
+from services.execution_service import get_submitted
+from services.screener_service import screen
+from services.trading_service import get_trade_decisions, execute_trades
+
+logger = logging.getLogger(__name__)
+
+def run_cycle(symbols: Optional[List[str]] = None, refresh: bool = True, signals: bool = True,
+              execute: bool = False, screen_symbols: bool = SCREENER_ENABLED) -> Dict:
+    """
+    Runs one ingestion -> indicators -> screening -> signals -> risk checks -> execution cycle and
+    records it in pipeline_runs.
+
+    Indicator snapshots are updated as part of ingestion. Unless `screen_symbols` is False, only
+    symbols passing the rule-based screener are sent to the LLM. Returns the recorded run as a dict.
+    """
+    symbols = list(symbols or WATCHLIST)
+    run = {
+        'started_at': datetime.now(),
+        'symbols': len(symbols),
+        'signals': 0,
+        'executed': 0,
+        'screened_out': 0,
+        'refresh_message': None,
+        'results': {}
+    }
+    
+    if refresh:
+        success, message = fetch_and_store_data(symbols)
+        run['refresh_message'] = message
+        log = logger.info if success else logger.error
+        log("Refresh: %s", message)
+    
+    if signals:
+        # Enough history for the prompt indicators and the screener's slow SMA
+        bars = max(warmup_bars(PROMPT_INDICATORS), SCREENER_SMA_SLOW + 1, PROMPT_LOOKBACK_BARS)
+        frames = get_data_for_symbols(symbols, days=history_days(bars)) or {}
+        compute_indicators(frames, PROMPT_INDICATORS)
+        
+        triggers = {}
+        candidates = symbols
+        if screen_symbols:
+            triggers = screen({symbol: frames.get(symbol) for symbol in symbols})
+            candidates = [symbol for symbol in symbols if triggers[symbol]]
+            run['screened_out'] = len(symbols) - len(candidates)
+            for symbol in symbols:
+                if not triggers[symbol]:
+                    run['results'][symbol] = {'skipped': "No screener condition met"}
+            logger.info("Screener: %d/%d symbols forwarded, %d LLM calls avoided",
+                        len(candidates), len(symbols), run['screened_out'])
+        
+        decisions = get_trade_decisions(candidates, frames) if candidates else {}
+        trades = []
+        for symbol in candidates:
+            trade, error = decisions[symbol]
+            if not trade:
+                run['results'][symbol] = {'error': error}
+                logger.warning("Signal for %s failed: %s", symbol, error)
+                continue
+            
+            run['signals'] += 1
+            trades.append((symbol, trade))
+            run['results'][symbol] = {'trade': trade}
+            if symbol in triggers:
+                run['results'][symbol]['triggers'] = triggers[symbol]
+        
+        orders = [(symbol, trade) for symbol, trade in trades if str(trade.get('action', '')).upper() != 'HOLD']
+        if execute and orders:
+            # A decision served from the signal cache keeps its signal, whose order may already be out;
+            # it is left out before the risk checks so it does not take a trade slot
+            submitted = get_submitted([trade for _, trade in orders])
+            for (symbol, _), status in zip(orders, submitted):
+                if status:
+                    logger.info("Order for %s's signal already submitted (%s)", symbol, status)
+            orders = [order for order, status in zip(orders, submitted) if not status]
+        if execute and orders:
+            # The whole batch is checked together so the best decisions get the remaining trade slots and funds
+            approved, rejected = check_orders([trade for _, trade in orders])
+            owners = {id(trade): symbol for symbol, trade in orders}
+            writer = get_journal_writer()
+            for trade, reason in rejected:
+                symbol = owners[id(trade)]
+                run['results'][symbol]['rejected'] = reason
+                writer.record_execution(trade, "REJECTED", reason)
+                logger.info("Order for %s rejected: %s", symbol, reason)
+            for trade, (success, message) in zip(approved, execute_trades(approved) if approved else []):
+                if success:
+                    trade['executed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    run['executed'] += 1
+                else:
+                    logger.error("Execution for %s failed: %s", owners[id(trade)], message)
+    
+    run['finished_at'] = datetime.now()
+    _record_run(run)
+    return run
+
+def _record_run(run: Dict) -> None:
+    engine = get_database_engine()
+    if not engine:
+        return
+    with Session(engine) as session:
+        session.add(PipelineRun(**run))
+        session.commit()
+
+def get_last_run() -> Optional[Dict]:
+    engine = get_database_engine()
+    if not engine:
+        return None
+    
+    query = select(PipelineRun).order_by(PipelineRun.started_at.desc()).limit(1)
+    with Session(engine) as session:
+        row = session.scalar(query)
+        if row is None:
+            return None
+        return {column.name: getattr(row, column.name) for column in PipelineRun.__table__.columns}
@@ -1,40 +1,83 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import streamlit as st
+from config import CHART_MAX_POINTS
+from services.cache_service import get_figure_cache
 from services.data_service import get_data_from_db
+from services.indicator_service import get_indicators
+from services.resample_service import downsample_ohlcv
 
-def plot_stock_data(symbol: str) -> None:
-    df = get_data_from_db(symbol)
-    if df is None or df.empty:
-        st.warning(f"No data available for {symbol}")
-        return
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: returns the indices of `threshold` points that preserve the
+    shape of the line through (x, y). The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
     
-    df['sma_20'] = df['close'].rolling(window=20).mean()
-    df['sma_50'] = df['close'].rolling(window=50).mean()
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the area of the triangle from the previous pick and the next bucket's average
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def _line(df: pd.DataFrame, column: str, max_points: int):
+    values = df[['datetime', column]].dropna()
+    x = values['datetime'].to_numpy()
+    y = values[column].to_numpy(dtype=float)
+    keep = lttb(x.astype('int64').astype(float), y, max_points)
+    return x[keep], y[keep]
+
+def build_figure(symbol: str, df: pd.DataFrame, timeframe: str, max_points: int) -> go.Figure:
+    """
+    Candlesticks with SMA 20/50 and volume for bars sorted by datetime. Beyond `max_points` bars,
+    candles and volume are merged by downsample_ohlcv and the SMA lines thinned with LTTB; the
+    SMAs are computed on the full-resolution bars first.
+    """
+    df = df.join(get_indicators(symbol, df, ['sma_20', 'sma_50']))
+    candles = downsample_ohlcv(df, max_points)
+    merged = -(-len(df) // len(candles))
+    title = f'{symbol} Price ({timeframe})' if merged == 1 else f'{symbol} Price ({timeframe}, {merged} bars per candle)'
     
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
-                       vertical_spacing=0.1, subplot_titles=(f'{symbol} Price', 'Volume'), 
+                       vertical_spacing=0.1, subplot_titles=(title, 'Volume'),
                        row_heights=[0.7, 0.3])
     
-    fig.add_trace(go.Candlestick(x=df['datetime'],
-                                open=df['open'],
-                                high=df['high'],
-                                low=df['low'],
-                                close=df['close'],
+    fig.add_trace(go.Candlestick(x=candles['datetime'],
+                                open=candles['open'],
+                                high=candles['high'],
+                                low=candles['low'],
+                                close=candles['close'],
                                 name='OHLC'),
                  row=1, col=1)
     
-    fig.add_trace(go.Scatter(x=df['datetime'], y=df['sma_20'], 
+    x, y = _line(df, 'sma_20', max_points)
+    fig.add_trace(go.Scatter(x=x, y=y,
                            line=dict(color='blue', width=1),
                            name='SMA 20'),
                  row=1, col=1)
     
-    fig.add_trace(go.Scatter(x=df['datetime'], y=df['sma_50'], 
+    x, y = _line(df, 'sma_50', max_points)
+    fig.add_trace(go.Scatter(x=x, y=y,
                            line=dict(color='orange', width=1),
                            name='SMA 50'),
                  row=1, col=1)
     
-    fig.add_trace(go.Bar(x=df['datetime'], y=df['volume'], name='Volume', marker_color='rgba(0,0,250,0.3)'),
+    fig.add_trace(go.Bar(x=candles['datetime'], y=candles['volume'], name='Volume', marker_color='rgba(0,0,250,0.3)'),
                  row=2, col=1)
     
     fig.update_layout(
@@ -43,4 +86,21 @@ def plot_stock_data(symbol: str) -> None:
         showlegend=True,
         margin=dict(l=50, r=50, t=50, b=50),
     )
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    return fig
+
+def plot_stock_data(symbol: str, timeframe: str = '1d', days: int = 30, max_points: Optional[int] = None) -> None:
+    max_points = max_points or CHART_MAX_POINTS
+    df = get_data_from_db(symbol, days=days, timeframe=timeframe)
+    if df is None or df.empty:
+        st.warning(f"No data available for {symbol}")
+        return
+    
+    # The window's first bar and latest bar values identify the figure; a revised latest bar rebuilds it
+    first, last = df.iloc[0], df.iloc[-1]
+    window = (timeframe, days, max_points, len(df), first['datetime'], last['datetime'], last['close'], last['volume'])
+    cache = get_figure_cache()
+    spec = cache.get(symbol, window)
+    if spec is None:
+        spec = build_figure(symbol, df, timeframe, max_points).to_json()
+        cache.put(symbol, window, spec)
+    st.plotly_chart(pio.from_json(spec), use_container_width=True)
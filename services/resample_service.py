@@ -0,0 +1,95 @@
+import math
+from typing import List
+import numpy as np
+import pandas as pd
+from config import SESSION_OPEN, SESSION_CLOSE
+
+# Supported timeframes and their length in minutes
+TIMEFRAME_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60, '1d': 1440}
+TIMEFRAMES = list(TIMEFRAME_MINUTES)
+
+_NS_PER_MINUTE = 60 * 1_000_000_000
+_NS_PER_DAY = 1440 * _NS_PER_MINUTE
+
+def _session_offset() -> int:
+    hours, minutes = SESSION_OPEN.split(":")
+    return (int(hours) * 60 + int(minutes)) * _NS_PER_MINUTE
+
+def validate_timeframe(timeframe: str) -> str:
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"Unsupported timeframe {timeframe}; expected one of {', '.join(TIMEFRAMES)}")
+    return timeframe
+
+def bucket_starts(datetimes, timeframe: str) -> np.ndarray:
+    """
+    Returns the start of the `timeframe` bucket containing each timestamp.
+
+    Intraday buckets are counted from SESSION_OPEN so e.g. hourly bars start at 09:15, 10:15, ...
+    like the exchange's own; daily buckets start at midnight like downloaded daily bars.
+    """
+    ns = np.asarray(datetimes, dtype='datetime64[ns]').astype(np.int64)
+    day = ns - ns % _NS_PER_DAY
+    if timeframe == '1d':
+        return day.astype('datetime64[ns]')
+    step = TIMEFRAME_MINUTES[validate_timeframe(timeframe)] * _NS_PER_MINUTE
+    offset = _session_offset()
+    return (day + offset + (ns - day - offset) // step * step).astype('datetime64[ns]')
+
+def _aggregate(df: pd.DataFrame, datetimes: np.ndarray, starts: np.ndarray) -> pd.DataFrame:
+    # Bars from each start index up to the next one become one bar stamped with datetimes[start]
+    ends = np.r_[starts[1:], len(df)] - 1
+    return pd.DataFrame({
+        'datetime': datetimes[starts],
+        'open': df['open'].to_numpy(dtype=float)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=float), starts),
+        'close': df['close'].to_numpy(dtype=float)[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=float), starts),
+    })
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregates bars sorted by datetime into `timeframe` bars in one pass:
+    first open, max high, min low, last close and summed volume per bucket.
+    """
+    if df.empty:
+        return df[['datetime', 'open', 'high', 'low', 'close', 'volume']].copy()
+    
+    keys = bucket_starts(df['datetime'], timeframe)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return _aggregate(df, keys, starts)
+
+def downsample_ohlcv(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Merges runs of consecutive bars so at most `max_points` remain, aggregated like resample_ohlcv
+    so every high and low stays visible. Each merged bar carries its first bar's datetime.
+    """
+    if len(df) <= max_points:
+        return df[['datetime', 'open', 'high', 'low', 'close', 'volume']].copy()
+    
+    starts = np.arange(0, len(df), -(-len(df) // max_points))
+    return _aggregate(df, df['datetime'].to_numpy(), starts)
+
+def source_timeframe(timeframe: str, stored: List[str]) -> str:
+    """
+    Returns the coarsest stored timeframe that `timeframe` can be aggregated from.
+    """
+    minutes = TIMEFRAME_MINUTES[validate_timeframe(timeframe)]
+    candidates = [tf for tf in stored if tf in TIMEFRAME_MINUTES
+                  and TIMEFRAME_MINUTES[tf] <= minutes and minutes % TIMEFRAME_MINUTES[tf] == 0]
+    if not candidates:
+        raise ValueError(f"No stored timeframe can be aggregated into {timeframe}")
+    return max(candidates, key=TIMEFRAME_MINUTES.get)
+
+def history_days(bars: int, timeframe: str = '1d') -> int:
+    """
+    Returns how many calendar days to load to get at least `bars` bars of `timeframe`,
+    allowing for weekends and a few exchange holidays.
+    """
+    if timeframe == '1d':
+        per_session = 1
+    else:
+        open_minutes, close_minutes = (int(h) * 60 + int(m) for h, m in (t.split(":") for t in (SESSION_OPEN, SESSION_CLOSE)))
+        per_session = max(1, (close_minutes - open_minutes) // TIMEFRAME_MINUTES[validate_timeframe(timeframe)])
+    sessions = math.ceil(bars / per_session)
+    return math.ceil(sessions * 7 / 5) + 5
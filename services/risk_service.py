@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config import (RISK_MIN_CONFIDENCE, RISK_MAX_RISK_SCORE, RISK_MAX_DAILY_TRADES, RISK_PER_TRADE_PCT,
+                    RISK_MAX_SYMBOL_EXPOSURE_PCT, RISK_CAPITAL)
+from database import get_database_engine
+from models import BotSetting
+from services.account_service import get_account_summary, summarize_account
+from services.decision_service import validate_decision
+from services.journal_service import count_executions
+
+logger = logging.getLogger(__name__)
+
+RISK_DEFAULTS = {
+    'min_confidence': RISK_MIN_CONFIDENCE,
+    'max_risk_score': RISK_MAX_RISK_SCORE,
+    'max_daily_trades': RISK_MAX_DAILY_TRADES,
+    'risk_per_trade_pct': RISK_PER_TRADE_PCT,
+    'max_symbol_exposure_pct': RISK_MAX_SYMBOL_EXPOSURE_PCT,
+}
+
+# Executions with these statuses did not place an order and do not count towards max_daily_trades
+UNCOUNTED_STATUSES = ('REJECTED',)
+
+def get_risk_settings() -> Dict:
+    settings = dict(RISK_DEFAULTS)
+    engine = get_database_engine()
+    if not engine:
+        return settings
+    
+    query = select(BotSetting.key, BotSetting.value).where(BotSetting.key.in_(list(RISK_DEFAULTS)))
+    with engine.connect() as conn:
+        settings.update({key: value for key, value in conn.execute(query)})
+    return settings
+
+def save_risk_settings(settings: Dict) -> Tuple[bool, str]:
+    engine = get_database_engine()
+    if not engine:
+        return False, "Database connection failed"
+    
+    now = datetime.now()
+    with Session(engine) as session:
+        for key, value in settings.items():
+            if key in RISK_DEFAULTS:
+                session.merge(BotSetting(key=key, value=value, updated_at=now))
+        session.commit()
+    return True, "Risk parameters saved"
+
+def check_orders(trades: List[Dict], settings: Optional[Dict] = None, account: Optional[Dict] = None,
+                 executed_today: Optional[int] = None) -> Tuple[List[Dict], List[Tuple[Dict, str]]]:
+    """
+    Applies the risk limits to a batch of decisions at once and sizes the orders that pass.
+    
+    Decisions are ranked by confidence, then by lower risk score; only the best one per symbol is
+    considered, and the best ones take the remaining daily trade slots and funds first. The quantity
+    risks `risk_per_trade_pct` of capital between entry and stop, capped so the symbol's total
+    exposure, existing positions included, stays within `max_symbol_exposure_pct` of capital.
+    Funds and positions come from the broker account, or RISK_CAPITAL when it is unavailable.
+    
+    Returns (approved trades with 'quantity' set, [(trade, reason), ...] for the rest), each in input order.
+    """
+    if not trades:
+        return [], []
+    settings = {**RISK_DEFAULTS, **(settings if settings is not None else get_risk_settings())}
+    if account is None:
+        account = get_account_summary()
+    aggregates = (account or {}).get('aggregates') or summarize_account(account)
+    funds = aggregates['available_funds']
+    exposure = aggregates['exposure']
+    if funds is None:
+        funds = RISK_CAPITAL
+    capital = funds + sum(exposure.values())
+    if executed_today is None:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        executed_today = count_executions(since=today, exclude_statuses=UNCOUNTED_STATUSES)
+    
+    checked = [validate_decision(trade) for trade in trades]
+    frame = pd.DataFrame([decision or {} for decision, _ in checked],
+                         columns=['stock', 'action', 'entry_price', 'stop_loss', 'confidence', 'risk_score'])
+    reasons = np.array([error and f"Invalid trade: {error}" for _, error in checked], dtype=object)
+    
+    def reject(mask, reason):
+        # Each trade keeps the first reason it failed on
+        reasons[np.asarray(mask, dtype=bool) & pd.isna(reasons)] = reason
+    
+    confidence = frame['confidence'].to_numpy(dtype=float)
+    risk_score = frame['risk_score'].to_numpy(dtype=float)
+    reject(frame['action'] == 'HOLD', "HOLD decision, nothing to execute")
+    reject(confidence < settings['min_confidence'], f"Confidence below {settings['min_confidence']}")
+    reject(risk_score > settings['max_risk_score'], f"Risk score above {settings['max_risk_score']}")
+    
+    # Priority order: highest confidence, then lowest risk score, then input order
+    order = np.lexsort((np.arange(len(frame)), risk_score, -confidence))
+    ranked = frame.iloc[order]
+    duplicate = np.zeros(len(frame), dtype=bool)
+    duplicate[order] = (ranked['stock'].duplicated() & ranked['stock'].notna()).to_numpy()
+    reject(duplicate, "A higher ranked decision for this symbol is in the same batch")
+    
+    entry = frame['entry_price'].to_numpy(dtype=float)
+    stop_distance = np.abs(entry - frame['stop_loss'].to_numpy(dtype=float))
+    held = frame['stock'].map(exposure).fillna(0.0).to_numpy(dtype=float)
+    allowance = capital * settings['max_symbol_exposure_pct'] / 100 - held
+    with np.errstate(divide='ignore', invalid='ignore'):
+        risk_quantity = np.floor(capital * settings['risk_per_trade_pct'] / 100 / stop_distance)
+        cap_quantity = np.floor(allowance / entry)
+    reject(cap_quantity < 1, f"Exposure cap of {settings['max_symbol_exposure_pct']}% of capital reached")
+    reject(risk_quantity < 1, "Stop too far from entry to size one share within the per-trade risk")
+    quantity = np.fmin(risk_quantity, cap_quantity)
+    
+    # Remaining trade slots and funds go to the best orders first. Only orders that fit use them up,
+    # so one order too large for the funds does not block cheaper ones ranked below it.
+    slots = max(int(settings['max_daily_trades']) - executed_today, 0)
+    remaining = funds
+    for i in order:
+        if not pd.isna(reasons[i]):
+            continue
+        cost = quantity[i] * entry[i]
+        if slots == 0:
+            reasons[i] = f"Daily limit of {settings['max_daily_trades']} trades reached"
+        elif cost > remaining:
+            reasons[i] = "Insufficient funds"
+        else:
+            slots -= 1
+            remaining -= cost
+    
+    approved, rejected = [], []
+    for i, trade in enumerate(trades):
+        if pd.isna(reasons[i]):
+            trade['quantity'] = int(quantity[i])
+            approved.append(trade)
+        else:
+            rejected.append((trade, reasons[i]))
+    logger.info("Risk checks: %d/%d orders approved", len(approved), len(trades))
+    return approved, rejected
@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import (SCREENER_RULES, SCREENER_SMA_FAST, SCREENER_SMA_SLOW, SCREENER_WINDOW,
+                    SCREENER_VOLUME_MULTIPLE, SCREENER_CHANGE_PCT)
+from services.indicator_service import bollinger, build_panel, sma
+
+# Each rule looks at the last two rows of the right-aligned panel and returns, per symbol, whether
+# it fired and whether there was enough history to evaluate it.
+
+def _sma_cross(panel: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    spread = sma(panel['close'], SCREENER_SMA_FAST) - sma(panel['close'], SCREENER_SMA_SLOW)
+    known = np.isfinite(spread[-1]) & np.isfinite(spread[-2])
+    return known & (np.sign(spread[-1]) != np.sign(spread[-2])), known
+
+def _breakout(panel: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # Close outside the Bollinger bands, i.e. a move large relative to recent volatility
+    _, upper, lower = bollinger(panel['close'], SCREENER_WINDOW)
+    close = panel['close'][-1]
+    known = np.isfinite(upper[-1]) & np.isfinite(close)
+    return known & ((close > upper[-1]) | (close < lower[-1])), known
+
+def _volume_spike(panel: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # Average of the bars before the latest one
+    average = sma(panel['volume'][:-1], SCREENER_WINDOW)[-1]
+    volume = panel['volume'][-1]
+    known = np.isfinite(average) & np.isfinite(volume) & (average > 0)
+    return known & (volume > SCREENER_VOLUME_MULTIPLE * average), known
+
+def _price_change(panel: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    close = panel['close']
+    known = np.isfinite(close[-1]) & np.isfinite(close[-2])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.abs(close[-1] / close[-2] - 1) * 100
+    return known & (change >= SCREENER_CHANGE_PCT), known
+
+RULES = {
+    'sma_cross': _sma_cross,
+    'breakout': _breakout,
+    'volume_spike': _volume_spike,
+    'price_change': _price_change,
+}
+
+def screen(frames: Dict[str, pd.DataFrame], rules: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Evaluates the screening rules on every symbol's latest bar in one vectorized pass.
+
+    Returns the rules each symbol triggered; an empty list means nothing in the data calls for a new
+    decision. Symbols with too little history to evaluate any rule get ['unscreened'] so they still
+    reach the LLM.
+    """
+    rules = list(rules or SCREENER_RULES)
+    unknown = [rule for rule in rules if rule not in RULES]
+    if unknown:
+        raise ValueError(f"Unknown screener rule: {', '.join(unknown)}")
+    
+    result = {symbol: ['unscreened'] for symbol, df in frames.items() if df is None or len(df) < 2}
+    screened = {symbol: df for symbol, df in frames.items() if symbol not in result}
+    if not screened:
+        return {symbol: result[symbol] for symbol in frames}
+    
+    panel = build_panel(screened)
+    evaluated = {rule: RULES[rule](panel) for rule in rules}
+    for j, symbol in enumerate(screened):
+        result[symbol] = [rule for rule, (hit, _) in evaluated.items() if hit[j]]
+        if not any(known[j] for _, known in evaluated.values()):
+            result[symbol] = ['unscreened']
+    return {symbol: result[symbol] for symbol in frames}
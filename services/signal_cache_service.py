@@ -0,0 +1,51 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from config import LLM_MODEL, SIGNAL_CACHE_TTL_SECONDS, SIGNAL_CACHE_MAX_ENTRIES
+from database import get_database_engine
+from models import SignalCacheEntry
+
+def prompt_fingerprint(prompt: str, model: str = LLM_MODEL) -> str:
+    return hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+
+def get_cached_decisions(keys: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Returns the stored, unexpired decision for each fingerprint that has one.
+    """
+    engine = get_database_engine()
+    keys = list(keys)
+    if not engine or not keys:
+        return {}
+    
+    cutoff = datetime.now() - timedelta(seconds=SIGNAL_CACHE_TTL_SECONDS)
+    query = select(SignalCacheEntry.key, SignalCacheEntry.decision).where(
+        SignalCacheEntry.key.in_(keys),
+        SignalCacheEntry.created_at >= cutoff
+    )
+    with engine.connect() as conn:
+        return {key: decision for key, decision in conn.execute(query)}
+
+def store_decisions(entries: Dict[str, Dict], model: str = LLM_MODEL) -> None:
+    """
+    Stores decisions by prompt fingerprint, then evicts expired entries and the oldest beyond the size limit.
+    """
+    engine = get_database_engine()
+    if not engine or not entries:
+        return
+    
+    now = datetime.now()
+    with Session(engine) as session:
+        for key, decision in entries.items():
+            session.merge(SignalCacheEntry(key=key, model=model, symbol=decision.get('stock', ''),
+                                           decision=decision, created_at=now))
+        session.flush()
+        
+        cutoff = now - timedelta(seconds=SIGNAL_CACHE_TTL_SECONDS)
+        session.execute(delete(SignalCacheEntry).where(SignalCacheEntry.created_at < cutoff))
+        excess = session.scalar(select(func.count()).select_from(SignalCacheEntry)) - SIGNAL_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest = select(SignalCacheEntry.key).order_by(SignalCacheEntry.created_at).limit(excess)
+            session.execute(delete(SignalCacheEntry).where(SignalCacheEntry.key.in_(oldest)))
+        session.commit()
@@ -0,0 +1,248 @@
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from config import OHLCV_BACKEND, OHLCV_PARQUET_DIR
+from database import get_database_engine
+from models import OHLCVData
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OHLCV_SELECT = [OHLCVData.datetime] + [OHLCVData.__table__.c[col] for col in OHLCV_COLUMNS]
+
+def clean_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drops rows with missing prices or volume and returns just the datetime and OHLCV columns as floats.
+    """
+    valid = data[OHLCV_COLUMNS].notna().all(axis=1).to_numpy()
+    columns = {'datetime': data['datetime'].to_numpy()[valid]}
+    for col in OHLCV_COLUMNS:
+        columns[col] = data[col].to_numpy(dtype=float)[valid]
+    return pd.DataFrame(columns)
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({'datetime': pd.Series(dtype='datetime64[ns]'),
+                         **{col: pd.Series(dtype=float) for col in OHLCV_COLUMNS}})
+
+class SQLOHLCVStore:
+    """
+    Row store in the ohlcv_data table of DATABASE_URL.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+
+    def _insert(self):
+        # Duplicate bars are resolved by the (symbol, timeframe, datetime) unique index instead of per-row lookups.
+        # Re-downloaded overlap bars overwrite the stored values so late corrections are picked up.
+        if self.engine.dialect.name == 'sqlite':
+            insert = sqlite.insert
+        elif self.engine.dialect.name == 'postgresql':
+            insert = postgresql.insert
+        else:
+            raise ValueError(f"Bulk OHLCV ingestion is not supported for {self.engine.dialect.name}")
+        stmt = insert(OHLCVData)
+        return stmt.on_conflict_do_update(
+            index_elements=['symbol', 'timeframe', 'datetime'],
+            set_={col: stmt.excluded[col] for col in OHLCV_COLUMNS}
+        )
+
+    def write(self, symbol: str, data: pd.DataFrame, timeframe: str = '1d') -> int:
+        frame = clean_ohlcv(data)
+        if frame.empty:
+            return 0
+        frame.insert(1, 'symbol', symbol)
+        frame.insert(2, 'timeframe', timeframe)
+        with self.engine.begin() as conn:
+            conn.execute(self._insert(), frame.to_dict('records'))
+        return len(frame)
+
+    def read(self, symbols: List[str], start: Optional[datetime] = None,
+             timeframe: str = '1d') -> Dict[str, pd.DataFrame]:
+        # Project only the bar columns so the (symbol, timeframe, datetime) index is walked in order
+        # and frames are built without ORM entities or the surrogate id
+        query = select(OHLCVData.symbol, *OHLCV_SELECT).where(
+            OHLCVData.symbol.in_(symbols),
+            OHLCVData.timeframe == timeframe
+        )
+        if start is not None:
+            query = query.where(OHLCVData.datetime >= start)
+        data = pd.read_sql(query.order_by(OHLCVData.symbol, OHLCVData.datetime), self.engine)
+        
+        frames = {
+            symbol: group.drop(columns='symbol').reset_index(drop=True)
+            for symbol, group in data.groupby('symbol', sort=False)
+        }
+        return {symbol: frames[symbol] if symbol in frames else _empty_frame() for symbol in symbols}
+
+    def read_columns(self, symbols: List[str], start: Optional[datetime] = None,
+                     timeframe: str = '1d') -> Dict[str, Dict[str, np.ndarray]]:
+        return {
+            symbol: {col: df[col].to_numpy() for col in ['datetime'] + OHLCV_COLUMNS}
+            for symbol, df in self.read(symbols, start, timeframe).items()
+        }
+
+    def latest_timestamps(self, symbols: List[str], timeframe: str = '1d') -> Dict[str, datetime]:
+        query = select(OHLCVData.symbol, func.max(OHLCVData.datetime)).where(
+            OHLCVData.symbol.in_(symbols),
+            OHLCVData.timeframe == timeframe
+        ).group_by(OHLCVData.symbol)
+        with self.engine.connect() as conn:
+            return {symbol: latest for symbol, latest in conn.execute(query) if latest is not None}
+
+    def prune(self, symbols: List[str], timeframe: str, before: datetime) -> int:
+        query = delete(OHLCVData).where(
+            OHLCVData.symbol.in_(symbols),
+            OHLCVData.timeframe == timeframe,
+            OHLCVData.datetime < before
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(query).rowcount
+
+class ParquetOHLCVStore:
+    """
+    Columnar store with one Parquet file per symbol and partition: <root>/<symbol>/<year>.parquet
+    for daily bars and <root>/<symbol>/<timeframe>/<year>-<month>.parquet for intraday bars.
+
+    Reads open only the partitions in range, memory-mapped, and prune row groups by datetime;
+    read_columns() hands out the columns as NumPy arrays for the backtest panel.
+    Writes rewrite just the touched partitions, and retention drops whole expired partitions.
+    """
+    def __init__(self, root: str = OHLCV_PARQUET_DIR):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet OHLCV backend requires pyarrow") from e
+        self.pa = pa
+        self.pq = pq
+        self.root = root
+        self._locks = defaultdict(threading.Lock)
+
+    def _directory(self, symbol: str, timeframe: str) -> str:
+        if timeframe == '1d':
+            return os.path.join(self.root, symbol)
+        return os.path.join(self.root, symbol, timeframe)
+
+    def _partition_format(self, timeframe: str) -> str:
+        return '%Y' if timeframe == '1d' else '%Y-%m'
+
+    def _partitions(self, symbol: str, timeframe: str) -> List[str]:
+        # Partition names sort chronologically as strings
+        directory = self._directory(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-8] for name in os.listdir(directory) if name.endswith('.parquet'))
+
+    def _path(self, symbol: str, timeframe: str, partition: str) -> str:
+        return os.path.join(self._directory(symbol, timeframe), f"{partition}.parquet")
+
+    def _replace(self, path: str, rows: pd.DataFrame) -> None:
+        table = self.pa.Table.from_pandas(rows[['datetime'] + OHLCV_COLUMNS], preserve_index=False)
+        tmp_path = f"{path}.tmp"
+        self.pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def write(self, symbol: str, data: pd.DataFrame, timeframe: str = '1d') -> int:
+        frame = clean_ohlcv(data)
+        if frame.empty:
+            return 0
+        
+        os.makedirs(self._directory(symbol, timeframe), exist_ok=True)
+        partitions = frame['datetime'].dt.strftime(self._partition_format(timeframe))
+        with self._locks[symbol]:
+            for partition, rows in frame.groupby(partitions):
+                path = self._path(symbol, timeframe, partition)
+                if os.path.exists(path):
+                    existing = self.pq.read_table(path, memory_map=True).to_pandas()
+                    rows = pd.concat([existing, rows])
+                # Later rows win, so re-downloaded bars replace the stored values
+                self._replace(path, rows.drop_duplicates('datetime', keep='last').sort_values('datetime'))
+        return len(frame)
+
+    def _tables(self, symbols: List[str], start: Optional[datetime], timeframe: str) -> Dict:
+        # Memory-mapped Arrow tables over the partitions in range; None for symbols without any
+        first = start.strftime(self._partition_format(timeframe)) if start is not None else None
+        filters = [('datetime', '>=', pd.Timestamp(start))] if start is not None else None
+        tables = {}
+        for symbol in symbols:
+            partitions = [p for p in self._partitions(symbol, timeframe) if first is None or p >= first]
+            tables[symbol] = self.pa.concat_tables([
+                self.pq.read_table(self._path(symbol, timeframe, partition), memory_map=True, filters=filters)
+                for partition in partitions
+            ]) if partitions else None
+        return tables
+
+    def read(self, symbols: List[str], start: Optional[datetime] = None,
+             timeframe: str = '1d') -> Dict[str, pd.DataFrame]:
+        return {symbol: table.to_pandas() if table is not None else _empty_frame()
+                for symbol, table in self._tables(symbols, start, timeframe).items()}
+
+    def read_columns(self, symbols: List[str], start: Optional[datetime] = None,
+                     timeframe: str = '1d') -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Returns the datetime and OHLCV columns per symbol as NumPy arrays without building DataFrames.
+        The arrays are views over the decoded Arrow buffers when the range was read as one chunk;
+        otherwise each column is concatenated once.
+        """
+        columns = {}
+        for symbol, table in self._tables(symbols, start, timeframe).items():
+            if table is None:
+                columns[symbol] = {col: series.to_numpy() for col, series in _empty_frame().items()}
+                continue
+            columns[symbol] = {}
+            for col in ['datetime'] + OHLCV_COLUMNS:
+                column = table.column(col)
+                array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+                columns[symbol][col] = array.to_numpy(zero_copy_only=False)
+        return columns
+
+    def latest_timestamps(self, symbols: List[str], timeframe: str = '1d') -> Dict[str, datetime]:
+        latest = {}
+        for symbol in symbols:
+            partitions = self._partitions(symbol, timeframe)
+            if not partitions:
+                continue
+            # Row group statistics answer MAX(datetime) without reading any column data
+            metadata = self.pq.ParquetFile(self._path(symbol, timeframe, partitions[-1])).metadata
+            column = metadata.schema.names.index('datetime')
+            maxima = [metadata.row_group(i).column(column).statistics.max for i in range(metadata.num_row_groups)]
+            if maxima:
+                latest[symbol] = pd.Timestamp(max(maxima)).to_pydatetime()
+        return latest
+
+    def prune(self, symbols: List[str], timeframe: str, before: datetime) -> int:
+        boundary = before.strftime(self._partition_format(timeframe))
+        removed = 0
+        for symbol in symbols:
+            with self._locks[symbol]:
+                for partition in self._partitions(symbol, timeframe):
+                    if partition > boundary:
+                        break
+                    path = self._path(symbol, timeframe, partition)
+                    if partition < boundary:
+                        removed += self.pq.ParquetFile(path).metadata.num_rows
+                        os.remove(path)
+                        continue
+                    rows = self.pq.read_table(path, memory_map=True).to_pandas()
+                    keep = rows[rows['datetime'] >= pd.Timestamp(before)]
+                    removed += len(rows) - len(keep)
+                    if keep.empty:
+                        os.remove(path)
+                    elif len(keep) < len(rows):
+                        self._replace(path, keep)
+        return removed
+
+@st.cache_resource
+def get_ohlcv_store():
+    """
+    Returns the OHLCV store selected by OHLCV_BACKEND, or None if it cannot be opened.
+    """
+    if OHLCV_BACKEND == 'parquet':
+        return ParquetOHLCVStore()
+    engine = get_database_engine()
+    return SQLOHLCVStore(engine) if engine else None
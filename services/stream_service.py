@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from config import (SEC_DICT, BAR_INTERVAL, STREAM_FLUSH_SECONDS, STREAM_BATCH_SIZE,
+                    STREAM_SIGNAL_INTERVAL_SECONDS, REPLAY_SPEED)
+from services.cache_service import get_ohlcv_cache
+from services.data_service import aggregate_timeframes
+from services.indicator_service import update_indicator_snapshots
+from services.pipeline_service import run_cycle
+from services.resample_service import TIMEFRAME_MINUTES, bucket_starts, validate_timeframe
+from services.storage_service import get_ohlcv_store
+
+logger = logging.getLogger(__name__)
+
+# A tick is a dict with symbol, datetime (naive exchange time, like stored bars), price and the
+# volume traded since the previous tick. Sources are async iterables of ticks.
+
+TICK_COLUMNS = ['datetime', 'symbol', 'price', 'volume']
+IST = timezone(timedelta(hours=5, minutes=30))
+
+class ReplaySource:
+    """
+    Streams ticks recorded in a CSV or Parquet file with datetime, symbol, price and volume columns.
+
+    `speed` is the replay rate relative to the recorded timestamps (2.0 plays twice as fast);
+    0 replays as fast as possible, which is how throughput is benchmarked.
+    """
+    def __init__(self, path: str, speed: float = REPLAY_SPEED, symbols: Optional[List[str]] = None,
+                 chunk_size: int = 100_000):
+        self.path = path
+        self.speed = speed
+        self.symbols = set(symbols) if symbols else None
+        self.chunk_size = chunk_size
+
+    def _chunks(self):
+        if self.path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=self.chunk_size, columns=TICK_COLUMNS):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(self.path, usecols=TICK_COLUMNS, parse_dates=['datetime'], chunksize=self.chunk_size)
+
+    async def __aiter__(self):
+        first = None
+        started = time.monotonic()
+        for chunk in self._chunks():
+            if self.symbols is not None:
+                chunk = chunk[chunk['symbol'].isin(self.symbols)]
+            rows = zip(chunk['datetime'], chunk['symbol'], chunk['price'].to_numpy(dtype=float),
+                       chunk['volume'].to_numpy(dtype=float))
+            for i, (ts, symbol, price, volume) in enumerate(rows):
+                if self.speed > 0:
+                    first = first if first is not None else ts
+                    delay = (ts - first).total_seconds() / self.speed - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif i % 1000 == 0:
+                    # Yield to the flusher and consumers now and then when replaying flat out
+                    await asyncio.sleep(0)
+                yield {'symbol': symbol, 'datetime': ts, 'price': price, 'volume': volume}
+
+def _feed_time(ltt: str) -> datetime:
+    # The feed reports the last trade time as a UTC HH:MM:SS string without a date
+    now = datetime.now(timezone.utc)
+    ts = datetime.combine(now.date(), datetime.strptime(ltt, '%H:%M:%S').time(), tzinfo=timezone.utc)
+    if ts > now + timedelta(minutes=1):
+        ts -= timedelta(days=1)
+    return ts.astimezone(IST).replace(tzinfo=None)
+
+class DhanFeedSource:
+    """
+    Streams live quotes for `symbols` from the Dhan market feed websocket, reconnecting on disconnects.
+
+    Security ids come from SEC_DICT; the feed's cumulative day volume is turned into per-tick volume.
+    """
+    def __init__(self, symbols: List[str], client_id: Optional[str] = None, access_token: Optional[str] = None,
+                 reconnect_seconds: float = 5.0):
+        self.client_id = client_id or os.getenv('CLIENT')
+        self.access_token = access_token or os.getenv('TOKEN')
+        if not self.client_id or not self.access_token:
+            raise ValueError("Dhan market feed requires CLIENT and TOKEN")
+        self.symbols_by_id = {int(SEC_DICT[s]): s for s in symbols if s in SEC_DICT}
+        missing = [s for s in symbols if s not in SEC_DICT]
+        if missing:
+            logger.warning("No security id for %s; not streamed", ", ".join(missing))
+        self.reconnect_seconds = reconnect_seconds
+
+    async def __aiter__(self):
+        from dhanhq import marketfeed
+        import websockets
+
+        instruments = [(marketfeed.NSE, str(security_id), marketfeed.Quote) for security_id in self.symbols_by_id]
+        feed = marketfeed.DhanFeed(self.client_id, self.access_token, instruments, version='v2')
+        day_volume = {}
+        try:
+            while True:
+                try:
+                    if feed.ws is None:
+                        await feed.connect()
+                    data = await feed.get_instrument_data()
+                except websockets.ConnectionClosed as e:
+                    logger.warning("Market feed disconnected (%s), reconnecting in %.0fs", e, self.reconnect_seconds)
+                    feed.ws = None
+                    await asyncio.sleep(self.reconnect_seconds)
+                    continue
+
+                if data is None:
+                    # dhanhq parses the server's disconnect packet to None
+                    logger.warning("Market feed disconnected by the server, reconnecting in %.0fs", self.reconnect_seconds)
+                    await feed.ws.close()
+                    feed.ws = None
+                    await asyncio.sleep(self.reconnect_seconds)
+                    continue
+                # Market status packets arrive as plain strings such as "Markets Open"
+                if not isinstance(data, dict) or data.get('type') != 'Quote Data':
+                    continue
+                symbol = self.symbols_by_id.get(data['security_id'])
+                if symbol is None:
+                    continue
+                previous = day_volume.get(symbol)
+                day_volume[symbol] = data['volume']
+                traded = data['LTQ'] if previous is None else max(data['volume'] - previous, 0)
+                yield {'symbol': symbol, 'datetime': _feed_time(data['LTT']),
+                       'price': float(data['LTP']), 'volume': float(traded)}
+        finally:
+            await feed.disconnect()
+
+class RecordingSource:
+    """
+    Passes ticks through from another source while appending them to a CSV file ReplaySource can play back.
+    """
+    def __init__(self, source, path: str, buffer_size: int = 1000):
+        self.source = source
+        self.path = path
+        self.buffer_size = buffer_size
+
+    def _write(self, ticks: List[Dict]) -> None:
+        header = not os.path.exists(self.path)
+        pd.DataFrame(ticks, columns=TICK_COLUMNS).to_csv(self.path, mode='a', header=header, index=False)
+
+    async def __aiter__(self):
+        buffer = []
+        try:
+            async for tick in self.source:
+                buffer.append(tick)
+                if len(buffer) >= self.buffer_size:
+                    self._write(buffer)
+                    buffer = []
+                yield tick
+        finally:
+            if buffer:
+                self._write(buffer)
+
+class BarBuilder:
+    """
+    Folds ticks into one open `timeframe` bar per symbol, using the same buckets as resample_service.
+    """
+    def __init__(self, timeframe: str = BAR_INTERVAL):
+        self.timeframe = validate_timeframe(timeframe)
+        self.length = timedelta(minutes=TIMEFRAME_MINUTES[timeframe])
+        self.bars = {}
+        self._ends = {}
+        self.late_ticks = 0
+
+    def update(self, tick: Dict) -> Optional[Dict]:
+        """
+        Applies a tick to its symbol's open bar; returns the previous bar when the tick opens a new one.
+        """
+        symbol, ts, price = tick['symbol'], tick['datetime'], tick['price']
+        bar = self.bars.get(symbol)
+        if bar is not None and ts < self._ends[symbol]:
+            if ts < bar['datetime']:
+                # Belongs to a bar that has already been closed and handed off
+                self.late_ticks += 1
+                return None
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            bar['volume'] += tick['volume']
+            return None
+
+        start = pd.Timestamp(bucket_starts([ts], self.timeframe)[0])
+        self.bars[symbol] = {'datetime': start, 'open': price, 'high': price, 'low': price,
+                             'close': price, 'volume': tick['volume']}
+        self._ends[symbol] = start + self.length
+        return bar
+
+class StreamPipeline:
+    """
+    Builds bars from a tick source and flushes them to the OHLCV store in batches.
+
+    Closed bars are written every `flush_seconds` or once `batch_size` of them are pending, together
+    with the current open bars so storage stays live. Each flush re-aggregates the derived timeframes
+    and indicator snapshots of the touched symbols, then publishes the persisted closed bars to
+    subscriber queues as {'symbol', 'timeframe', 'bar'} events. Storage work runs on a worker thread
+    so tick consumption never waits on the database.
+    """
+    def __init__(self, source, timeframe: str = BAR_INTERVAL, batch_size: int = STREAM_BATCH_SIZE,
+                 flush_seconds: float = STREAM_FLUSH_SECONDS):
+        self.source = source
+        self.builder = BarBuilder(timeframe)
+        self.timeframe = timeframe
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._closed = []
+        self._subscribers = []
+        self._flush_now = asyncio.Event()
+        self._stopping = False
+        self.stats = {'ticks': 0, 'bars': 0, 'flushes': 0, 'rows_written': 0, 'dropped_events': 0}
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def _publish(self, event: Dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                # Slow consumers see the newest bars rather than stalling ingestion
+                queue.get_nowait()
+                self.stats['dropped_events'] += 1
+            queue.put_nowait(event)
+
+    def _write(self, rows: List[Tuple[str, Dict]]) -> None:
+        by_symbol = defaultdict(list)
+        for symbol, bar in rows:
+            by_symbol[symbol].append(bar)
+
+        store = get_ohlcv_store()
+        for symbol, bars in by_symbol.items():
+            frame = pd.DataFrame(bars)
+            store.write(symbol, frame, self.timeframe)
+            if self.timeframe != '1d':
+                aggregate_timeframes(store, symbol, frame, self.timeframe)
+
+        symbols = list(by_symbol)
+        get_ohlcv_cache().invalidate(symbols)
+        try:
+            update_indicator_snapshots(symbols)
+        except Exception as e:
+            logger.error("Error updating indicator snapshots: %s", e)
+
+    async def _flush(self) -> None:
+        closed, self._closed = self._closed, []
+        rows = closed + [(symbol, dict(bar)) for symbol, bar in self.builder.bars.items()]
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception as e:
+            logger.error("Error flushing %d bars: %s", len(rows), e)
+            # Keep closed bars for the next attempt; open bars are rewritten anyway
+            self._closed = closed + self._closed
+            return
+
+        self.stats['flushes'] += 1
+        self.stats['rows_written'] += len(rows)
+        for symbol, bar in closed:
+            self._publish({'symbol': symbol, 'timeframe': self.timeframe, 'bar': bar})
+
+    async def _flush_loop(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self._flush()
+
+    async def run(self) -> Dict:
+        """
+        Consumes the source until it ends (or the task is cancelled) and returns throughput stats.
+        """
+        started = time.monotonic()
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            async for tick in self.source:
+                self.stats['ticks'] += 1
+                closed = self.builder.update(tick)
+                if closed is not None:
+                    self._closed.append((tick['symbol'], closed))
+                    self.stats['bars'] += 1
+                    if len(self._closed) >= self.batch_size:
+                        self._flush_now.set()
+        finally:
+            self._stopping = True
+            self._flush_now.set()
+            await flusher
+            await self._flush()
+
+        elapsed = time.monotonic() - started
+        self.stats['late_ticks'] = self.builder.late_ticks
+        self.stats['elapsed'] = elapsed
+        self.stats['ticks_per_second'] = self.stats['ticks'] / elapsed if elapsed else 0.0
+        return self.stats
+
+async def signal_consumer(queue: asyncio.Queue, interval: float = STREAM_SIGNAL_INTERVAL_SECONDS,
+                          execute: bool = False) -> None:
+    """
+    Runs a signal cycle (no refresh) for symbols with newly persisted bars, at most once per `interval`.
+    """
+    pending = set()
+    last = float('-inf')
+    while True:
+        timeout = max(0.0, last + interval - time.monotonic()) if pending else None
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout)
+            pending.add(event['symbol'])
+        except asyncio.TimeoutError:
+            pass
+
+        if pending and time.monotonic() - last >= interval:
+            symbols = sorted(pending)
+            pending.clear()
+            last = time.monotonic()
+            try:
+                run = await asyncio.to_thread(run_cycle, symbols, refresh=False, execute=execute)
+                logger.info("Stream signals: %d signals, %d executed, %d LLM calls avoided by the screener",
+                            run['signals'], run['executed'], run['screened_out'])
+            except Exception:
+                logger.exception("Stream signal cycle failed")
+
+async def run_stream(source, signals: bool = True, execute: bool = False) -> Dict:
+    """
+    Runs the streaming pipeline over `source`, with a signal consumer unless `signals` is False.
+    """
+    pipeline = StreamPipeline(source)
+    consumer = asyncio.create_task(signal_consumer(pipeline.subscribe(), execute=execute)) if signals else None
+    try:
+        return await pipeline.run()
+    finally:
+        if consumer is not None:
+            consumer.cancel()
@@ -0,0 +1,86 @@
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import SWEEP_MAX_WORKERS, BACKTEST_CAPITAL_PER_TRADE
+from services.backtest_service import load_panel, load_recorded_signals, simulate, summarize
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Per-worker state, set once by _init_worker so tasks only carry their parameters
+_shm = None
+_panel = None
+_signals = None
+
+def _init_worker(shm_name: str, shape: Tuple[int, ...], dates: np.ndarray, symbols: List[str],
+                 signals: pd.DataFrame) -> None:
+    global _shm, _panel, _signals
+    # Attach to the parent's block; the arrays below are views into it, not copies
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _panel = {'dates': pd.DatetimeIndex(dates), 'symbols': symbols}
+    _panel.update({col: prices[i] for i, col in enumerate(PRICE_COLUMNS)})
+    _signals = signals
+
+def select_signals(signals: pd.DataFrame, min_confidence: int, max_risk: int, max_daily_trades: int) -> pd.DataFrame:
+    """
+    Applies the bot's risk settings: confidence and risk thresholds, then the most confident
+    `max_daily_trades` signals per calendar day.
+    """
+    eligible = signals[(signals['confidence'] >= min_confidence) & (signals['risk_score'] <= max_risk)]
+    day = pd.to_datetime(eligible['timestamp']).dt.normalize()
+    rank = eligible['confidence'].groupby(day).rank(method='first', ascending=False)
+    return eligible[rank <= max_daily_trades]
+
+def _evaluate(params: Tuple[int, int, int], initial_capital: float) -> Dict:
+    min_confidence, max_risk, max_daily_trades = params
+    trades = simulate(_panel, select_signals(_signals, min_confidence, max_risk, max_daily_trades))
+    return {
+        'min_confidence': min_confidence,
+        'max_risk': max_risk,
+        'max_daily_trades': max_daily_trades,
+        **summarize(trades, initial_capital)
+    }
+
+def run_sweep(min_confidences: Iterable[int] = range(1, 11), max_risks: Iterable[int] = range(1, 11),
+              max_daily_trades: Iterable[int] = (1, 3, 5, 10, 20), symbols: Optional[List[str]] = None,
+              days: int = 365, signals: Optional[pd.DataFrame] = None,
+              max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Backtests every combination of the risk settings on a process pool and returns them ranked
+    by total PnL, then hit rate.
+
+    The OHLCV panel is placed in shared memory once and mapped by every worker; signals default to
+    the journaled ones and are sent to each worker once at start-up.
+    """
+    panel = load_panel(symbols, days)
+    if signals is None:
+        signals = load_recorded_signals(panel['symbols'], panel['dates'][0] if len(panel['dates']) else None)
+    signals = signals.dropna(subset=['confidence', 'risk_score'])
+    grid = list(itertools.product(min_confidences, max_risks, max_daily_trades))
+    if signals.empty or not grid:
+        return pd.DataFrame()
+    
+    prices = np.stack([panel[col] for col in PRICE_COLUMNS])
+    shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+        initial_capital = BACKTEST_CAPITAL_PER_TRADE * len(panel['symbols'])
+        init_args = (shm.name, prices.shape, panel['dates'].values, panel['symbols'], signals)
+        # Workers are spawned rather than forked: the caller (the Streamlit server, the worker) runs
+        # background threads, and a fork taken while one of them holds a lock can deadlock the child
+        with ProcessPoolExecutor(max_workers=max_workers or SWEEP_MAX_WORKERS,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=init_args) as pool:
+            rows = list(pool.map(_evaluate, grid, itertools.repeat(initial_capital),
+                                 chunksize=max(1, len(grid) // (4 * (max_workers or SWEEP_MAX_WORKERS)))))
+    finally:
+        shm.close()
+        shm.unlink()
+    
+    results = pd.DataFrame(rows).sort_values(['total_pnl', 'hit_rate'], ascending=False)
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results.reset_index(drop=True)
@@ -1,143 +1,353 @@
 import json
-from typing import Dict, Optional, Tuple
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-import streamlit as st
 from apis import initialize_dhan_and_krutrim
-from config import SEC_DICT
+from config import (LLM_MODEL, LLM_MAX_IN_FLIGHT, LLM_TIMEOUT_SECONDS, LLM_BATCH_SIZE, LLM_STREAMING,
+                    LLM_REASONING, PROMPT_LOOKBACK_BARS, PROMPT_INDICATORS, PROMPT_TOKEN_BUDGET, PROMPT_PRICE_DECIMALS)
 from services.data_service import get_data_from_db
+from services.decision_service import JSONStreamParser, validate_decision
+from services.execution_service import RETRYABLE_STATUSES, get_execution_gateway
+from services.indicator_service import get_indicators, get_indicator_snapshots, warmup_bars
+from services.resample_service import history_days
+from services.journal_service import get_journal_writer
+from services.signal_cache_service import prompt_fingerprint, get_cached_decisions, store_decisions
 
-def generate_trading_prompt(symbol: str) -> str:
-    df = get_data_from_db(symbol, days=30)
-    if df is None or df.empty:
-        return f"Insufficient data for {symbol}"
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token for English and numbers; close enough for budgeting without a tokenizer
+    return -(-len(text) // 4)
+
+def _format_bars(df: pd.DataFrame, timeframe: str, decimals: int) -> List[str]:
+    dates = df['datetime'].dt.strftime('%Y-%m-%d' if timeframe == '1d' else '%Y-%m-%d %H:%M')
+    prices = [df[col].to_numpy(dtype=float) for col in ('open', 'high', 'low', 'close')]
+    volume = df['volume'].to_numpy(dtype=float)
+    return [
+        ",".join([date] + [f"{p:.{decimals}f}" for p in bar] + [f"{v:.0f}"])
+        for date, *bar, v in zip(dates, *prices, volume)
+    ]
+
+# Response schema shared by single and batched prompts; "stock" is prepended per symbol
+DECISION_SCHEMA = (
+    '"action": "BUY|SELL|HOLD", "reasoning": "brief explanation", "entry_price": float, "stop_loss": float, '
+    '"take_profit": float, "order_type": "INTRADAY|DELIVERY", "risk_score": integer 1-10 (10 = highest risk), '
+    '"confidence": integer 1-10 (10 = highest confidence)'
+)
+
+def market_summary(symbol: str, df: Optional[pd.DataFrame] = None, timeframe: str = '1d',
+                   lookback: Optional[int] = None, indicators: Optional[List[str]] = None,
+                   token_budget: Optional[int] = None, snapshots: Optional[Dict[str, Dict]] = None) -> Optional[str]:
+    """
+    Encodes a symbol's market state: latest price and change, indicator values on the latest bar and
+    the last `lookback` bars as CSV. Oldest bars are dropped while the estimated size exceeds
+    `token_budget`. Returns None when there are fewer than two bars.
+    Callers summarizing many symbols pass their get_indicator_snapshots() result as `snapshots`.
+    """
+    lookback = lookback or PROMPT_LOOKBACK_BARS
+    specs = list(indicators or PROMPT_INDICATORS)
+    token_budget = token_budget or PROMPT_TOKEN_BUDGET
+    decimals = PROMPT_PRICE_DECIMALS
     
-    df['sma_20'] = df['close'].rolling(window=20).mean()
-    df['sma_50'] = df['close'].rolling(window=50).mean()
+    # Streaming snapshots track daily bars only
+    snapshot = None
+    if timeframe == '1d':
+        snapshot = (snapshots if snapshots is not None else get_indicator_snapshots([symbol])).get(symbol)
+    use_snapshot = bool(snapshot) and all(spec in snapshot for spec in specs)
+    # Callers that already batch-loaded the watchlist pass the symbol's frame in
+    if df is None:
+        # With a snapshot only the bars shown in the prompt are needed, otherwise enough to warm up the indicators
+        bars = lookback if use_snapshot else max(lookback, warmup_bars(specs))
+        df = get_data_from_db(symbol, days=history_days(bars, timeframe), timeframe=timeframe)
+    if df is None or len(df) < 2:
+        return None
+    
+    if use_snapshot and snapshot['as_of'] == df['datetime'].iloc[-1]:
+        values = {spec: snapshot[spec] for spec in specs}
+    else:
+        values = get_indicators(symbol, df, specs).iloc[-1].to_dict()
+    # Indicators without enough history yet are left out rather than sent as nan
+    values = {name: value for name, value in values.items() if value is not None and np.isfinite(value)}
     
     last_price = df['close'].iloc[-1]
     prev_price = df['close'].iloc[-2]
     price_change = (last_price - prev_price) / prev_price * 100
+    change_label = "Daily change" if timeframe == '1d' else f"Change over the last {timeframe} bar"
     
-    recent_data = df.tail(5).reset_index().to_dict('records')
-    
-    for record in recent_data:
-        for key, value in record.items():
-            if isinstance(value, pd.Timestamp):
-                record[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-    
-    data_str = json.dumps(recent_data)
-    
-    prompt = f"""Analyze the following stock: {symbol}
-    Current price: {last_price}
-    Daily change: {price_change:.2f}%
-    20-day SMA: {df['sma_20'].iloc[-1]:.2f}
-    50-day SMA: {df['sma_50'].iloc[-1]:.2f}
-    
-    Recent price data:
-    {data_str}
-    
-    Based on the above data, provide a trading decision in the following JSON format:
-    {{
-        "stock": "{symbol}",
-        "action": "BUY or SELL or HOLD",
-        "reasoning": "Brief explanation for your decision",
-        "entry_price": float,
-        "stop_loss": float,
-        "take_profit": float,
-        "order_type": "INTRADAY or DELIVERY",
-        "risk_score": integer (1-10, with 10 being highest risk),
-        "confidence": integer (1-10, with 10 being highest confidence)
-    }}
-    
-    Ensure your response contains only valid JSON.
+    head = [
+        f"Current price: {last_price:.{decimals}f}",
+        f"{change_label}: {price_change:.2f}%",
+        f"Indicators on {timeframe} bars: " + (", ".join(f"{name}={value:.{decimals}f}" for name, value in values.items()) or "n/a"),
+        f"Recent {timeframe} bars, oldest first:",
+        "datetime,open,high,low,close,volume",
+    ]
+    rows = _format_bars(df.tail(lookback), timeframe, decimals)
+    summary = "\n".join(head + rows)
+    while len(rows) > 1 and estimate_tokens(summary) > token_budget:
+        rows = rows[1:]
+        summary = "\n".join(head + rows)
+    if estimate_tokens(summary) > token_budget:
+        logger.warning("Prompt for %s is ~%d tokens, over the %d token budget", symbol, estimate_tokens(summary), token_budget)
+    return summary
+
+def _single_prompt(symbol: str, summary: Optional[str]) -> str:
+    if summary is None:
+        return f"Insufficient data for {symbol}"
+    return (f"Analyze the following stock: {symbol}\n{summary}\n\n"
+            "Based on the above data, respond strictly with this JSON and no additional text:\n"
+            f'{{"stock": "{symbol}", {DECISION_SCHEMA}}}')
+
+def _summary_budget(symbol: str, token_budget: Optional[int] = None) -> int:
+    # The budget covers the whole single-symbol prompt, so its fixed parts are reserved up front
+    return max((token_budget or PROMPT_TOKEN_BUDGET) - estimate_tokens(_single_prompt(symbol, "")), 1)
+
+def generate_trading_prompt(symbol: str, df: Optional[pd.DataFrame] = None, timeframe: str = '1d',
+                            lookback: Optional[int] = None, indicators: Optional[List[str]] = None,
+                            token_budget: Optional[int] = None) -> str:
+    summary = market_summary(symbol, df, timeframe, lookback, indicators, _summary_budget(symbol, token_budget))
+    return _single_prompt(symbol, summary)
+
+def generate_batch_prompt(summaries: Dict[str, str]) -> str:
+    """
+    Packs several symbols' market summaries into one prompt asking for a JSON array of decisions.
     """
+    sections = "\n\n".join(f"### {symbol}\n{summary}" for symbol, summary in summaries.items())
+    return (f"Analyze each of the following {len(summaries)} stocks independently.\n\n{sections}\n\n"
+            "Based on the above data, respond strictly with a JSON array holding one object per stock "
+            f"({', '.join(summaries)}) and no additional text. Each object:\n"
+            f'{{"stock": "<symbol>", {DECISION_SCHEMA}}}')
 
-    prompt += "\nRespond strictly with JSON format and no additional text."
-    return prompt
+def _complete(client, prompt: str, timeout: Optional[float] = None) -> str:
+    messages = [{"role": "user", "content": prompt}]
+    options = {'timeout': timeout} if timeout else {}
+    response = client.chat.completions.create(model=LLM_MODEL, messages=messages, **options)
+    return response.choices[0].message.content
 
-def get_trade_decision(symbol: str) -> Tuple[Optional[Dict], Optional[str]]:
-    _, client, missing_keys = initialize_dhan_and_krutrim()
-    if missing_keys:
-        return None, f"Missing API keys: {', '.join(missing_keys)}"
-    
-    prompt = generate_trading_prompt(symbol)
-    
-    try:
-        model_name = "DeepSeek-R1"
-        messages = [{"role": "user", "content": prompt}]
-        response = client.chat.completions.create(model=model_name, messages=messages)
-        
-        trade_data = response.choices[0].message.content
-        print(trade_data)
+def _stream_completion(client, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+    # The SDK's create(stream=True) still buffers the whole body, so the raw response is read as
+    # server-sent events instead. Closing this generator closes the HTTP connection.
+    messages = [{"role": "user", "content": prompt}]
+    options = {'timeout': timeout} if timeout else {}
+    with client.chat.completions.with_streaming_response.create(model=LLM_MODEL, messages=messages,
+                                                                  stream=True, **options) as response:
+        streamed = False
+        body = []
+        for line in response.iter_lines():
+            if not line.startswith('data:'):
+                body.append(line)
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            streamed = True
+            choices = json.loads(data).get('choices') or []
+            content = (choices[0].get('delta') or {}).get('content') if choices else None
+            if content:
+                yield content
+        if not streamed and body:
+            # Servers that ignore stream=True answer with a regular completion
+            yield json.loads("".join(body))['choices'][0]['message']['content']
+
+def _read_json(client, prompt: str, timeout: Optional[float], opening: str, accept):
+    parser = JSONStreamParser(opening, accept, reasoning=LLM_REASONING)
+    if not LLM_STREAMING or not hasattr(client.chat.completions, 'with_streaming_response'):
+        text = _complete(client, prompt, timeout)
+        logger.debug("LLM response: %s", text)
+        value = parser.feed(text)
+    else:
+        value = None
+        stream = _stream_completion(client, prompt, timeout)
         try:
-            start_idx = trade_data.find('{')
-            end_idx = trade_data.rfind('}') + 1
-            if start_idx >= 0 and end_idx > start_idx:
-                json_str = trade_data[start_idx:end_idx]
-                return json.loads(json_str), None
-            return None, "No valid JSON found in AI response"
-        except json.JSONDecodeError as e:
-            return None, f"Invalid JSON format: {e}"
+            for chunk in stream:
+                value = parser.feed(chunk)
+                if value is not None:
+                    break
+        finally:
+            stream.close()
+        logger.debug("LLM response: %s", parser.text)
+    if value is None:
+        value = parser.finish()
+    if value is None:
+        raise ValueError("No valid JSON found in AI response")
+    return value
+
+def _request_decision(client, prompt: str, timeout: Optional[float] = None,
+                      symbol: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    try:
+        trade = _read_json(client, prompt, timeout, '{', lambda value: isinstance(value, dict) and 'action' in value)
+    except ValueError as e:
+        return None, str(e)
     except Exception as e:
         return None, f"Error getting trade decision: {e}"
+    trade, error = validate_decision(trade, symbol)
+    return trade, error and f"Invalid trade decision: {error}"
 
-# def execute_trade(trade: Dict) -> Tuple[bool, str]:
-#     dhan, _, missing_keys = initialize_dhan_and_krutrim()
-#     if missing_keys:
-#         return False, f"Missing API keys: {', '.join(missing_keys)}"
+def _request_batch(client, summaries: Dict[str, str], timeout: Optional[float] = None) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Requests decisions for several symbols in one completion; symbols without a valid element in the
+    returned array get an error entry.
+    """
+    try:
+        reply = _read_json(client, generate_batch_prompt(summaries), timeout, '[', lambda value: isinstance(value, list))
+    except Exception as e:
+        return {symbol: (None, f"Error getting batched trade decisions: {e}") for symbol in summaries}
     
-#     try:
-#         stock = trade['stock']
-#         action = trade['action'].upper()
-        
-#         if action == "HOLD":
-#             return True, "No trade executed as decision was to HOLD"
-        
-#         if stock not in SEC_DICT:
-#             return False, f"Security ID not found for {stock}"
+    results = {}
+    for element in reply:
+        trade, error = validate_decision(element)
+        if trade is None:
+            logger.debug("Discarding batched decision %s: %s", element, error)
+        elif trade['stock'] in summaries and trade['stock'] not in results:
+            results[trade['stock']] = (trade, None)
+    for symbol in summaries:
+        results.setdefault(symbol, (None, "Missing from batched response"))
+    return results
+
+def _journal_decisions(decisions: Dict[str, Dict]) -> None:
+    # Decisions are journaled once and cached with their signal_id, so a cache hit returns the signal
+    # already in the journal. Entries cached without one are journaled now and stored again.
+    writer = get_journal_writer()
+    new = {}
+    for key, trade in decisions.items():
+        if not trade.get('signal_id'):
+            writer.record_signal(trade)
+            new[key] = trade
+    store_decisions(new)
+
+def get_trade_decision(symbol: str, df: Optional[pd.DataFrame] = None, client=None,
+                       timeframe: str = '1d') -> Tuple[Optional[Dict], Optional[str]]:
+    if client is None:
+        _, client, missing_keys = initialize_dhan_and_krutrim()
+        if missing_keys:
+            return None, f"Missing API keys: {', '.join(missing_keys)}"
+    
+    prompt = generate_trading_prompt(symbol, df, timeframe)
+    key = prompt_fingerprint(prompt)
+    trade = get_cached_decisions([key]).get(key)
+    error = None
+    if trade is None:
+        trade, error = _request_decision(client, prompt, LLM_TIMEOUT_SECONDS, symbol)
+    
+    if trade:
+        _journal_decisions({key: trade})
+    return trade, error
+
+def _gather(pool: ThreadPoolExecutor, tasks: Dict, max_in_flight: int, timeout: float) -> Dict:
+    # Returns each task's result, or None for tasks still running at the deadline. Queued tasks wait
+    # for a free slot, so the overall deadline allows for every wave.
+    futures = {pool.submit(task): key for key, task in tasks.items()}
+    waves = -(-len(futures) // max_in_flight)
+    done, not_done = wait(futures, timeout=timeout * waves + 1)
+    results = {futures[future]: future.result() for future in done}
+    for future in not_done:
+        future.cancel()
+        results[futures[future]] = None
+    return results
+
+def get_trade_decisions(symbols: List[str], frames: Optional[Dict[str, pd.DataFrame]] = None, client=None,
+                        max_in_flight: Optional[int] = None, timeout: Optional[float] = None,
+                        cancel_event: Optional[threading.Event] = None,
+                        batch_size: Optional[int] = None) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Requests trade decisions for many symbols concurrently with at most `max_in_flight` open LLM calls.
+
+    Prompts are built up front on the calling thread and symbols whose prompt has a cached decision
+    are answered from the signal cache; only the remaining LLM requests fan out. With `batch_size` > 1
+    up to that many symbols share one request, and symbols missing from a batched reply are retried
+    individually. Each request is bounded by `timeout` seconds, and setting `cancel_event` stops
+    requests that have not started yet.
+    Returns a (trade, error) pair per symbol, in the same shape as get_trade_decision.
+    Every decision returned carries the 'signal_id' of its trade journal entry; cache hits return
+    the signal journaled when the decision was first made.
+    """
+    if client is None:
+        _, client, missing_keys = initialize_dhan_and_krutrim()
+        if missing_keys:
+            error = f"Missing API keys: {', '.join(missing_keys)}"
+            return {symbol: (None, error) for symbol in symbols}
+    
+    frames = frames or {}
+    max_in_flight = max_in_flight or LLM_MAX_IN_FLIGHT
+    timeout = timeout or LLM_TIMEOUT_SECONDS
+    batch_size = batch_size or LLM_BATCH_SIZE
+    cancel_event = cancel_event or threading.Event()
+    # One snapshot read for the whole watchlist rather than one per symbol
+    snapshots = get_indicator_snapshots(symbols)
+    summaries = {symbol: market_summary(symbol, frames.get(symbol), token_budget=_summary_budget(symbol),
+                                        snapshots=snapshots)
+                 for symbol in symbols}
+    # Cache keys are the single-symbol prompts, so batched and unbatched runs share cached decisions
+    prompts = {symbol: _single_prompt(symbol, summary) for symbol, summary in summaries.items()}
+    keys = {symbol: prompt_fingerprint(prompt) for symbol, prompt in prompts.items()}
+    cached = get_cached_decisions(keys.values())
+    
+    def run(symbol: str) -> Tuple[Optional[Dict], Optional[str]]:
+        if cancel_event.is_set():
+            return None, "Cancelled"
+        return _request_decision(client, prompts[symbol], timeout, symbol)
+    
+    def run_batch(batch: List[str]) -> Dict[str, Tuple[Optional[Dict], Optional[str]]]:
+        if cancel_event.is_set():
+            return {symbol: (None, "Cancelled") for symbol in batch}
+        return _request_batch(client, {symbol: summaries[symbol] for symbol in batch}, timeout)
+    
+    results = {symbol: (cached[keys[symbol]], None) for symbol in symbols if keys[symbol] in cached}
+    pending = [symbol for symbol in symbols if symbol not in results]
+    if pending:
+        timed_out = (None, f"Timed out after {timeout:.0f}s")
+        pool = ThreadPoolExecutor(max_workers=min(max_in_flight, len(pending)))
+        singles = pending
+        # Symbols without data keep their own "insufficient data" prompt
+        batchable = [symbol for symbol in pending if summaries[symbol] is not None]
+        if batch_size > 1 and len(batchable) > 1:
+            singles = [symbol for symbol in pending if summaries[symbol] is None]
+            batches = [tuple(batchable[i:i + batch_size]) for i in range(0, len(batchable), batch_size)]
+            tasks = {batch: partial(run_batch, list(batch)) for batch in batches}
+            for batch, outcome in _gather(pool, tasks, max_in_flight, timeout).items():
+                for symbol in batch:
+                    if outcome is None:
+                        results[symbol] = timed_out
+                    elif outcome[symbol][0] or outcome[symbol][1] == "Cancelled":
+                        results[symbol] = outcome[symbol]
+                    else:
+                        singles.append(symbol)
         
-#         response = dhan.place_order(
-#             security_id=SEC_DICT[stock],
-#             exchange_segment=dhan.NSE,
-#             transaction_type=dhan.BUY if action=='BUY' else dhan.SELL,
-#             quantity=1,
-#             order_type=dhan.MARKET,
-#             product_type=dhan.INTRA if trade.get('order_type', 'INTRADAY').upper() == 'INTRADAY' else dhan.CNC,
-#             price=0
-#         )
-#         return True, f"Order placed: {json.dumps(response)}"
-#     except Exception as e:
-#         return False, f"Error executing trade: {e}"
-
-def execute_trade(trade: Dict) -> Tuple[bool, str]:
+        if singles:
+            tasks = {symbol: partial(run, symbol) for symbol in singles}
+            for symbol, outcome in _gather(pool, tasks, max_in_flight, timeout).items():
+                results[symbol] = outcome if outcome is not None else timed_out
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    _journal_decisions({keys[symbol]: results[symbol][0] for symbol in symbols if results[symbol][0]})
+    return {symbol: results[symbol] for symbol in symbols}
+
+def execute_trades(trades: List[Dict]) -> List[Tuple[bool, str]]:
     """
-    Simulates trade execution for UI feedback without placing a real order.
+    Sends approved trades to the execution gateway as one concurrent batch (the paper broker unless
+    EXECUTION_BROKER is "dhan"). Returns a (success, message) pair per trade; resubmitting a signal
+    whose order was already sent fails as a duplicate.
     """
     try:
-        stock = trade['stock']
-        action = trade['action'].upper()
-
-        if action == "HOLD":
-            return True, "No trade executed as decision was to HOLD"
-        simulated_response = {
-            "status": "success",
-            "message": f"Simulated {action} trade for {stock} logged.",
-            "trade_details": {
-                "stock": stock,
-                "action": action,
-                "entry_price": trade.get("entry_price", 0),
-                "stop_loss": trade.get("stop_loss", 0),
-                "take_profit": trade.get("take_profit", 0),
-                "order_type": trade.get("order_type", "INTRADAY"),
-                "risk_score": trade.get("risk_score", 1),
-                "confidence": trade.get("confidence", 1),
-                "reasoning": trade.get("reasoning", "No reasoning provided"),
-                "timestamp": pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-        }
-
-        st.session_state.trade_history.append(simulated_response["trade_details"])
-        return True, json.dumps(simulated_response, indent=2)
-
+        orders = get_execution_gateway().submit(trades)
     except Exception as e:
-        return False, f"Error simulating trade execution: {e}"
+        return [(False, f"Error executing trade: {e}") for _ in trades]
+    return [(order['status'] not in RETRYABLE_STATUSES and not order.get('duplicate'), json.dumps(order, indent=2))
+            for order in orders]
+
+def execute_trade(trade: Dict, quantity: Optional[int] = None) -> Tuple[bool, str]:
+    """
+    Validates and executes a single decision. The quantity defaults to the one sized by the risk
+    checks, or a single share.
+    """
+    _, error = validate_decision(trade)
+    if error:
+        return False, f"Invalid trade: {error}"
+    if trade['action'].upper() == "HOLD":
+        return True, "No trade executed as decision was to HOLD"
+    if quantity:
+        trade['quantity'] = quantity
+    return execute_trades([trade])[0]
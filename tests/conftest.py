@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Services read their settings and open the database on import, so point them at a scratch
+# SQLite file before any test module imports them
+_db_dir = tempfile.mkdtemp(prefix="trading-bot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["OHLCV_BACKEND"] = "sql"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
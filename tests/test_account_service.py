@@ -0,0 +1,70 @@
+import pytest
+from services import account_service
+from services.account_service import AccountSnapshots
+
+class FakeDhan:
+    """
+    Answers the dhanhq account calls like the API; calls listed in `failing` return an error response.
+    """
+    def __init__(self):
+        self.failing = set()
+        self.calls = 0
+    
+    def _respond(self, name, data):
+        self.calls += 1
+        if name in self.failing:
+            return {'status': 'failure', 'remarks': {'error_message': 'session expired'}, 'data': ''}
+        return {'status': 'success', 'remarks': '', 'data': data}
+    
+    def get_fund_limits(self):
+        return self._respond('funds', {'availabelBalance': 50000.0, 'utilizedAmount': 1000.0,
+                                       'withdrawableBalance': 40000.0})
+    
+    def get_positions(self):
+        return self._respond('positions', [{'tradingSymbol': 'tcs', 'netQty': -2, 'ltp': 100.0}])
+    
+    def get_holdings(self):
+        return self._respond('holdings', [
+            {'tradingSymbol': 'TCS', 'totalQty': 3, 'avgCostPrice': 90.0, 'ltp': 100.0},
+            # No last price: valued at cost
+            {'tradingSymbol': 'INFY', 'totalQty': 10, 'avgCostPrice': 50.0},
+        ])
+
+@pytest.fixture
+def dhan(monkeypatch):
+    fake = FakeDhan()
+    monkeypatch.setattr(account_service, 'initialize_dhan_and_krutrim', lambda: (fake, None, []))
+    return fake
+
+def test_snapshot_carries_account_aggregates(dhan):
+    snapshot = AccountSnapshots(ttl_seconds=60).get()
+    
+    assert snapshot['stale'] is False and snapshot['error'] is None
+    assert snapshot['aggregates'] == {
+        'available_funds': 50000.0,
+        'used_margin': 1000.0,
+        'net_balance': 40000.0,
+        'total_investment': 770.0,
+        'current_value': 800.0,
+        'profit_loss': 30.0,
+        # Short positions count by absolute value, added to holdings of the same symbol
+        'exposure': {'TCS': 500.0, 'INFY': 500.0},
+    }
+
+def test_failed_refresh_serves_previous_snapshot_as_stale(dhan):
+    snapshots = AccountSnapshots(ttl_seconds=60)
+    fresh = snapshots.get()
+    dhan.failing.add('holdings')
+    stale = snapshots.refresh()
+    
+    assert stale['stale'] is True
+    assert stale['error'] == "holdings: session expired"
+    assert stale['aggregates'] == fresh['aggregates'] and stale['fetched_at'] == fresh['fetched_at']
+    # Served from the cache until the TTL runs out
+    calls = dhan.calls
+    assert snapshots.get() is stale and dhan.calls == calls
+
+def test_failed_first_refresh_has_no_snapshot(dhan):
+    dhan.failing.add('funds')
+    
+    assert AccountSnapshots(ttl_seconds=60).get() is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.backtest_service import SIGNAL_COLUMNS, simulate, summarize
+
+DATES = pd.date_range('2024-01-01', periods=6, freq='D')
+
+def _panel():
+    # (open, high, low, close) per day
+    bars = {
+        'A': [(100, 101, 99, 100), (100, 106, 94, 102), (102, 103, 101, 102.5),
+              (103, 104, 102, 103), (104, 105, 103, 104), (105, 106, 104, 106)],
+        'B': [(100, 101, 99, 100), (100, 101, 99, 100), (90, 92, 88, 91),
+              (91, 92, 90, 91), (91, 92, 90, 91), (91, 92, 90, 91)],
+    }
+    panel = {'dates': DATES, 'symbols': list(bars)}
+    for k, col in enumerate(['open', 'high', 'low', 'close']):
+        panel[col] = np.array([[bars[symbol][i][k] for symbol in bars] for i in range(len(DATES))], dtype=float)
+    panel['volume'] = np.ones((len(DATES), 2))
+    return panel
+
+def _signal(symbol, day, stop, target, action='BUY', order_type='DELIVERY'):
+    return {'symbol': symbol, 'timestamp': DATES[day], 'action': action, 'entry_price': 100.0, 'stop_loss': stop,
+            'take_profit': target, 'order_type': order_type, 'confidence': 8, 'risk_score': 3}
+
+def _simulate(*signals):
+    return simulate(_panel(), pd.DataFrame(list(signals), columns=SIGNAL_COLUMNS), slippage_bps=0, fee_bps=0,
+                    max_holding_bars=3, capital_per_trade=1000)
+
+def test_stop_wins_when_stop_and_target_touch_in_one_bar():
+    trade = _simulate(_signal('A', 0, stop=95, target=105)).iloc[0]
+    
+    assert trade['entry_time'] == DATES[1] and trade['exit_time'] == DATES[1]
+    assert (trade['entry'], trade['exit'], trade['exit_reason']) == (100, 95, 'stop')
+    assert trade['pnl'] == pytest.approx(-50)
+
+def test_gap_through_stop_fills_at_open():
+    trade = _simulate(_signal('B', 0, stop=97, target=120)).iloc[0]
+    
+    assert trade['exit_time'] == DATES[2]
+    assert (trade['exit'], trade['exit_reason']) == (90, 'stop')
+
+def test_intraday_exits_within_entry_bar():
+    trade = _simulate(_signal('A', 1, stop=90, target=110, order_type='INTRADAY')).iloc[0]
+    
+    assert trade['entry_time'] == trade['exit_time'] == DATES[2]
+    assert (trade['entry'], trade['exit'], trade['exit_reason']) == (102, 102.5, 'time')
+
+def test_time_exit_after_max_holding_bars():
+    trade = _simulate(_signal('A', 2, stop=50, target=200)).iloc[0]
+    
+    assert trade['entry_time'] == DATES[3] and trade['exit_time'] == DATES[5]
+    assert (trade['exit'], trade['exit_reason']) == (106, 'time')
+
+def test_short_target_and_signal_after_last_bar_is_dropped():
+    trades = _simulate(_signal('B', 0, stop=105, target=95, action='SELL'), _signal('A', 5, stop=50, target=200))
+    
+    assert len(trades) == 1
+    # The gap opens below the target, so the short covers at the better open
+    assert (trades.iloc[0]['exit'], trades.iloc[0]['exit_reason']) == (90, 'target')
+    assert trades.iloc[0]['return'] == pytest.approx(0.1)
+
+def test_summarize_drawdown():
+    pnl = [-100, 300, -200, -50, 50]
+    trades = pd.DataFrame({'exit_time': DATES[[0, 1, 2, 2, 3]], 'pnl': pnl, 'return': np.array(pnl) / 1000})
+    summary = summarize(trades, 1000)
+    
+    # Equity 900, 1200, 950, 1000 against a peak of at least the initial 1000
+    assert summary['trades'] == 5 and summary['total_pnl'] == 0
+    assert summary['hit_rate'] == pytest.approx(0.4)
+    assert summary['max_drawdown'] == 250
+    assert summary['max_drawdown_pct'] == pytest.approx(250 / 1200)
@@ -0,0 +1,89 @@
+import json
+import pytest
+from services.decision_service import JSONStreamParser, validate_decision, format_price
+
+DECISION = {
+    "stock": "TCS", "action": "BUY", "reasoning": "breakout", "entry_price": 100, "stop_loss": 95,
+    "take_profit": 110, "order_type": "DELIVERY", "risk_score": 4, "confidence": 8
+}
+
+def is_decision(value):
+    return isinstance(value, dict) and "action" in value
+
+def stream(parser, text, size):
+    # Feeds `text` in `size` character chunks; returns the value and how many chunks were read
+    for i in range(0, len(text), size):
+        value = parser.feed(text[i:i + size])
+        if value is not None:
+            return value, i // size + 1
+    return parser.finish(), None
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_parser_skips_think_block_and_stops_at_answer(size):
+    answer = json.dumps(DECISION)
+    text = '<think>maybe {"action": "SELL"}</think>\n' + answer + "\nanything after"
+    value, chunks = stream(JSONStreamParser("{", is_decision), text, size)
+    
+    assert value == DECISION
+    if size == 1:
+        assert chunks == text.index(answer) + len(answer)
+
+@pytest.mark.parametrize("reasoning", [False, True])
+def test_parser_discards_draft_before_orphan_closing_tag(reasoning):
+    parser = JSONStreamParser("{", is_decision, reasoning=reasoning)
+    
+    assert parser.feed('draft {"action":"SELL"} </think>' + json.dumps(DECISION)) == DECISION
+
+@pytest.mark.parametrize("size", [1, 5])
+def test_reasoning_parser_holds_draft_until_reasoning_closes(size):
+    text = 'draft {"action":"SELL"} </think>' + json.dumps(DECISION)
+    value, _ = stream(JSONStreamParser("{", is_decision, reasoning=True), text, size)
+    
+    assert value == DECISION
+
+def test_reasoning_parser_returns_held_answer_without_reasoning():
+    value, chunks = stream(JSONStreamParser("{", is_decision, reasoning=True), json.dumps(DECISION), 4)
+    
+    assert value == DECISION
+    assert chunks is None
+
+def test_parser_skips_invalid_and_rejected_candidates():
+    parser = JSONStreamParser("{", is_decision)
+    
+    assert parser.feed('{not json} {"other": 1} {"action": "}"}') == {"action": "}"}
+
+def test_parser_finds_arrays():
+    parser = JSONStreamParser("[", lambda value: isinstance(value, list) and all(isinstance(v, dict) for v in value))
+    
+    assert parser.feed('<think>[{"draft": 1}]</think> See [1] [{"stock": "TCS"}]') == [{"stock": "TCS"}]
+
+def test_validate_normalizes_decision():
+    trade, error = validate_decision(dict(DECISION, action="buy", order_type="delivery", entry_price="100", confidence=8.0), "TCS")
+    
+    assert error is None
+    assert trade["action"] == "BUY" and trade["order_type"] == "DELIVERY"
+    assert trade["entry_price"] == 100.0 and trade["confidence"] == 8
+
+def test_validate_allows_hold_without_prices():
+    trade, error = validate_decision(dict(DECISION, action="HOLD", entry_price=None, stop_loss=None, take_profit=None))
+    
+    assert error is None
+    assert trade["entry_price"] is None
+    assert format_price(trade["entry_price"]) == "n/a"
+    assert format_price(101.5) == "₹101.50"
+
+@pytest.mark.parametrize("changes, message", [
+    ({"stop_loss": 120}, "BUY requires stop_loss < entry_price < take_profit"),
+    ({"action": "SELL"}, "SELL requires take_profit < entry_price < stop_loss"),
+    ({"entry_price": None}, "Invalid entry_price for BUY"),
+    ({"action": "WAIT"}, "Invalid action 'WAIT'"),
+    ({"order_type": "SWING"}, "Invalid order_type 'SWING'"),
+    ({"confidence": 11}, "confidence must be an integer from 1 to 10"),
+    ({"risk_score": 2.5}, "risk_score must be an integer from 1 to 10"),
+    ({"stock": "INFY"}, "Decision is for INFY, expected TCS"),
+])
+def test_validate_rejects_invalid_decisions(changes, message):
+    trade, error = validate_decision(dict(DECISION, **changes), "TCS")
+    
+    assert trade is None
+    assert error == message
@@ -0,0 +1,56 @@
+from datetime import datetime
+import pandas as pd
+from services.download_service import download_symbols
+
+def _bars(days: int = 3) -> pd.DataFrame:
+    index = pd.date_range("2024-01-01", periods=days, freq="D", name="Date")
+    return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 100.0}, index=index)
+
+class StubProvider:
+    """
+    Returns `responses[symbol]` in turn; exceptions in the list are raised instead.
+    """
+    def __init__(self, responses):
+        self.responses = {symbol: list(items) for symbol, items in responses.items()}
+        self.calls = []
+    
+    def __call__(self, symbol, **kwargs):
+        self.calls.append((symbol, kwargs))
+        response = self.responses[symbol].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def _download(provider, symbols, **kwargs):
+    return download_symbols(symbols, provider=provider, rate_limit=0, backoff=0, **kwargs)
+
+def test_retries_failed_download():
+    provider = StubProvider({"TCS": [RuntimeError("rate limited"), _bars()]})
+    frames, status = _download(provider, ["TCS"], max_retries=2, period="5d")
+    
+    assert status["TCS"] == (True, "TCS downloaded")
+    assert list(frames["TCS"].columns[:6]) == ["datetime", "open", "high", "low", "close", "volume"]
+    assert len(frames["TCS"]) == 3
+    assert len(provider.calls) == 2
+
+def test_reports_error_after_last_retry():
+    provider = StubProvider({"TCS": [RuntimeError("down")] * 3, "INFY": [_bars()]})
+    frames, status = _download(provider, ["TCS", "INFY"], max_retries=2, period="5d")
+    
+    assert status["TCS"] == (False, "Error processing TCS: down")
+    assert "TCS" not in frames
+    assert status["INFY"][0] and "INFY" in frames
+    assert len([call for call in provider.calls if call[0] == "TCS"]) == 3
+
+def test_empty_incremental_download_is_up_to_date():
+    start = datetime(2024, 1, 5)
+    provider = StubProvider({"TCS": [pd.DataFrame()], "INFY": [pd.DataFrame()]})
+    frames, status = _download(provider, ["TCS", "INFY"], max_retries=0, period="100d", starts={"TCS": start})
+    
+    assert frames == {}
+    assert status["TCS"] == (True, "TCS is up to date")
+    assert status["INFY"] == (False, "No data found for INFY")
+    # Symbols with a start replace the period with it
+    kwargs = dict(provider.calls)
+    assert kwargs["TCS"] == {"start": start}
+    assert kwargs["INFY"] == {"period": "100d"}
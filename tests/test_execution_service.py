@@ -0,0 +1,66 @@
+import uuid
+from services.execution_service import ExecutionGateway, PaperBroker, client_order_id
+from services.journal_service import get_execution_statuses, get_executions
+
+class CountingBroker(PaperBroker):
+    def __init__(self, **kwargs):
+        super().__init__(latency_ms=0, fill_seconds=0, seed=1, **kwargs)
+        self.placed = []
+    
+    def place(self, order):
+        self.placed.append(order['client_order_id'])
+        return super().place(order)
+
+def _trade(**changes):
+    trade = {'signal_id': uuid.uuid4().hex, 'stock': 'TCS', 'action': 'BUY', 'order_type': 'DELIVERY',
+             'entry_price': 100.0, 'quantity': 5}
+    trade.update(changes)
+    return trade
+
+def _gateway(broker):
+    return ExecutionGateway(broker, max_in_flight=4, requests_per_second=0, poll_seconds=0.05)
+
+def test_same_signal_is_sent_once():
+    broker = CountingBroker()
+    gateway = _gateway(broker)
+    trade = _trade()
+    first, again = gateway.submit([trade, dict(trade)])
+    later, = gateway.submit([dict(trade)])
+    # A new process only knows the journal
+    restarted, = _gateway(broker).submit([dict(trade)])
+    
+    assert broker.placed == [client_order_id(trade)]
+    assert 'duplicate' not in first
+    assert again['duplicate'] and later['duplicate'] and restarted['duplicate']
+
+def test_rejected_order_can_be_sent_again():
+    broker = CountingBroker(reject_rate=1.0)
+    trade = _trade()
+    rejected, = _gateway(broker).submit([trade])
+    broker.reject_rate = 0.0
+    retried, = _gateway(broker).submit([dict(trade)])
+    
+    assert rejected['status'] == 'REJECTED'
+    assert retried['status'] in ('TRANSIT', 'TRADED') and 'duplicate' not in retried
+    assert broker.placed == [client_order_id(trade)] * 2
+
+def test_trade_without_order_id_is_rejected_unsent():
+    broker = CountingBroker()
+    order, = _gateway(broker).submit([_trade(signal_id=None, stock='KEYLESS')])
+    
+    assert order['status'] == 'REJECTED' and order['client_order_id'] is None
+    assert "no signal_id or timestamp" in order['message']
+    assert broker.placed == []
+    assert [row['status'] for row in get_executions(symbol='KEYLESS')] == ['REJECTED']
+
+def test_drain_returns_once_fills_are_journaled():
+    gateway = _gateway(CountingBroker())
+    trades = [_trade(stock='INFY', quantity=3), _trade(stock='SBIN', quantity=7)]
+    gateway.submit(trades)
+    
+    assert gateway.drain(timeout=5)
+    ids = [client_order_id(trade) for trade in trades]
+    assert get_execution_statuses(ids) == {key: 'TRADED' for key in ids}
+    fills = {row['symbol']: row['filled_quantity'] for row in get_executions(limit=100)
+             if row['client_order_id'] in ids}
+    assert fills == {'INFY': 3, 'SBIN': 7}
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.indicator_service import (StreamingIndicators, compute_indicators, get_indicator_snapshots,
+                                        update_indicator_snapshots)
+from services.storage_service import get_ohlcv_store
+
+def _frame(seed: int, days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, days).cumsum()
+    spread = rng.uniform(0.5, 2.0, days)
+    return pd.DataFrame({'datetime': pd.date_range('2024-01-01', periods=days, freq='D'), 'open': close,
+                         'high': close + spread, 'low': close - spread, 'close': close,
+                         'volume': rng.uniform(1000, 2000, days)})
+
+def _wilder(series: pd.Series, window: int) -> pd.Series:
+    return series.ewm(alpha=1.0 / window, adjust=False, min_periods=window).mean()
+
+def _pandas_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    close = df['close']
+    delta = close.diff()
+    gain, loss = _wilder(delta.clip(lower=0), 14), _wilder(-delta.clip(upper=0), 14)
+    true_range = pd.concat([df['high'] - df['low'], (df['high'] - close.shift()).abs(),
+                            (df['low'] - close.shift()).abs()], axis=1).max(axis=1)
+    std = close.rolling(20).std()
+    return pd.DataFrame({
+        'sma_20': close.rolling(20).mean(),
+        'ema_10': close.ewm(span=10, adjust=False, min_periods=10).mean(),
+        'rsi_14': 100 - 100 / (1 + gain / loss),
+        'atr_14': _wilder(true_range, 14),
+        'bb_mid_20': close.rolling(20).mean(),
+        'bb_upper_20': close.rolling(20).mean() + 2 * std,
+        'bb_lower_20': close.rolling(20).mean() - 2 * std,
+    })
+
+def test_batch_indicators_match_pandas():
+    # Histories of different lengths share one right-aligned panel
+    frames = {'LONG': _frame(1, 120), 'SHORT': _frame(2, 45)}
+    result = compute_indicators(frames, ['sma_20', 'ema_10', 'rsi_14', 'atr_14', 'bollinger_20'])
+    
+    for symbol, df in frames.items():
+        expected = _pandas_indicators(df)
+        assert list(result[symbol].index) == list(df.index)
+        for column in expected:
+            np.testing.assert_allclose(result[symbol][column], expected[column], rtol=0, atol=1e-9,
+                                       err_msg=f"{symbol} {column}")
+
+def test_macd_matches_pandas():
+    df = _frame(3, 100)
+    result = compute_indicators({'TCS': df}, ['macd'])['TCS']
+    close = df['close']
+    line = (close.ewm(span=12, adjust=False, min_periods=12).mean()
+            - close.ewm(span=26, adjust=False, min_periods=26).mean())
+    signal = line.ewm(span=9, adjust=False, min_periods=9).mean()
+    
+    np.testing.assert_allclose(result['macd'], line, atol=1e-9)
+    np.testing.assert_allclose(result['macd_signal'], signal, atol=1e-9)
+    np.testing.assert_allclose(result['macd_hist'], line - signal, atol=1e-9)
+
+def test_rsi_of_flat_prices_is_neutral():
+    df = _frame(4, 30).assign(close=100.0, high=101.0, low=99.0)
+    
+    assert compute_indicators({'FLAT': df}, ['rsi_14'])['FLAT']['rsi_14'].iloc[-1] == pytest.approx(50.0)
+
+STREAMING = ['sma_20', 'ema_10', 'rsi_14', 'atr_14']
+
+def _last_row(df: pd.DataFrame) -> dict:
+    return compute_indicators({'X': df}, STREAMING)['X'].iloc[-1].to_dict()
+
+def test_streaming_matches_last_batch_row():
+    df = _frame(5, 80)
+    bars = df.to_dict('records')
+    state = StreamingIndicators(STREAMING)
+    for bar in bars[:50]:
+        state.update(bar)
+    # Restored state continues where the serialized one stopped
+    restored = StreamingIndicators(STREAMING, state.to_state())
+    for bar in bars[50:]:
+        restored.update(bar)
+    
+    assert restored.values() == pytest.approx(_last_row(df), abs=1e-9)
+
+def test_snapshot_revisions_of_latest_bar_are_not_double_counted():
+    store = get_ohlcv_store()
+    df = _frame(6, 60)
+    store.write('SNAP', df)
+    update_indicator_snapshots(['SNAP'], STREAMING)
+    for close in (df['close'].iloc[-1] + 3, df['close'].iloc[-1] - 2):
+        # The current bar is refreshed twice under the same timestamp
+        df.loc[df.index[-1], ['open', 'high', 'low', 'close']] = [close, close + 1, close - 1, close]
+        store.write('SNAP', df.tail(1))
+        update_indicator_snapshots(['SNAP'], STREAMING)
+    snapshot = get_indicator_snapshots(['SNAP'])['SNAP']
+    
+    assert snapshot['close'] == df['close'].iloc[-1]
+    assert {spec: snapshot[spec] for spec in STREAMING} == pytest.approx(_last_row(df), abs=1e-9)
+    
+    df = pd.concat([df, _frame(7, 61).tail(1)], ignore_index=True)
+    store.write('SNAP', df.tail(1))
+    update_indicator_snapshots(['SNAP'], STREAMING)
+    snapshot = get_indicator_snapshots(['SNAP'])['SNAP']
+    
+    assert snapshot['as_of'] == df['datetime'].iloc[-1]
+    assert {spec: snapshot[spec] for spec in STREAMING} == pytest.approx(_last_row(df), abs=1e-9)
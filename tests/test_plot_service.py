@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.plot_service import build_figure, lttb
+
+@pytest.mark.parametrize('threshold', [3, 10, 99])
+def test_lttb_keeps_endpoints_and_threshold_points(threshold):
+    x = np.arange(1000.0)
+    y = np.sin(x / 50)
+    keep = lttb(x, y, threshold)
+    
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(1000)
+    y[[123, 700]] = [50.0, -50.0]
+    
+    assert {123, 700} <= set(lttb(np.arange(1000.0), y, 20))
+
+def test_lttb_returns_short_lines_whole():
+    assert list(lttb(np.arange(5.0), np.arange(5.0), 10)) == [0, 1, 2, 3, 4]
+
+def test_downsampled_candles_keep_global_high_and_low():
+    rng = np.random.default_rng(0)
+    close = 100 + rng.normal(0, 1, 2000).cumsum()
+    df = pd.DataFrame({'datetime': pd.date_range('2024-01-01', periods=2000, freq='5min'), 'open': close,
+                       'high': close + rng.uniform(0, 2, 2000), 'low': close - rng.uniform(0, 2, 2000),
+                       'close': close, 'volume': rng.uniform(100, 200, 2000)})
+    figure = build_figure('PLOT', df, '5m', max_points=100)
+    candles, sma_20, sma_50, volume = figure.data
+    
+    assert len(candles.x) == 100
+    assert max(candles.high) == df['high'].max() and min(candles.low) == df['low'].min()
+    assert sum(volume.y) == pytest.approx(df['volume'].sum())
+    assert len(sma_20.x) == len(sma_50.x) == 100
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from services import data_service
+from services.resample_service import bucket_starts, resample_ohlcv, downsample_ohlcv, source_timeframe, history_days
+from services.storage_service import ParquetOHLCVStore, get_ohlcv_store
+
+def _bars(times, opens, highs, lows, closes, volumes):
+    return pd.DataFrame({'datetime': pd.to_datetime(times), 'open': opens, 'high': highs, 'low': lows,
+                         'close': closes, 'volume': volumes})
+
+def test_hour_buckets_start_at_session_open():
+    times = pd.to_datetime(['2024-01-02 09:15', '2024-01-02 10:14', '2024-01-02 10:15', '2024-01-02 15:29'])
+    
+    assert list(bucket_starts(times, '1h')) == list(pd.to_datetime(
+        ['2024-01-02 09:15', '2024-01-02 09:15', '2024-01-02 10:15', '2024-01-02 15:15']))
+    assert list(bucket_starts(times, '15m')) == list(pd.to_datetime(
+        ['2024-01-02 09:15', '2024-01-02 10:00', '2024-01-02 10:15', '2024-01-02 15:15']))
+    assert set(bucket_starts(times, '1d')) == {np.datetime64('2024-01-02')}
+
+def test_resample_takes_first_max_min_last_sum():
+    bars = _bars(['2024-01-02 09:15', '2024-01-02 09:20', '2024-01-02 10:10', '2024-01-02 10:15', '2024-01-03 09:15'],
+                 [10, 11, 12, 13, 20], [11, 15, 13, 14, 21], [9, 10, 8, 12, 19], [11, 12, 12.5, 13.5, 20.5],
+                 [100, 200, 300, 400, 500])
+    hourly = resample_ohlcv(bars, '1h')
+    
+    assert list(hourly['datetime']) == list(pd.to_datetime(['2024-01-02 09:15', '2024-01-02 10:15', '2024-01-03 09:15']))
+    assert hourly[['open', 'high', 'low', 'close', 'volume']].values.tolist() == [
+        [10, 15, 8, 12.5, 600], [13, 14, 12, 13.5, 400], [20, 21, 19, 20.5, 500]]
+    daily = resample_ohlcv(bars, '1d')
+    assert daily[['open', 'high', 'low', 'close', 'volume']].values.tolist() == [
+        [10, 15, 8, 13.5, 1000], [20, 21, 19, 20.5, 500]]
+
+def test_downsample_merges_runs_and_keeps_extremes():
+    bars = _bars(pd.date_range('2024-01-01', periods=10), np.arange(10.0), np.arange(10.0) + 1,
+                 np.arange(10.0) - 1, np.arange(10.0), np.ones(10))
+    bars.loc[4, 'high'] = 50.0
+    merged = downsample_ohlcv(bars, 4)
+    
+    # Runs of ceil(10 / 4) = 3 bars
+    assert list(merged['datetime']) == list(bars['datetime'].iloc[[0, 3, 6, 9]])
+    assert merged['high'].tolist() == [3.0, 50.0, 9.0, 10.0]
+    assert merged['low'].min() == -1.0 and merged['volume'].tolist() == [3.0, 3.0, 3.0, 1.0]
+    assert downsample_ohlcv(bars, 10).equals(bars)
+
+def test_source_timeframe_picks_coarsest_divisor():
+    assert source_timeframe('1h', ['1d', '5m', '15m']) == '15m'
+    assert source_timeframe('30m', ['1d', '5m', '15m', '1h']) == '15m'
+    assert source_timeframe('1d', ['1d', '5m']) == '1d'
+    with pytest.raises(ValueError):
+        source_timeframe('1h', ['1d'])
+
+def test_history_days():
+    # 100 sessions span 140 calendar days, plus 5 for holidays
+    assert history_days(100) == 145
+    # 09:15-15:30 holds 75 five-minute bars, so 150 bars need 2 sessions
+    assert history_days(150, '5m') == 8
+
+@pytest.mark.parametrize('backend', ['sql', 'parquet'])
+def test_retention_prunes_old_intraday_bars(backend, tmp_path, monkeypatch):
+    store = get_ohlcv_store() if backend == 'sql' else ParquetOHLCVStore(str(tmp_path))
+    symbol = f'PRUNE_{backend.upper()}'
+    today = datetime.now().replace(hour=9, minute=15, second=0, microsecond=0)
+    times = [today - timedelta(days=40), today - timedelta(days=40, minutes=-5), today - timedelta(days=10)]
+    bars = _bars(times, [1.0] * 3, [2.0] * 3, [0.5] * 3, [1.5] * 3, [10.0] * 3)
+    store.write(symbol, bars, '5m')
+    store.write(symbol, resample_ohlcv(bars, '1d'), '1d')
+    monkeypatch.setattr(data_service, 'BAR_RETENTION_DAYS', {'5m': 30})
+    
+    data_service._apply_retention(store, [symbol])
+    
+    assert list(store.read([symbol], timeframe='5m')[symbol]['datetime']) == [pd.Timestamp(times[2])]
+    assert len(store.read([symbol], timeframe='1d')[symbol]) == 2
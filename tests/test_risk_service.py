@@ -0,0 +1,77 @@
+from services.risk_service import check_orders
+
+SETTINGS = {'min_confidence': 7, 'max_risk_score': 5, 'max_daily_trades': 5, 'risk_per_trade_pct': 1.0,
+            'max_symbol_exposure_pct': 20}
+
+def trade(stock, confidence=8, risk_score=3, entry=100.0, stop=98.0, action='BUY'):
+    target = entry * 1.1 if action == 'BUY' else entry * 0.9
+    return {'stock': stock, 'action': action, 'entry_price': entry, 'stop_loss': stop, 'take_profit': target,
+            'order_type': 'DELIVERY', 'risk_score': risk_score, 'confidence': confidence, 'reasoning': ''}
+
+def account(funds, exposure=None):
+    return {'aggregates': {'available_funds': funds, 'exposure': exposure or {}}}
+
+def check(trades, executed_today=0, funds=1_000_000.0, exposure=None, **settings):
+    approved, rejected = check_orders(trades, dict(SETTINGS, **settings), account(funds, exposure), executed_today)
+    return {t['stock']: t['quantity'] for t in approved}, {t['stock']: reason for t, reason in rejected}
+
+def test_sizes_by_risk_per_trade():
+    # 1% of 1,000,000 at risk over a 10.0 stop distance, within the 200,000 exposure cap
+    approved, rejected = check([trade('TCS', entry=100.0, stop=90.0)])
+    
+    assert approved == {'TCS': 1000}
+    assert rejected == {}
+
+def test_caps_quantity_at_symbol_exposure():
+    # 20% of (900,000 funds + 100,000 held) is 200,000, of which 100,000 is already held
+    approved, _ = check([trade('TCS', entry=100.0, stop=99.9)], funds=900_000.0, exposure={'TCS': 100_000.0})
+    
+    assert approved == {'TCS': 1000}
+
+def test_rejection_reasons():
+    trades = [
+        trade('LOWCONF', confidence=5),
+        trade('RISKY', risk_score=8),
+        dict(trade('HOLDING'), action='HOLD'),
+        trade('BAD', stop=120.0),
+        trade('WIDE', entry=100.0, stop=1.0),
+    ]
+    approved, rejected = check(trades, funds=1_000.0)
+    
+    assert approved == {}
+    assert rejected == {
+        'LOWCONF': "Confidence below 7",
+        'RISKY': "Risk score above 5",
+        'HOLDING': "HOLD decision, nothing to execute",
+        'BAD': "Invalid trade: BUY requires stop_loss < entry_price < take_profit",
+        'WIDE': "Stop too far from entry to size one share within the per-trade risk",
+    }
+
+def test_exposure_cap_reached():
+    _, rejected = check([trade('TCS')], funds=100_000.0, exposure={'TCS': 50_000.0})
+    
+    assert rejected == {'TCS': "Exposure cap of 20% of capital reached"}
+
+def test_keeps_best_decision_per_symbol():
+    trades = [trade('TCS', confidence=8), trade('TCS', confidence=9, risk_score=4), trade('TCS', confidence=9, risk_score=2)]
+    approved, rejected = check_orders(trades, SETTINGS, account(1_000_000.0), 0)
+    
+    assert approved == [trades[2]]
+    assert [reason for _, reason in rejected] == ["A higher ranked decision for this symbol is in the same batch"] * 2
+
+def test_daily_limit_goes_to_highest_confidence():
+    trades = [trade('A', confidence=7), trade('B', confidence=9), trade('C', confidence=8)]
+    approved, rejected = check(trades, executed_today=3)
+    
+    assert set(approved) == {'B', 'C'}
+    assert rejected == {'A': "Daily limit of 5 trades reached"}
+
+def test_order_too_large_for_funds_does_not_block_cheaper_ones():
+    # Capital includes the 50,000 already held, so the top order is sized beyond the free funds
+    trades = [trade('BIG', confidence=10, entry=1000.0, stop=999.0), trade('A', confidence=9, entry=10.0, stop=9.0),
+              trade('B', confidence=8, entry=10.0, stop=9.0), trade('C', confidence=7, entry=10.0, stop=9.0)]
+    approved, rejected = check(trades, funds=50_000.0, exposure={'X': 50_000.0}, max_daily_trades=2,
+                               max_symbol_exposure_pct=100)
+    
+    assert approved == {'A': 1000, 'B': 1000}
+    assert rejected == {'BIG': "Insufficient funds", 'C': "Daily limit of 2 trades reached"}
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+from services.storage_service import ParquetOHLCVStore, get_ohlcv_store
+
+@pytest.fixture(params=['sql', 'parquet'])
+def store(request, tmp_path):
+    return get_ohlcv_store() if request.param == 'sql' else ParquetOHLCVStore(str(tmp_path))
+
+def test_backends_return_the_same_frames(store):
+    bars = pd.DataFrame({'datetime': pd.date_range('2024-01-01', periods=3), 'open': [1.0, 2.0, 3.0],
+                         'high': [2.0, 3.0, 4.0], 'low': [0.5, 1.5, 2.5], 'close': [1.5, 2.5, 3.5],
+                         'volume': [10, 20, 30]})
+    store.write('STORED', bars)
+    frames = store.read(['STORED', 'MISSING'])
+    # No rows at all for the query
+    only_missing = store.read(['MISSING'])['MISSING']
+    
+    assert list(frames) == ['STORED', 'MISSING']
+    for frame in [*frames.values(), only_missing]:
+        assert frame.dtypes.astype(str).to_dict() == {'datetime': 'datetime64[ns]', 'open': 'float64',
+                                                     'high': 'float64', 'low': 'float64', 'close': 'float64',
+                                                     'volume': 'float64'}
+    assert frames['MISSING'].empty
+    pd.testing.assert_frame_equal(frames['STORED'], bars.astype({'volume': float}))
@@ -0,0 +1,44 @@
+import asyncio
+import pandas as pd
+from services.storage_service import get_ohlcv_store
+from services.stream_service import ReplaySource, StreamPipeline
+
+TICKS = [
+    ('2024-01-02 09:15:10', 'STRM', 100.0, 10),
+    ('2024-01-02 09:16:00', 'OTHR', 10.0, 1),
+    ('2024-01-02 09:17:00', 'STRM', 102.0, 5),
+    ('2024-01-02 09:19:59', 'STRM', 99.0, 5),
+    ('2024-01-02 09:20:30', 'STRM', 101.0, 10),
+    # Arrives after its bar was closed
+    ('2024-01-02 09:19:00', 'STRM', 50.0, 100),
+    ('2024-01-02 09:24:00', 'STRM', 103.0, 10),
+    ('2024-01-02 10:16:00', 'STRM', 104.0, 1),
+]
+
+def _bars(symbol, timeframe):
+    frame = get_ohlcv_store().read([symbol], timeframe=timeframe)[symbol]
+    return [(str(row.datetime), row.open, row.high, row.low, row.close, row.volume) for row in frame.itertuples()]
+
+def test_replay_builds_bars_and_derived_timeframes(tmp_path):
+    path = tmp_path / 'ticks.csv'
+    pd.DataFrame(TICKS, columns=['datetime', 'symbol', 'price', 'volume']).to_csv(path, index=False)
+    pipeline = StreamPipeline(ReplaySource(str(path), speed=0), timeframe='5m', batch_size=1)
+    events = pipeline.subscribe()
+    
+    stats = asyncio.run(pipeline.run())
+    
+    assert (stats['ticks'], stats['bars'], stats['late_ticks']) == (8, 2, 1)
+    assert [event['bar']['datetime'] for event in [events.get_nowait() for _ in range(events.qsize())]] == \
+        [pd.Timestamp('2024-01-02 09:15'), pd.Timestamp('2024-01-02 09:20')]
+    assert _bars('STRM', '5m') == [
+        ('2024-01-02 09:15:00', 100.0, 102.0, 99.0, 99.0, 20.0),
+        ('2024-01-02 09:20:00', 101.0, 103.0, 101.0, 103.0, 20.0),
+        ('2024-01-02 10:15:00', 104.0, 104.0, 104.0, 104.0, 1.0),
+    ]
+    # Open bars are written on the final flush, and the derived timeframes follow them
+    assert _bars('STRM', '1h') == [
+        ('2024-01-02 09:15:00', 100.0, 103.0, 99.0, 103.0, 40.0),
+        ('2024-01-02 10:15:00', 104.0, 104.0, 104.0, 104.0, 1.0),
+    ]
+    assert _bars('STRM', '1d') == [('2024-01-02 00:00:00', 100.0, 104.0, 99.0, 104.0, 41.0)]
+    assert _bars('OTHR', '5m') == [('2024-01-02 09:15:00', 10.0, 10.0, 10.0, 10.0, 1.0)]
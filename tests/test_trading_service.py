@@ -0,0 +1,87 @@
+import json
+import re
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import delete
+from database import get_database_engine
+from models import SignalCacheEntry
+from services.journal_service import count_signals, get_journal_writer
+from services.trading_service import get_trade_decisions
+
+def _decision(symbol):
+    return {"stock": symbol, "action": "BUY", "reasoning": "breakout", "entry_price": 100.0, "stop_loss": 95.0,
+            "take_profit": 110.0, "order_type": "DELIVERY", "risk_score": 4, "confidence": 8}
+
+class FakeClient:
+    """
+    Answers like the LLM API without streaming: one decision for single prompts and an array for
+    batched ones. Symbols in `omit` are left out of batched replies; symbols in `hang` stall until released.
+    """
+    def __init__(self, omit=(), hang=()):
+        self.omit = set(omit)
+        self.hang = set(hang)
+        self.prompts = []
+        self.released = threading.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    
+    def create(self, model, messages, timeout=None, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        batch = re.findall(r"^### (\w+)$", prompt, re.MULTILINE)
+        symbols = batch or re.findall(r"Analyze the following stock: (\w+)", prompt)
+        if self.hang & set(symbols):
+            self.released.wait(5)
+        if batch:
+            content = json.dumps([_decision(symbol) for symbol in batch if symbol not in self.omit])
+        else:
+            content = json.dumps(_decision(symbols[0]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def _frame(seed: int, days: int = 300) -> pd.DataFrame:
+    close = 100 + np.random.default_rng(seed).normal(0, 1, days).cumsum()
+    return pd.DataFrame({"datetime": pd.date_range("2023-01-02", periods=days, freq="B"), "open": close,
+                         "high": close + 1, "low": close - 1, "close": close, "volume": 1000.0})
+
+SYMBOLS = ["TCS", "INFY", "WIPRO"]
+FRAMES = {symbol: _frame(seed) for seed, symbol in enumerate(SYMBOLS)}
+
+@pytest.fixture(autouse=True)
+def empty_signal_cache():
+    with get_database_engine().begin() as conn:
+        conn.execute(delete(SignalCacheEntry))
+
+def _signals() -> int:
+    get_journal_writer().flush()
+    return count_signals()
+
+def test_times_out_hanging_requests():
+    client = FakeClient(hang={"INFY"})
+    try:
+        results = get_trade_decisions(SYMBOLS, FRAMES, client, max_in_flight=3, timeout=1, batch_size=1)
+    finally:
+        client.released.set()
+    
+    assert results["INFY"] == (None, "Timed out after 1s")
+    assert results["TCS"][0]["stock"] == "TCS" and results["WIPRO"][0]["stock"] == "WIPRO"
+
+def test_retries_symbols_missing_from_batch_individually():
+    client = FakeClient(omit={"INFY"})
+    results = get_trade_decisions(SYMBOLS, FRAMES, client, batch_size=2)
+    
+    assert all(trade and error is None for trade, error in results.values())
+    # Two batches, then INFY on its own
+    assert len(client.prompts) == 3
+    assert "Analyze the following stock: INFY" in client.prompts[-1]
+
+def test_cache_hits_return_journaled_signal():
+    first = get_trade_decisions(SYMBOLS, FRAMES, FakeClient(), batch_size=1)
+    signals = _signals()
+    client = FakeClient()
+    second = get_trade_decisions(SYMBOLS, FRAMES, client, batch_size=1)
+    
+    assert client.prompts == []
+    assert {s: t["signal_id"] for s, (t, _) in second.items()} == {s: t["signal_id"] for s, (t, _) in first.items()}
+    assert _signals() == signals
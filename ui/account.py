@@ -1,38 +1,40 @@
 import streamlit as st
 import pandas as pd
-from services.account_service import get_account_summary
+from services.account_service import get_account_snapshots
 
 def render_account():
     st.header("Account Overview")
-    account_data = get_account_summary()
+    snapshots = get_account_snapshots()
+    account_data = snapshots.refresh() if st.button("Refresh Account") else snapshots.get()
     
     if not account_data:
         st.error("Unable to fetch account information")
         return
     
+    fetched_at = account_data['fetched_at'].strftime('%d-%m-%Y %H:%M:%S')
+    if account_data['stale']:
+        st.warning(f"Showing account data from {fetched_at}; the latest refresh failed: {account_data['error']}")
+    else:
+        st.caption(f"As of {fetched_at}")
+    totals = account_data['aggregates']
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Funds")
         if 'funds' in account_data and account_data['funds']:
-            funds = account_data['funds']
-            st.metric("Available Cash", f"₹{funds.get('limit', 0):,.2f}")
-            st.metric("Margin Used", f"₹{funds.get('used', 0):,.2f}")
-            st.metric("Net Balance", f"₹{funds.get('net', 0):,.2f}")
+            st.metric("Available Cash", f"₹{totals['available_funds'] or 0:,.2f}")
+            st.metric("Margin Used", f"₹{totals['used_margin'] or 0:,.2f}")
+            st.metric("Net Balance", f"₹{totals['net_balance'] or 0:,.2f}")
         else:
             st.warning("Fund data not available")
     
     with col2:
         st.subheader("Portfolio Summary")
         if 'holdings' in account_data and account_data['holdings']:
-            holdings = account_data['holdings']
-            total_investment = sum(h.get('buyAvg', 0) * h.get('quantity', 0) for h in holdings)
-            current_value = sum(h.get('ltp', 0) * h.get('quantity', 0) for h in holdings)
-            profit_loss = current_value - total_investment
-            
-            st.metric("Total Investment", f"₹{total_investment:,.2f}")
-            st.metric("Current Value", f"₹{current_value:,.2f}")
-            st.metric("Profit/Loss", f"₹{profit_loss:,.2f}")
+            st.metric("Total Investment", f"₹{totals['total_investment']:,.2f}")
+            st.metric("Current Value", f"₹{totals['current_value']:,.2f}")
+            st.metric("Profit/Loss", f"₹{totals['profit_loss']:,.2f}")
         else:
             st.warning("Holdings data not available")
     
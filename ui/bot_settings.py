@@ -1,6 +1,8 @@
 import streamlit as st
 import os
 from config import WATCHLIST
+from services.risk_service import get_risk_settings, save_risk_settings
+from services.sweep_service import run_sweep
 
 def render_bot_settings():
     st.header("Bot Configuration")
@@ -30,15 +32,65 @@ def render_bot_settings():
     st.divider()
     
     st.subheader("Risk Parameters")
+    settings = get_risk_settings()
+    # Values from the environment may lie outside the widget ranges, which Streamlit rejects
+    clamp = lambda value, low, high: min(max(value, low), high)
     col1, col2 = st.columns(2)
     
     with col1:
-        min_confidence = st.slider("Minimum Confidence", 1, 10, 7)
-        max_daily_trades = st.number_input("Max Daily Trades", 1, 20, 5)
+        min_confidence = st.slider("Minimum Confidence", 1, 10, clamp(int(settings['min_confidence']), 1, 10))
+        max_daily_trades = st.number_input("Max Daily Trades", 1, 100, clamp(int(settings['max_daily_trades']), 1, 100))
+        risk_per_trade_pct = st.number_input("Risk per Trade (% of capital)", 0.1, 10.0,
+                                             clamp(float(settings['risk_per_trade_pct']), 0.1, 10.0), step=0.1)
     
     with col2:
-        max_risk = st.slider("Maximum Risk Score", 1, 10, 5)
+        max_risk = st.slider("Maximum Risk Score", 1, 10, clamp(int(settings['max_risk_score']), 1, 10))
+        max_symbol_exposure_pct = st.number_input("Max Exposure per Symbol (% of capital)", 1.0, 100.0,
+                                                  clamp(float(settings['max_symbol_exposure_pct']), 1.0, 100.0), step=1.0)
         st.session_state.auto_execute = st.toggle("Auto-Execute Trades", value=st.session_state.auto_execute)
     
     if st.button("Save Risk Parameters"):
-        st.success("Risk parameters saved!")
\ No newline at end of file
+        success, message = save_risk_settings({
+            'min_confidence': min_confidence,
+            'max_risk_score': max_risk,
+            'max_daily_trades': int(max_daily_trades),
+            'risk_per_trade_pct': risk_per_trade_pct,
+            'max_symbol_exposure_pct': max_symbol_exposure_pct
+        })
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    
+    st.divider()
+    
+    st.subheader("Parameter Sweep")
+    st.caption("Backtests every combination of the risk parameters against stored data and journaled signals.")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        confidence_range = st.slider("Confidence Range", 1, 10, (5, 9))
+    with col2:
+        risk_range = st.slider("Risk Score Range", 1, 10, (3, 8))
+    with col3:
+        daily_trade_options = st.multiselect("Max Daily Trades", [1, 2, 3, 5, 10, 20], default=[3, 5, 10])
+    sweep_days = st.number_input("History (days)", 30, 365 * 5, 365)
+    
+    if st.button("Run Sweep"):
+        with st.spinner("Running parameter sweep..."):
+            results = run_sweep(
+                min_confidences=range(confidence_range[0], confidence_range[1] + 1),
+                max_risks=range(risk_range[0], risk_range[1] + 1),
+                max_daily_trades=daily_trade_options,
+                days=sweep_days
+            )
+        if results.empty:
+            st.warning("No journaled signals with confidence and risk scores to evaluate")
+        else:
+            st.dataframe(results.head(20).style.format({
+                'total_pnl': '₹{:,.2f}',
+                'hit_rate': '{:.1%}',
+                'avg_return': '{:.2%}',
+                'max_drawdown': '₹{:,.2f}',
+                'max_drawdown_pct': '{:.1%}'
+            }), hide_index=True)
\ No newline at end of file
@@ -2,10 +2,9 @@ import streamlit as st
 import pandas as pd
 from apis import initialize_dhan_and_krutrim
 from config import WATCHLIST
-from datetime import datetime
-from services.trading_service import get_trade_decision, execute_trade
-from services.data_service import fetch_and_store_data, get_data_from_db
-from services.account_service import get_account_summary
+from services.data_service import get_data_for_symbols
+from services.journal_service import get_signals
+from services.pipeline_service import get_last_run, run_cycle
 
 def render_dashboard():
     col1, col2 = st.columns([2, 1])
@@ -21,9 +20,9 @@ def render_dashboard():
         
         st.subheader("Watchlist Performance")
         performance_data = []
-        for symbol in WATCHLIST:
-            df = get_data_from_db(symbol, days=7)
-            if df is not None and not df.empty:
+        weekly_data = get_data_for_symbols(WATCHLIST, days=7) or {}
+        for symbol, df in weekly_data.items():
+            if not df.empty:
                 change_pct = (df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0] * 100
                 performance_data.append({
                     "Symbol": symbol,
@@ -51,29 +50,37 @@ def render_dashboard():
             st.warning("Market data not yet refreshed")
         
         st.subheader("Auto Execution")
-        st.session_state.auto_execute = st.toggle("Enable Auto-Execute Trades")
-
+        # Signal generation and execution run in the background worker (python worker.py);
+        # the dashboard only reports the latest cycle it recorded
+        last_run = get_last_run()
+        if last_run:
+            st.info(f"Last worker cycle: {last_run['finished_at'].strftime('%d-%m-%Y %H:%M:%S')} | "
+                    f"{last_run['signals']}/{last_run['symbols']} signals, {last_run['executed']} executed, "
+                    f"{last_run['screened_out']} LLM calls avoided by the screener")
+            errors = {symbol: result['error'] for symbol, result in last_run['results'].items() if 'error' in result}
+            for symbol, error in errors.items():
+                st.error(f"Trade Signal Error ({symbol}): {error}")
+            rejections = {symbol: result['rejected'] for symbol, result in last_run['results'].items() if 'rejected' in result}
+            for symbol, reason in rejections.items():
+                st.warning(f"Order Rejected ({symbol}): {reason}")
+        else:
+            st.warning("No worker cycle recorded yet. Start it with `python worker.py`.")
+        
+        if st.button("Run Cycle Now"):
+            with st.spinner("Running pipeline cycle..."):
+                run = run_cycle(WATCHLIST, execute=st.session_state.auto_execute)
+            st.success(f"Cycle finished: {run['signals']} signals, {run['executed']} executed, "
+                       f"{run['screened_out']} skipped by the screener")
+        
         if st.session_state.auto_execute:
-            st.write("✅ Auto-execution is ENABLED")
-            for symbol in WATCHLIST:
-                trade, error = get_trade_decision(symbol)
-                if trade:
-                    trade['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    st.session_state.trade_history.append(trade)
-                    success, message = execute_trade(trade)
-                    if success:
-                        st.success(f"Trade Executed: {message}")
-                        trade['executed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        st.error(f"Trade Execution Failed: {message}")
-                else:
-                    st.error(f"Trade Signal Error: {error}")
+            st.write("✅ Auto-execution is ENABLED for manual cycles")
         else:
-            st.write("⚠️ Auto-execution is DISABLED")
+            st.write("⚠️ Auto-execution is DISABLED for manual cycles")
 
     
     st.subheader("Recent Trade Signals")
-    if st.session_state.trade_history:
-        st.dataframe(pd.DataFrame(st.session_state.trade_history[-5:]), hide_index=True)
+    recent_trades = get_signals(limit=5)
+    if recent_trades:
+        st.dataframe(pd.DataFrame(recent_trades).drop(columns=['signal_id']), hide_index=True)
     else:
         st.info("No recent trade signals")
\ No newline at end of file
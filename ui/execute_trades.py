@@ -1,17 +1,24 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from services.decision_service import format_price
+from services.journal_service import get_signals, count_signals, get_executions
+from services.risk_service import check_orders
 from services.trading_service import execute_trade
 
+PAGE_SIZE = 5
+
 def render_execute_trades():
     st.header("Trade Execution")
     
-    if not st.session_state.trade_history:
+    total = count_signals()
+    if not total:
         st.warning("No trade signals available")
         return
     
-    recent_trades = st.session_state.trade_history[-5:]
-    trade_options = [f"{t['timestamp']} | {t['action']} {t['stock']} @ ₹{t['entry_price']:.2f}" 
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = st.number_input("Signal page", min_value=1, max_value=pages, value=1, step=1)
+    recent_trades = get_signals(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    trade_options = [f"{t['timestamp']} | {t['action']} {t['stock']} @ {format_price(t['entry_price'])}" 
                     for t in recent_trades]
     
     selected_idx = st.selectbox("Select Trade", range(len(recent_trades)), 
@@ -25,9 +32,9 @@ def render_execute_trades():
         action_color = "green" if trade['action'] == "BUY" else "red"
         st.markdown(f"<h3 style='color: {action_color};'>{trade['action']} {trade['stock']}</h3>",
                     unsafe_allow_html=True)
-        st.metric("Entry Price", f"₹{trade['entry_price']:.2f}")
-        st.metric("Stop Loss", f"₹{trade['stop_loss']:.2f}")
-        st.metric("Take Profit", f"₹{trade['take_profit']:.2f}")
+        st.metric("Entry Price", format_price(trade['entry_price']))
+        st.metric("Stop Loss", format_price(trade['stop_loss']))
+        st.metric("Take Profit", format_price(trade['take_profit']))
     
     with col2:
         st.subheader("Risk Analysis")
@@ -36,9 +43,20 @@ def render_execute_trades():
         st.write(trade['reasoning'])
     
     if st.button("Execute Trade"):
-        success, message = execute_trade(trade)
+        if trade['action'] == "HOLD":
+            success, message = execute_trade(trade)
+        else:
+            approved, rejected = check_orders([trade])
+            success, message = execute_trade(trade) if approved else (False, f"Rejected by risk checks: {rejected[0][1]}")
         if success:
             st.success(message)
-            trade['executed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         else:
-            st.error(message)
\ No newline at end of file
+            st.error(message)
+    
+    st.subheader("Recent Executions")
+    executions = get_executions(limit=10)
+    if executions:
+        st.dataframe(pd.DataFrame(executions)[['timestamp', 'symbol', 'action', 'order_type', 'quantity', 'filled_quantity', 'price', 'status']],
+                     hide_index=True)
+    else:
+        st.info("No executions recorded")
\ No newline at end of file
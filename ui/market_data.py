@@ -1,17 +1,29 @@
 import streamlit as st
 import pandas as pd
-from services.data_service import fetch_and_store_data, get_data_from_db
+from services.data_service import fetch_and_store_data, get_data_from_db, available_timeframes
 from services.plot_service import plot_stock_data
+from services.cache_service import get_ohlcv_cache, get_figure_cache
 from config import WATCHLIST
 
+# Range label -> days of history charted
+CHART_RANGES = {'1M': 30, '3M': 90, '1Y': 365, '5Y': 1825}
+INTRADAY_CHART_RANGES = {'1D': 1, '5D': 5, '1M': 30}
+
 def render_market_data():
     st.header("Market Data")
     
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        selected_symbol = st.selectbox("Select Stock", WATCHLIST)
-        plot_stock_data(selected_symbol)
+        symbol_col, timeframe_col, range_col = st.columns([2, 1, 1])
+        selected_symbol = symbol_col.selectbox("Select Stock", WATCHLIST)
+        timeframes = available_timeframes()
+        timeframe = timeframe_col.selectbox("Timeframe", timeframes, index=timeframes.index('1d'))
+        # Longer ranges are downsampled to CHART_MAX_POINTS candles by plot_stock_data
+        ranges = CHART_RANGES if timeframe == '1d' else INTRADAY_CHART_RANGES
+        chart_range = range_col.selectbox("Range", list(ranges), index=list(ranges).index('1M' if timeframe == '1d' else '5D'))
+        chart_days = ranges[chart_range]
+        plot_stock_data(selected_symbol, timeframe, chart_days)
     
     with col2:
         st.subheader("Data Controls")
@@ -36,9 +48,16 @@ def render_market_data():
                     st.session_state.last_data_refresh = pd.Timestamp.now()
                 else:
                     st.error(message)
+        
+        cache_stats = get_ohlcv_cache().stats()
+        st.caption(f"OHLCV cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)")
+        figure_stats = get_figure_cache().stats()
+        st.caption(f"Chart cache: {figure_stats['hits']} hits / {figure_stats['misses']} misses "
+                   f"({figure_stats['entries']} figures)")
     
-    st.subheader(f"Recent Data: {selected_symbol}")
-    df = get_data_from_db(selected_symbol, days=10)
+    st.subheader(f"Recent Data: {selected_symbol} ({timeframe})")
+    df = get_data_from_db(selected_symbol, days=10 if timeframe == '1d' else min(chart_days, 5), timeframe=timeframe)
     if df is not None and not df.empty:
         st.dataframe(df.style.format({
             'open': '{:.2f}',
@@ -1,15 +1,15 @@
 import streamlit as st
 import pandas as pd
 import config
-from datetime import datetime
+from services.decision_service import format_price
+from services.journal_service import get_signals, count_signals, clear_signals
 from services.trading_service import get_trade_decision
 
+PAGE_SIZE = 10
+
 if 'WATCHLIST' not in st.session_state:
     st.session_state.WATCHLIST = config.WATCHLIST
 
-if 'trade_history' not in st.session_state:
-    st.session_state.trade_history = []
-
 def render_trade_signals():
     st.header("AI Trading Signals")
     
@@ -22,26 +22,28 @@ def render_trade_signals():
             with st.spinner("Analyzing..."):
                 trade, error = get_trade_decision(symbol)
                 if trade:
-                    trade['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    st.session_state.trade_history.append(trade)
                     display_trade_details(trade)
                 else:
                     st.error(f"Error: {error}")
     with col2:
         st.subheader("Signal History")
-        if st.session_state.trade_history:
+        total = count_signals()
+        if total:
+            pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
             history_df = pd.DataFrame([{
                 'Time': t['timestamp'],
                 'Symbol': t['stock'],
                 'Action': t['action'],
                 'Price': t['entry_price']
-            } for t in st.session_state.trade_history[-5:]])
+            } for t in get_signals(limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)])
             
             st.dataframe(history_df, hide_index=True)
+            st.caption(f"Page {page} of {pages} ({total} signals)")
             
             if st.button("Clear History"):
-                st.session_state.trade_history = []
-                st.experimental_rerun()
+                clear_signals()
+                st.rerun()
         else:
             st.info("No signal history")
 
@@ -53,9 +55,9 @@ def display_trade_details(trade):
                 unsafe_allow_html=True)
     
     cols = st.columns(3)
-    cols[0].metric("Entry", f"₹{trade['entry_price']:.2f}")
-    cols[1].metric("Stop Loss", f"₹{trade['stop_loss']:.2f}")
-    cols[2].metric("Take Profit", f"₹{trade['take_profit']:.2f}")
+    cols[0].metric("Entry", format_price(trade['entry_price']))
+    cols[1].metric("Stop Loss", format_price(trade['stop_loss']))
+    cols[2].metric("Take Profit", format_price(trade['take_profit']))
     
     with st.expander("Analysis Details"):
         st.write(trade['reasoning'])
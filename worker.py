@@ -0,0 +1,72 @@
+"""
+Background worker that runs the trading pipeline on a schedule, independent of the Streamlit UI.
+
+    python worker.py                 # loop every WORKER_INTERVAL_SECONDS
+    python worker.py --once          # single cycle, e.g. from cron
+    python worker.py --execute       # also execute generated signals (paper broker unless EXECUTION_BROKER=dhan)
+    python worker.py --stream        # build bars from the live Dhan market feed instead of polling
+    python worker.py --replay ticks.csv --speed 0   # stream recorded ticks, e.g. as a throughput benchmark
+"""
+import argparse
+import asyncio
+import logging
+import time
+from config import WATCHLIST, WORKER_INTERVAL_SECONDS, WORKER_AUTO_EXECUTE, REPLAY_SPEED, ORDER_DRAIN_SECONDS
+from services.execution_service import get_execution_gateway
+from services.pipeline_service import run_cycle
+from services.stream_service import DhanFeedSource, RecordingSource, ReplaySource, run_stream
+
+logger = logging.getLogger("worker")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the AutoTrader data/signal pipeline in the background")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--interval", type=float, default=WORKER_INTERVAL_SECONDS, help="seconds between cycle starts")
+    parser.add_argument("--symbols", default=",".join(WATCHLIST), help="comma-separated symbols")
+    parser.add_argument("--no-refresh", action="store_true", help="skip market data ingestion")
+    parser.add_argument("--no-signals", action="store_true", help="skip LLM signal generation")
+    parser.add_argument("--execute", action="store_true", default=WORKER_AUTO_EXECUTE,
+                        help="execute generated signals through the execution gateway")
+    parser.add_argument("--stream", action="store_true", help="ingest live quotes from the Dhan market feed")
+    parser.add_argument("--replay", metavar="PATH", help="ingest ticks recorded in a CSV or Parquet file")
+    parser.add_argument("--speed", type=float, default=REPLAY_SPEED,
+                        help="replay speed multiplier, 0 for as fast as possible")
+    parser.add_argument("--record", metavar="PATH", help="append streamed ticks to a CSV file for later replay")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    if args.stream or args.replay:
+        source = ReplaySource(args.replay, args.speed, symbols) if args.replay else DhanFeedSource(symbols)
+        if args.record:
+            source = RecordingSource(source, args.record)
+        try:
+            stats = asyncio.run(run_stream(source, signals=not args.no_signals, execute=args.execute))
+        except KeyboardInterrupt:
+            return
+        logger.info("Stream finished: %d ticks, %d bars in %.1fs (%.0f ticks/s)",
+                    stats['ticks'], stats['bars'], stats['elapsed'], stats['ticks_per_second'])
+        return
+    
+    while True:
+        started = time.monotonic()
+        try:
+            run = run_cycle(symbols, refresh=not args.no_refresh, signals=not args.no_signals, execute=args.execute)
+            logger.info("Cycle finished: %d signals, %d executed, %d LLM calls avoided by the screener",
+                        run['signals'], run['executed'], run['screened_out'])
+        except Exception:
+            logger.exception("Cycle failed")
+        
+        if args.once:
+            # Orders are tracked by a daemon thread, so give their fills a chance to reach the journal
+            if args.execute and not get_execution_gateway().drain(ORDER_DRAIN_SECONDS):
+                logger.warning("Exiting with orders still open after %.0fs", ORDER_DRAIN_SECONDS)
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    main()